@@ -30,6 +30,7 @@ from acolite import adjacency
 
 from acolite import gem
 from acolite import parameters
+from acolite import benchmark
 
 ## ignore numpy errors
 import numpy as np
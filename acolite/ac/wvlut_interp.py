@@ -9,6 +9,7 @@
 ##                2018-01-31 (QV) fixed return when no sensor is given
 ##                2018-07-18 (QV) changed acolite import name
 ##                2021-02-24 (QV) new interpolation, lut is determined here and read generically
+##                2026-10-19 (QV) LUT path from lut_dir, as for the other LUTs
 
 def wvlut_interp(ths, thv, uwv=1.5, sensor=None, config='201710C', par_id = 2,
                   remote_base = 'https://raw.githubusercontent.com/acolite/acolite_luts/main'):
@@ -16,7 +17,7 @@ def wvlut_interp(ths, thv, uwv=1.5, sensor=None, config='201710C', par_id = 2,
     import scipy.interpolate
     import acolite as ac
 
-    lut_path = '{}/LUT/WV'.format(ac.config['data_dir'])
+    lut_path = '{}/WV'.format(ac.config['lut_dir'])
     lut_id = 'WV_{}'.format(config)
     lutnc = '{}/{}.nc'.format(lut_path,lut_id)
 
@@ -4,6 +4,7 @@
 ## 2021-03-10
 ## modifications: 2021-12-08 (QV) added nc_projection
 ##                2021-12-31 (QV) new handling of settings
+##                2026-10-19 (QV) added stream_archives setting
 
 def acolite_l1r(bundle, setu, input_type=None):
     import acolite as ac
@@ -31,7 +32,8 @@ def acolite_l1r(bundle, setu, input_type=None):
 
     ## identify bundle
     orig_bundle = [b for b in bundle]
-    identification = [ac.acolite.identify_bundle(b, output=setu['output']) for b in bundle]
+    stream_archives = setu['stream_archives'] if 'stream_archives' in setu else False
+    identification = [ac.acolite.identify_bundle(b, output=setu['output'], stream_archives=stream_archives) for b in bundle]
     input_types = [i[0] for i in identification]
     bundle = [i[1] for i in identification]
 
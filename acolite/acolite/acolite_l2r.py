@@ -7,6 +7,10 @@
 ##                2022-01-01 (QV) added segmented dsf option
 ##                2022-06-21 (QV) moved orange band to separate function
 ##                2022-07-15 (QV) added option to select most common model for non-fixed DSF
+##                2026-10-19 (QV) added reading of hyperspectral cubes in one read
+##                2026-10-19 (QV) hyperspectral LUT resampling with sparse band weight matrices
+##                2026-10-19 (QV) added stage metrics
+##                2026-10-19 (QV) same band weight matrix source with and without hyper_rsr_matrix_cache
 
 def acolite_l2r(gem,
                 output = None,
@@ -39,6 +43,11 @@ def acolite_l2r(gem,
     if 'verbosity' in setu: verbosity = setu['verbosity']
     if 'runid' not in setu: setu['runid'] = time_start.strftime('%Y%m%d_%H%M%S')
 
+    ## read rhot cubes at once instead of per band
+    if (setu['hyper_cube_preload']) & ('rhot' in [gem.cube_datasets[ds][0] for ds in gem.cube_datasets]):
+        if verbosity > 1: print('Reading rhot cube from {}'.format(gemf))
+        gem.cube_read('rhot')
+
     ## convert exclude bands to list
     if setu['dsf_exclude_bands'] != None:
         if type(setu['dsf_exclude_bands']) != list:
@@ -103,6 +112,7 @@ def acolite_l2r(gem,
     gem.gatts['pressure'] = setu['pressure']
 
     ## read ancillary data
+    ac.acolite.logging.stage_start('ancillary')
     if (setu['ancillary_data']) & ((('lat' in gem.datasets) & ('lon' in gem.datasets)) | (('lat' in gem.gatts) & ('lon' in gem.gatts))):
         if ('lat' in gem.datasets) & ('lon' in gem.datasets):
             clon = np.nanmedian(gem.data('lon'))
@@ -119,6 +129,7 @@ def acolite_l2r(gem,
             gem.gatts['wind'] = ((anc['z_wind']['interp']**2) + (anc['m_wind']['interp']**2))**0.5
         if ('press' in anc) & (setu['pressure'] is None):
             gem.gatts['pressure'] = anc['press']['interp']
+    ac.acolite.logging.stage_stop('ancillary')
 
     ## elevation provided
     if setu['elevation'] is not None:
@@ -128,6 +139,7 @@ def acolite_l2r(gem,
 
     ## dem pressure
     if setu['dem_pressure']:
+        ac.acolite.logging.stage_start('dem')
         if verbosity > 1: print('Extracting {} DEM data'.format(setu['dem_source']))
         if ('lat' in gem.datasets) & ('lon' in gem.datasets):
             dem = ac.dem.dem_lonlat(gem.data('lon'), gem.data('lat'), source = setu['dem_source'])
@@ -146,6 +158,7 @@ def acolite_l2r(gem,
             gem.data_mem['dem_pressure'] = dem_pressure
         dem = None
         dem_pressure = None
+        ac.acolite.logging.stage_stop('dem')
 
     ## which LUT data to read
     if (setu['dsf_interface_reflectance']):
@@ -176,7 +189,7 @@ def acolite_l2r(gem,
         gem.data(ds, store=True, return_data=False)
         if (ds == 'sza'):
             sza = gem.data(ds, store=True, return_data=True)
-            if sza != ():
+            if type(sza) is not tuple:
                 high_sza = np.where(sza>setu['sza_limit'])
                 if len(high_sza[0]) > 0:
                     print('Warning: SZA out of LUT range')
@@ -399,6 +412,7 @@ def acolite_l2r(gem,
 
     t0 = time.time()
     print('Loading LUTs')
+    ac.acolite.logging.stage_start('lut_import')
     ## load reverse lut romix -> aot
     if use_revlut: revl = ac.aerlut.reverse_lut(gem.gatts['sensor'], par=par, base_luts=setu['luts'])
     ## load aot -> atmospheric parameters lut
@@ -408,10 +422,22 @@ def acolite_l2r(gem,
                                   base_luts=setu['luts'], pressures = setu['luts_pressures'],
                                   reduce_dimensions=setu['luts_reduce_dimensions'])
     luts = list(lutdw.keys())
+    ac.acolite.logging.stage_stop('lut_import')
     print('Loading LUTs took {:.1f} s'.format(time.time()-t0))
 
+    ## band weight matrices for resampling hyperspectral LUT output
+    if hyper:
+        ## gaussian responses from band_waves and band_widths as rsrd, hyper_rsr_matrix_cache only sets the caching
+        if (gem.gatts['sensor'] != 'DESIS_HSI'):
+            rsrm = ac.shared.rsr_hyper_matrix(lutdw[luts[0]]['meta']['wave'], gem.gatts['band_waves'], gem.gatts['band_widths'],
+                                              cache = setu['hyper_rsr_matrix_cache'], decimals = setu['hyper_rsr_matrix_decimals'])
+        else:
+            rsrm = ac.shared.rsr_matrix(lutdw[luts[0]]['meta']['wave'], rsrd['rsr'], rsrd['rsr_bands'])
+        rsrm = {b: rsrm[bi] for bi, b in enumerate(rsrd['rsr_bands'])}
+
     ## #####################
     ## dark spectrum fitting
+    ac.acolite.logging.stage_start('aot_estimate')
     if (ac_opt == 'dsf'):
         ## user supplied aot
         if (setu['dsf_fixed_aot'] is not None):
@@ -596,7 +622,7 @@ def acolite_l2r(gem,
                                 rhot_aot = np.asarray(rhot_aot)
 
                             ## resample modeled results to current band
-                            tmp = ac.shared.rsr_convolute_nd(rhot_aot, lutdw[lut]['meta']['wave'], rsrd['rsr'][b]['response'], rsrd['rsr'][b]['wave'], axis=1)
+                            tmp = ac.shared.rsr_convolute_matrix(rhot_aot, rsrm[b], axis=1)
                             tmp = tmp.flatten()
 
                             ## interpolate rho path to observation
@@ -758,7 +784,7 @@ def acolite_l2r(gem,
                                     ## get hyperspectral results and resample to band
                                     res_hyp = lutdw[lut]['rgi']((xi[0], lutdw[lut]['ipd'][par], lutdw[lut]['meta']['wave'],
                                                                             xi[1], xi[2], xi[3], xi[4], aot_stack[lut]['aot'][aot_sub]))
-                                    rhop_f[aot_sub[0], aot_sub[1], ai] = ac.shared.rsr_convolute_nd(res_hyp.flatten(), lutdw[lut]['meta']['wave'], rsrd['rsr'][b]['response'], rsrd['rsr'][b]['wave'], axis=0)
+                                    rhop_f[aot_sub[0], aot_sub[1], ai] = ac.shared.rsr_convolute_matrix(res_hyp.flatten(), rsrm[b], axis=0)
                                 else:
                                     if setu['dsf_aot_estimate'] == 'segmented':
                                         for gki in range(len(aot_sub[0])):
@@ -989,6 +1015,7 @@ def acolite_l2r(gem,
             if not exp_fixed_epsilon:   gemo.write('epsilon', epsilon)
             if not exp_fixed_rhoam: gemo.write('rhoam', rhoam)
     ## end exponential
+    ac.acolite.logging.stage_stop('aot_estimate')
 
     ## set up interpolator for tiled processing
     if (ac_opt == 'dsf') & (setu['dsf_aot_estimate'] == 'tiled'):
@@ -1066,7 +1093,7 @@ def acolite_l2r(gem,
 
             ## compute Rayleigh reflectance
             if hyper:
-                rorayl_cur = ac.shared.rsr_convolute_nd(rorayl_hyp, lutdw[luts[0]]['meta']['wave'], rsrd['rsr'][b]['response'], rsrd['rsr'][b]['wave'], axis=0)
+                rorayl_cur = ac.shared.rsr_convolute_matrix(rorayl_hyp, rsrm[b], axis=0)
             else:
                 rorayl_cur = lutdw[luts[0]]['rgi'][b]((xi[0], lutdw[luts[0]]['ipd'][par], xi[1], xi[2], xi[3], xi[4], 0.001))
 
@@ -1105,6 +1132,7 @@ def acolite_l2r(gem,
 
         if gem.bands[b]['tt_gas'] < setu['min_tgas_rho']: continue
         if gem.bands[b]['rhot_ds'] not in gem.datasets: continue
+        ac.acolite.logging.stage_start('band_correction')
 
         ## apply cirrus correction
         if setu['cirrus_correction']:
@@ -1181,13 +1209,13 @@ def acolite_l2r(gem,
                                              lutdw[lut]['meta']['wave'], xi[1], xi[2], xi[3], xi[4], ai)).flatten()
                     ## resample to current band
                     ### path reflectance
-                    romix[ls] = ac.shared.rsr_convolute_nd(hyper_res[par], lutdw[lut]['meta']['wave'], rsrd['rsr'][b]['response'], rsrd['rsr'][b]['wave'], axis=0)
+                    romix[ls] = ac.shared.rsr_convolute_matrix(hyper_res[par], rsrm[b], axis=0)
                     ## transmittance and spherical albedo
-                    astot[ls] = ac.shared.rsr_convolute_nd(hyper_res['astot'], lutdw[lut]['meta']['wave'], rsrd['rsr'][b]['response'], rsrd['rsr'][b]['wave'], axis=0)
-                    dutott[ls] = ac.shared.rsr_convolute_nd(hyper_res['dutott'], lutdw[lut]['meta']['wave'], rsrd['rsr'][b]['response'], rsrd['rsr'][b]['wave'], axis=0)
+                    astot[ls] = ac.shared.rsr_convolute_matrix(hyper_res['astot'], rsrm[b], axis=0)
+                    dutott[ls] = ac.shared.rsr_convolute_matrix(hyper_res['dutott'], rsrm[b], axis=0)
                     ## total transmittance
                     if (setu['dsf_residual_glint_correction']) & (setu['dsf_residual_glint_correction_method']=='default'):
-                        ttot_all[b][ls] = ac.shared.rsr_convolute_nd(hyper_res['ttot'], lutdw[lut]['meta']['wave'], rsrd['rsr'][b]['response'], rsrd['rsr'][b]['wave'], axis=0)
+                        ttot_all[b][ls] = ac.shared.rsr_convolute_matrix(hyper_res['ttot'], rsrm[b], axis=0)
                 else:
                     ## path reflectance
                     romix[ls] = lutdw[lut]['rgi'][b]((xi[0], lutdw[lut]['ipd'][par], xi[1], xi[2], xi[3], xi[4], ai))
@@ -1291,8 +1319,8 @@ def acolite_l2r(gem,
                                         lutdw[luts[0]]['meta']['wave'], xi[1], xi[2], xi[3], xi[4], 0.001)).flatten()
                     dutotr_hyper = lutdw[luts[0]]['rgi']((xi[0], lutdw[luts[0]]['ipd']['dutott'],
                                         lutdw[luts[0]]['meta']['wave'], xi[1], xi[2], xi[3], xi[4], 0.001)).flatten()
-                    rorayl_cur = ac.shared.rsr_convolute_nd(rorayl_hyper, lutdw[luts[0]]['meta']['wave'], rsrd['rsr'][b]['response'], rsrd['rsr'][b]['wave'], axis=0)
-                    dutotr_cur = ac.shared.rsr_convolute_nd(dutotr_hyper, lutdw[luts[0]]['meta']['wave'], rsrd['rsr'][b]['response'], rsrd['rsr'][b]['wave'], axis=0)
+                    rorayl_cur = ac.shared.rsr_convolute_matrix(rorayl_hyper, rsrm[b], axis=0)
+                    dutotr_cur = ac.shared.rsr_convolute_matrix(dutotr_hyper, rsrm[b], axis=0)
                 else:
                     rorayl_cur = lutdw[luts[0]]['rgi'][b]((xi[0], lutdw[luts[0]]['ipd'][par], xi[1], xi[2], xi[3], xi[4], 0.001))
                     dutotr_cur = lutdw[luts[0]]['rgi'][b]((xi[0], lutdw[luts[0]]['ipd']['dutott'], xi[1], xi[2], xi[3], xi[4], 0.001))
@@ -1325,12 +1353,14 @@ def acolite_l2r(gem,
         ## write rhos
         gemo.write(dso, cur_data, ds_att = ds_att)
         cur_data = None
+        ac.acolite.logging.stage_stop('band_correction')
         if verbosity > 1: print('{}/B{} took {:.1f}s ({})'.format(gem.gatts['sensor'], b, time.time()-t0, 'RevLUT' if use_revlut else 'StdLUT'))
 
     ## update outputfile dataset info
     gemo.datasets_read()
 
     ## glint correction
+    ac.acolite.logging.stage_start('glint_correction')
     if (ac_opt == 'dsf') & (setu['dsf_residual_glint_correction']) & (setu['dsf_residual_glint_correction_method']=='default'):
         ## find bands for glint correction
         gc_swir1, gc_swir2 = None, None
@@ -1411,7 +1441,7 @@ def acolite_l2r(gem,
             ## sub_gc has the idx for non masked data with rhos_ref below the masking threshold
             gc_mask_data = gemo.data(gc_mask)
 
-            if gc_mask_data == (): ## can be an empty tuple for night time images (should not be processed, but this avoids a crash)
+            if type(gc_mask_data) is tuple: ## can be an empty tuple for night time images (should not be processed, but this avoids a crash)
                 print('No glint mask could be determined.')
             else:
                 sub_gc = np.where(np.isfinite(gc_mask_data) & \
@@ -1654,6 +1684,7 @@ def acolite_l2r(gem,
                     tmp = None
                 cur_rhog = None
     ## end alternative glint correction
+    ac.acolite.logging.stage_stop('glint_correction')
 
     ## compute oli orange band
     if (gemo.gatts['sensor'] in ['L8_OLI', 'L9_OLI', 'EO1_ALI']) & (setu['oli_orange_band']):
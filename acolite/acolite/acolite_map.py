@@ -6,6 +6,9 @@
 ##                2021-03-15 (QV) large update, including other parameters and mapping with pcolormesh
 ##                2021-04-01 (QV) changed plot_all option
 ##                2022-06-21 (QV) changed handling of l2_flags (if not int)
+##                2026-10-19 (QV) map_raster outputs using colour table lookup in ac.shared.quicklook_png,
+##                               added map_raster_decimation, map_raster_workers and map_raster_compress_level
+##                2026-10-19 (QV) added support for (band, y, x) cube datasets
 
 def acolite_map(ncf, output = None,
                 settings = None,
@@ -40,6 +43,8 @@ def acolite_map(ncf, output = None,
     ## output map to file
     def output_map(im, par):
         rgb = len(im.shape) > 2
+        if (setu['map_raster']) & (setu['map_raster_decimation'] > 1):
+            im = im[::setu['map_raster_decimation'], ::setu['map_raster_decimation']]
         norm, cmap = None, None
 
         ## find out parameter scaling to use
@@ -54,7 +59,7 @@ def acolite_map(ncf, output = None,
             elif cparl in pscale:
                 pard = {k:pscale[cparl][k] for k in pscale[cparl]}
             else:
-                pard = {'log':False, 'name':cpar, 'unit': ''}
+                pard = {'log':False, 'name':par, 'unit': ''}
                 pard['cmap'] = 'Planck_Parchment_RGB'
             ## do auto ranging
             if setu['map_auto_range'] | ('min' not in pard) | ('max' not in pard):
@@ -100,13 +105,15 @@ def acolite_map(ncf, output = None,
         ## raster 1:1 pixel outputs
         if setu['map_raster']:
             if not rgb:
-                ## scale to 255 int
-                im = ac.shared.datascl(im, dmin=pard['min'], dmax=pard['max'])
-                ## look up in colormap and convert to uint
-                im = cmap.__call__(im)[:,:,0:3]*255
-                im = im.astype(np.uint8)
-            img = Image.fromarray(im)
-            img.save(ofile)
+                ## colour table from colormap, bad and under colours
+                table = (cmap(np.linspace(0, 1, 254))[:, 0:3]*255).astype(np.uint8)
+                bad = tuple([int(v*255) for v in cmap.get_bad()[0:3]])
+                under = tuple([int(v*255) for v in cmap.get_under()[0:3]]) if setu['map_fill_outrange'] else None
+                ac.shared.quicklook_png(ofile, im, table=table, dmin=pard['min'], dmax=pard['max'],
+                                        bad=bad, under=under, compress_level=setu['map_raster_compress_level'])
+            else:
+                ac.shared.quicklook_png(ofile, im, compress_level=setu['map_raster_compress_level'])
+            if setu['verbosity']>1: print('Wrote {}'.format(ofile))
 
         ## matplotlib outputs
         else:
@@ -188,6 +195,12 @@ def acolite_map(ncf, output = None,
 
     ## get info from netcdf file
     datasets = ac.shared.nc_datasets(ncf)
+    ## list bands in cubes as separate datasets
+    cube_datasets = ac.shared.nc_cube_datasets(ncf)
+    if len(cube_datasets) > 0:
+        cubes = [cube_datasets[ds][0] for ds in cube_datasets]
+        datasets = [ds for ds in datasets if ds not in cubes+['wavelength']]
+        datasets += [ds for ds in cube_datasets]
     datasets_lower = [ds.lower() for ds in datasets]
     gatts = ac.shared.nc_gatts(ncf)
     imratio = None
@@ -269,6 +282,12 @@ def acolite_map(ncf, output = None,
         lon = ac.shared.nc_data(ncf, 'lon').data
         lat = ac.shared.nc_data(ncf, 'lat').data
 
+    ## raster outputs can be rendered in parallel, data reading stays in this thread
+    executor, pending = None, set()
+    if (setu['map_raster']) & (setu['map_raster_workers'] > 1):
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        executor = ThreadPoolExecutor(max_workers=setu['map_raster_workers'])
+
     ## make plots
     for cpar in plot_parameters:
         if 'projection_key' in gatts:
@@ -304,7 +323,11 @@ def acolite_map(ncf, output = None,
             ## read and stack rgb
             for iw, w in enumerate(rgb_wave):
                 wi, ww = ac.shared.closest_idx(rho_wv, w)
-                data = ac.shared.nc_data(ncf, '{}{}'.format(ds_base,ww))
+                ds = '{}{}'.format(ds_base,ww)
+                if ds in cube_datasets:
+                    data = ac.shared.nc_data(ncf, cube_datasets[ds][0], band=cube_datasets[ds][1])
+                else:
+                    data = ac.shared.nc_data(ncf, ds)
                 if setu['rgb_autoscale']:
                     prc = np.nanpercentile(data.data, setu['rgb_autoscale_percentiles'])
                     tmp = ac.shared.datascl(data.data, dmin=prc[0], dmax=prc[1])
@@ -322,10 +345,25 @@ def acolite_map(ncf, output = None,
                 continue
             ds = [ds for di, ds in enumerate(datasets) if cparl==datasets_lower[di]][0]
             ## read data
-            tmp = ac.shared.nc_data(ncf, ds)
+            if ds in cube_datasets:
+                tmp = ac.shared.nc_data(ncf, cube_datasets[ds][0], band=cube_datasets[ds][1])
+            else:
+                tmp = ac.shared.nc_data(ncf, ds)
             im = tmp.data
             im[tmp.mask] = np.nan
             tmp = None
 
         ## plot figure
-        output_map(im, cpar)
+        if executor is None:
+            output_map(im, cpar)
+        else:
+            pending.add(executor.submit(output_map, im, cpar))
+            ## limit the number of images in memory
+            if len(pending) >= setu['map_raster_workers']:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done: fut.result()
+        im = None
+
+    if executor is not None:
+        for fut in pending: fut.result()
+        executor.shutdown()
@@ -3,13 +3,17 @@
 ## written by Quinten Vanhellemont, RBINS
 ## 2022-02-20
 ## modifications: 2022-02-21 (QV) acolite integration
+##                2026-10-19 (QV) upsampling with precomputed zoom indices for all datasets as one stack,
+##                               processing in row blocks with single open input and output files
+##                2026-10-19 (QV) memory tracing only with pans_trace_memory
 
 def acolite_pans(ncf, output = None, settings = {}):
 
-    import os
+    import os, time, tracemalloc
     import acolite as ac
     import numpy as np
     import scipy.ndimage
+    from netCDF4 import Dataset
 
     ## Find L1R pan file
     ncfp = ncf.replace('_L2R.nc', '_L1R_pan.nc')
@@ -64,52 +68,78 @@ def acolite_pans(ncf, output = None, settings = {}):
     factor = fac_x
     print('Assuming pan scale factor {} (x={}, y={})'.format(factor, fac_x, fac_y))
 
-    ## read pan data
-    pan = ac.shared.nc_data(ncfp, dsp)
+    ## precompute upsampling operator
+    ## scipy.ndimage.zoom with order 0 is separable, so the zoomed data is data[iy][:, ix]
+    with Dataset(ncfp) as ncp: pan_dims = ncp.variables[dsp].shape
+    with Dataset(ncf) as nc: ms_dims = nc.variables[pans_ds[0]].shape
+    iy = scipy.ndimage.zoom(np.arange(ms_dims[0]), factor, order=0)
+    ix = scipy.ndimage.zoom(np.arange(ms_dims[1]), factor, order=0)
+    if (len(iy), len(ix)) != tuple(pan_dims):
+        print('Upsampled dimensions {}x{} do not match pan dimensions {}x{}'.format(len(iy), len(ix), pan_dims[0], pan_dims[1]))
+        return()
 
-    print('Using pans_method={}'.format(setu['pans_method']))
-    ## compute pan factor
+    ## datasets to be sharpened, and source datasets for the pan factor
+    pans_out = [ds for ds in datasets if (ds not in ['transverse_mercator', 'x', 'y']) & (ds in pans_ds)]
+    sharpen = np.asarray([('rhos_' in ds) | ('rhot_' in ds) for ds in pans_out])
     if setu['pans_method'] == 'panr':
-        pan_ms = ac.shared.nc_data(ncf, dsp)
-        pan_ms_ = scipy.ndimage.zoom(pan_ms, factor, order=0)
-        pan_i = pan_ms_ / pan
+        ratio_ds = [dsp]
     elif setu['pans_method'] == 'visr':
-        for i, ds in enumerate(bgr_ds_rhot):
-            print(ds)
-            bd = ac.shared.nc_data(ncf, ds)
-            if i == 0:
-                vis_i = bd
-            else:
-                vis_i += bd
-            bd = None
-        vis_i = scipy.ndimage.zoom((vis_i)/3, factor, order=0)
-        pan_i = vis_i / pan
-        vis_i = None
-        pan = None
+        ratio_ds = bgr_ds_rhot
+    print('Using pans_method={}'.format(setu['pans_method']))
 
     ## make output file
     gatts_out = {g:gatts[g] for g in gatts}
     gatts_out['ofile'] = ncfo
 
-    ## run through pansharpening
-    new = True
-    for ds in datasets:
-        if ds in ['transverse_mercator', 'x', 'y']: continue
-        if ds not in pans_ds: continue
-
-        data, ds_att = ac.shared.nc_data(ncf, ds, attributes=True)
-        data_pan = scipy.ndimage.zoom(data, factor, order=0)
-        data = None
-
-        if ('rhos_' in ds) | ('rhot_' in ds):
-            data_pan /= pan_i
-            print('Pan sharpened {}'.format(ds))
-
-        ac.output.nc_write(ncfo, ds, data_pan, dataset_attributes=ds_att,
-                           attributes=gatts_out, nc_projection=nc_projection_pan, new=new)
-        print('Wrote {}'.format(ds))
-        data_pan = None
-        new = False
+    ## run through pansharpening in blocks of pan rows
+    t0 = time.time()
+    ## peak memory is also reported if tracing was started by the caller
+    trace = setu['pans_trace_memory'] & (not tracemalloc.is_tracing())
+    if trace: tracemalloc.start()
+    block_rows = setu['pans_block_rows'] if setu['pans_block_rows'] is not None else pan_dims[0]
+    nco = None
+    with Dataset(ncf) as nc, Dataset(ncfp) as ncp:
+        for r0 in range(0, pan_dims[0], block_rows):
+            r1 = min(pan_dims[0], r0 + block_rows)
+            ## multispectral rows needed for this block
+            m0, m1 = iy[r0], iy[r1-1]+1
+            by = iy[r0:r1] - m0
+
+            ## compute pan factor
+            pan = np.ma.filled(ncp.variables[dsp][r0:r1, :].astype(np.float32), np.nan)
+            src = np.mean([np.ma.filled(nc.variables[ds][m0:m1, :].astype(np.float32), np.nan) for ds in ratio_ds], axis=0)
+            pan_i = src[by][:, ix] / pan
+            src, pan = None, None
+
+            ## upsample all datasets as one stack
+            stack = np.asarray([np.ma.filled(nc.variables[ds][m0:m1, :].astype(np.float32), np.nan) for ds in pans_out])
+            data_pan = stack[:, by][:, :, ix]
+            stack = None
+            data_pan[sharpen] /= pan_i[None, :, :]
+            pan_i = None
+
+            for di, ds in enumerate(pans_out):
+                if nco is None:
+                    ## first block creates the datasets
+                    ds_att = {a: nc.variables[ds].getncattr(a) for a in nc.variables[ds].ncattrs()}
+                    ac.output.nc_write(ncfo, ds, data_pan[di], dataset_attributes=ds_att,
+                                       attributes=gatts_out, nc_projection=nc_projection_pan, new=di==0,
+                                       offset=[0, r0], global_dims=pan_dims, fillvalue=np.nan)
+                else:
+                    nco.variables[ds][r0:r1, :] = data_pan[di]
+            data_pan = None
+
+            ## open output file once for the other blocks
+            if nco is None: nco = Dataset(ncfo, 'a')
+            if setu['verbosity'] > 2: print('Pan sharpened rows {}-{} of {}'.format(r0, r1, pan_dims[0]))
+    if nco is not None: nco.close()
+
+    for di, ds in enumerate(pans_out):
+        if sharpen[di]: print('Pan sharpened {}'.format(ds))
+    peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+    if trace: tracemalloc.stop()
+    print('Pan sharpening {} datasets took {:.1f} seconds{}'.format(len(pans_out), time.time()-t0,
+                                      '' if peak is None else ', peak memory {:.1f} MB'.format(peak/1e6)))
     print('Wrote {}'.format(ncfo))
 
     ## mapping - could be moved to acolite_run
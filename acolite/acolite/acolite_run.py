@@ -6,8 +6,33 @@
 ##                2021-04-15 (QV) test/parse input files
 ##                2022-03-04 (QV) moved inputfile testing to inputfile_test
 ##                2022-07-25 (QV) avoid deleting original inputfiles
+##                2026-10-19 (QV) set NetCDF storage layout settings in ac.config
+##                2026-10-19 (QV) buffered log file, added log_flush_interval and log_events
+##                2026-10-19 (QV) added stage metrics and output_metrics
+##                2026-10-19 (QV) added resume option to skip completed l1r, l2r and l2w stages
+##                2026-10-19 (QV) reuse the l1r and l2r settings stored in the resume manifest
+##                2026-10-19 (QV) restore the NetCDF storage layout settings in ac.config after the run
+
+## NetCDF storage layout settings used by nc_write, set in ac.config for the run
+_layout_keys = ['netcdf_chunk_bytes'] + ['netcdf_compression_{}{}'.format(l, c) for l in ['', 'level_'] \
+                                         for c in ['geometry', 'reflectance', 'flags']]
 
 def acolite_run(settings, inputfile=None, output=None):
+    import acolite as ac
+
+    ## set storage layout in ac.config, and restore the previous values after the run
+    setl = ac.acolite.settings.parse(None, settings=settings)
+    config_ = {k: ac.config[k] for k in _layout_keys if k in ac.config}
+    for k in _layout_keys:
+        if k in setl: ac.config[k] = setl[k]
+    try:
+        return(_acolite_run(settings, inputfile=inputfile, output=output))
+    finally:
+        for k in _layout_keys:
+            if k in config_: ac.config[k] = config_[k]
+            elif k in ac.config: del ac.config[k]
+
+def _acolite_run(settings, inputfile=None, output=None):
     import glob, datetime, os, shutil, copy
     import acolite as ac
 
@@ -22,6 +47,13 @@ def acolite_run(settings, inputfile=None, output=None):
     if 'output' not in setu: setu['output'] = os.getcwd()
     if 'verbosity' in setu: ac.config['verbosity'] = int(setu['verbosity'])
 
+    ## run settings with defaults
+    setl = ac.acolite.settings.parse(None, settings=settings)
+    log_flush_interval, log_events = setl['log_flush_interval'], setl['log_events']
+    output_metrics = setl['output_metrics']
+    resume = setl['resume']
+    setl = None
+
     ## workaround for outputting rhorc and bt
     if 'l2w_parameters' in setu:
         if setu['l2w_parameters'] is not None:
@@ -31,7 +63,8 @@ def acolite_run(settings, inputfile=None, output=None):
 
     ## log file for l1r generation
     log_file = '{}/acolite_run_{}_log_file.txt'.format(setu['output'],setu['runid'])
-    log = ac.acolite.logging.LogTee(log_file)
+    events_file = '{}/acolite_run_{}_events.jsonl'.format(setu['output'],setu['runid']) if log_events else None
+    log = ac.acolite.logging.LogTee(log_file, flush_interval = log_flush_interval, events = events_file)
     print('Run ID - {}'.format(setu['runid']))
 
     ## earthdata credentials from settings file
@@ -78,15 +111,30 @@ def acolite_run(settings, inputfile=None, output=None):
         ## bundle to process
         bundle = inputfile_list[ni]
         processed[ni] = {'input': bundle}
+        if output_metrics: ac.acolite.logging.metrics_start()
 
         ## save user settings
         settings_file = '{}/acolite_run_{}_l1r_settings_user.txt'.format(setu_l1r['output'],setu_l1r['runid'])
         ac.acolite.settings.write(settings_file, setu_l1r)
 
+        ## reuse converted files if resuming
+        ret = None
+        if resume:
+            resume_key = ','.join([os.path.abspath(b) for b in (bundle if type(bundle) is list else [bundle])])
+            resume_fp = ac.acolite.resume_fingerprint(bundle, setu_l1r, stage = 'l1r')
+            resume_ret = ac.acolite.resume_check(setu_l1r['output'], 'l1r', resume_key, resume_fp, return_settings = True)
+            if resume_ret is not None:
+                print('Resuming from {}'.format(', '.join(resume_ret[0])))
+                ret = resume_ret
+
         ## run l1 convert
-        ret = ac.acolite.acolite_l1r(bundle, setu_l1r)
-        if len(ret) == 0: continue
-        if len(ret[0]) == 0: continue
+        if ret is None:
+            with ac.acolite.logging.stage('l1r'):
+                ret = ac.acolite.acolite_l1r(bundle, setu_l1r)
+            if len(ret) == 0: continue
+            if len(ret[0]) == 0: continue
+            if resume: ac.acolite.resume_record(setu_l1r['output'], 'l1r', resume_key, resume_fp, ret[0],
+                                                settings = ret[1], bundle = ret[2])
 
         l1r_files, l1r_setu, l1_bundle = ret
         if processed[ni]['input'] != l1_bundle:
@@ -105,7 +153,8 @@ def acolite_run(settings, inputfile=None, output=None):
         if (project) & (l1r_setu['reproject_before_ac']):
             rep = []
             for ncf in processed[ni]['l1r']:
-                ncfo = ac.output.project_acolite_netcdf(ncf, settings=settings)
+                with ac.acolite.logging.stage('reproject'):
+                    ncfo = ac.output.project_acolite_netcdf(ncf, settings=settings)
                 if ncfo == (): continue
                 rep.append(ncfo)
             if len(rep) > 0:
@@ -123,22 +172,40 @@ def acolite_run(settings, inputfile=None, output=None):
         for l1r in l1r_files:
             gatts = ac.shared.nc_gatts(l1r)
             if 'acolite_file_type' not in gatts: gatts['acolite_file_type'] = 'L1R'
-            if l1r_setu['l1r_export_geotiff']: ac.output.nc_to_geotiff(l1r, match_file = l1r_setu['export_geotiff_match_file'],
-                                                            cloud_optimized_geotiff = l1r_setu['export_cloud_optimized_geotiff'],
-                                                            skip_geo = l1r_setu['export_geotiff_coordinates'] is False)
-            if l1r_setu['l1r_export_geotiff_rgb']: ac.output.nc_to_geotiff_rgb(l1r, settings = l1r_setu)
+            if l1r_setu['l1r_export_geotiff']:
+                with ac.acolite.logging.stage('export'):
+                    ac.output.nc_to_geotiff(l1r, match_file = l1r_setu['export_geotiff_match_file'],
+                                            cloud_optimized_geotiff = l1r_setu['export_cloud_optimized_geotiff'], workers = l1r_setu['export_geotiff_workers'],
+                                            skip_geo = l1r_setu['export_geotiff_coordinates'] is False)
+            if l1r_setu['l1r_export_geotiff_rgb']:
+                with ac.acolite.logging.stage('export'):
+                    ac.output.nc_to_geotiff_rgb(l1r, settings = l1r_setu)
 
             ## rhot RGB
             if l1r_setu['rgb_rhot']:
                 l1r_setu_ = {k: l1r_setu[k] for k in l1r_setu}
                 l1r_setu_['rgb_rhos'] = False
-                ac.acolite.acolite_map(l1r, settings = l1r_setu_, plot_all=False)
+                with ac.acolite.logging.stage('map'):
+                    ac.acolite.acolite_map(l1r, settings = l1r_setu_, plot_all=False)
 
             ## do VIS-SWIR atmospheric correction
             if l1r_setu['atmospheric_correction']:
                 if gatts['acolite_file_type'] == 'L1R':
+                    ## reuse l2r file if resuming
+                    ret = ()
+                    if resume:
+                        resume_fp = ac.acolite.resume_fingerprint(l1r, l1r_setu, stage = 'l2r')
+                        resume_ret = ac.acolite.resume_check(l1r_setu['output'], 'l2r', os.path.abspath(l1r), resume_fp, return_settings = True)
+                        if resume_ret is not None:
+                            print('Resuming from {}'.format(resume_ret[0][0]))
+                            ret = resume_ret[0][0], resume_ret[1]
+
                     ## run ACOLITE
-                    ret = ac.acolite.acolite_l2r(l1r, settings = l1r_setu, verbosity = ac.config['verbosity'])
+                    if len(ret) == 0:
+                        with ac.acolite.logging.stage('l2r'):
+                            ret = ac.acolite.acolite_l2r(l1r, settings = l1r_setu, verbosity = ac.config['verbosity'])
+                        if (resume) & (len(ret) == 2):
+                            ac.acolite.resume_record(l1r_setu['output'], 'l2r', os.path.abspath(l1r), resume_fp, ret[0], settings = ret[1])
                     if len(ret) != 2:
                         l2r, l2r_setu = [], {k:l1r_setu[k] for k in l1r_setu}
                     else:
@@ -151,10 +218,12 @@ def acolite_run(settings, inputfile=None, output=None):
                     ret = None
                     ## acstar3 adjacency correction
                     if (l2r_setu['adjacency_method']=='acstar3'):
-                        ret = ac.adjacency.acstar3.acstar3(l2r, setu = l2r_setu, verbosity = ac.config['verbosity'])
+                        with ac.acolite.logging.stage('adjacency'):
+                            ret = ac.adjacency.acstar3.acstar3(l2r, setu = l2r_setu, verbosity = ac.config['verbosity'])
                     ## GLAD
                     if (l2r_setu['adjacency_method']=='glad'):
-                        ret = ac.adjacency.glad.glad_l2r(l2r, verbosity = ac.config['verbosity'], settings=l2r_setu)
+                        with ac.acolite.logging.stage('adjacency'):
+                            ret = ac.adjacency.glad.glad_l2r(l2r, verbosity = ac.config['verbosity'], settings=l2r_setu)
                     l2r = [] if ret is None else ret
 
                 ## if we have multiple l2r files
@@ -164,15 +233,18 @@ def acolite_run(settings, inputfile=None, output=None):
 
                     for ncf in l2r:
                         if l2r_setu['l2r_export_geotiff']:
-                            ac.output.nc_to_geotiff(ncf, match_file = l2r_setu['export_geotiff_match_file'],
-                                                    cloud_optimized_geotiff = l1r_setu['export_cloud_optimized_geotiff'],
-                                                    skip_geo = l2r_setu['export_geotiff_coordinates'] is False)
+                            with ac.acolite.logging.stage('export'):
+                                ac.output.nc_to_geotiff(ncf, match_file = l2r_setu['export_geotiff_match_file'],
+                                                        cloud_optimized_geotiff = l1r_setu['export_cloud_optimized_geotiff'], workers = l1r_setu['export_geotiff_workers'],
+                                                        skip_geo = l2r_setu['export_geotiff_coordinates'] is False)
 
                         if l2r_setu['l2r_export_geotiff_rgb']:
-                            ac.output.nc_to_geotiff_rgb(ncf, settings = l2r_setu)
+                            with ac.acolite.logging.stage('export'):
+                                ac.output.nc_to_geotiff_rgb(ncf, settings = l2r_setu)
 
                         if l2r_setu['pans']:
-                            pr = ac.acolite.acolite_pans(ncf, settings = l2r_setu)
+                            with ac.acolite.logging.stage('pans'):
+                                pr = ac.acolite.acolite_pans(ncf, settings = l2r_setu)
                             if pr != ():
                                 if 'l2r_pans' not in processed[ni]: processed[ni]['l2r_pans']=[]
                                 processed[ni]['l2r_pans'].append(pr)
@@ -182,45 +254,77 @@ def acolite_run(settings, inputfile=None, output=None):
                         l2r_setu_ = {k: l1r_setu[k] for k in l2r_setu}
                         l2r_setu_['rgb_rhot'] = False
                         for ncf in l2r:
-                            ac.acolite.acolite_map(ncf, settings = l2r_setu_, plot_all=False)
+                            with ac.acolite.logging.stage('map'):
+                                ac.acolite.acolite_map(ncf, settings = l2r_setu_, plot_all=False)
 
                     ## compute l2w parameters
                     if l2r_setu['l2w_parameters'] is not None:
                         if type(l2r_setu['l2w_parameters']) is not list: l2r_setu['l2w_parameters'] = [l2r_setu['l2w_parameters']]
                         for ncf in l2r:
-                            ret = ac.acolite.acolite_l2w(ncf, settings=l2r_setu)
+                            ## reuse l2w file if resuming
+                            ret = None
+                            if resume:
+                                ## fingerprint with l1r settings, l2r settings are derived from them and the l2r file
+                                resume_fp = ac.acolite.resume_fingerprint(ncf, l1r_setu, stage = 'l2w')
+                                resume_files = ac.acolite.resume_check(l2r_setu['output'], 'l2w', os.path.abspath(ncf), resume_fp)
+                                if resume_files is not None:
+                                    print('Resuming from {}'.format(resume_files[0]))
+                                    ret = resume_files[0]
+                            if ret is None:
+                                with ac.acolite.logging.stage('l2w'):
+                                    ret = ac.acolite.acolite_l2w(ncf, settings=l2r_setu)
+                                if (resume) & (ret is not None):
+                                    ac.acolite.resume_record(l2r_setu['output'], 'l2w', os.path.abspath(ncf), resume_fp, ret)
                             if ret is not None:
-                                if l2r_setu['l2w_export_geotiff']: ac.output.nc_to_geotiff(ret, match_file = l2r_setu['export_geotiff_match_file'],
-                                                                                cloud_optimized_geotiff = l1r_setu['export_cloud_optimized_geotiff'],
-                                                                                skip_geo = l2r_setu['export_geotiff_coordinates'] is False)
+                                if l2r_setu['l2w_export_geotiff']:
+                                    with ac.acolite.logging.stage('export'):
+                                        ac.output.nc_to_geotiff(ret, match_file = l2r_setu['export_geotiff_match_file'],
+                                                                cloud_optimized_geotiff = l1r_setu['export_cloud_optimized_geotiff'], workers = l1r_setu['export_geotiff_workers'],
+                                                                skip_geo = l2r_setu['export_geotiff_coordinates'] is False)
                                 l2w_files.append(ret)
 
                                 ## make l2w maps
                                 if l2r_setu['map_l2w']:
-                                    ac.acolite.acolite_map(ret, settings=l2r_setu)
+                                    with ac.acolite.logging.stage('map'):
+                                        ac.acolite.acolite_map(ret, settings=l2r_setu)
                                 ## make l2w rgb
                                 if l2r_setu['rgb_rhow']:
                                     l2r_setu_ = {k: l1r_setu[k] for k in l2r_setu}
                                     l2r_setu_['rgb_rhot'] = False
                                     l2r_setu_['rgb_rhos'] = False
-                                    ac.acolite.acolite_map(ret, settings=l2r_setu_, plot_all=False)
+                                    with ac.acolite.logging.stage('map'):
+                                        ac.acolite.acolite_map(ret, settings=l2r_setu_, plot_all=False)
 
             ## run TACT thermal atmospheric correction
             if l1r_setu['tact_run']:
-                ret = ac.tact.tact_gem(l1r, settings = l1r_setu, verbosity = ac.config['verbosity'])
+                with ac.acolite.logging.stage('tact'):
+                    ret = ac.tact.tact_gem(l1r, settings = l1r_setu, verbosity = ac.config['verbosity'])
                 if ret != ():
                     l2t_files.append(ret)
-                    if l1r_setu['l2t_export_geotiff']: ac.output.nc_to_geotiff(ret, match_file = l1r_setu['export_geotiff_match_file'],
-                                                                               cloud_optimized_geotiff = l1r_setu['export_cloud_optimized_geotiff'],
-                                                                               skip_geo = l1r_setu['export_geotiff_coordinates'] is False)
+                    if l1r_setu['l2t_export_geotiff']:
+                        with ac.acolite.logging.stage('export'):
+                            ac.output.nc_to_geotiff(ret, match_file = l1r_setu['export_geotiff_match_file'],
+                                                    cloud_optimized_geotiff = l1r_setu['export_cloud_optimized_geotiff'], workers = l1r_setu['export_geotiff_workers'],
+                                                    skip_geo = l1r_setu['export_geotiff_coordinates'] is False)
 
                     ## make l2t maps
-                    if l1r_setu['tact_map']: ac.acolite.acolite_map(ret, settings=l1r_setu)
+                    if l1r_setu['tact_map']:
+                        with ac.acolite.logging.stage('map'):
+                            ac.acolite.acolite_map(ret, settings=l1r_setu)
 
         if len(l2r_files) > 0: processed[ni]['l2r'] = l2r_files
         if len(l2t_files) > 0: processed[ni]['l2t'] = l2t_files
         if len(l2w_files) > 0: processed[ni]['l2w'] = l2w_files
 
+        ## write scene metrics
+        if output_metrics:
+            metrics_file = '{}/{}_metrics.json'.format(l1r_setu['output'], os.path.basename(l1r_files[0]).replace('_L1R.nc', '').replace('.nc', ''))
+            ac.acolite.logging.metrics_stop(metrics_file, inputfile = bundle, runid = setu['runid'])
+            processed[ni]['metrics'] = metrics_file
+
+    ## stop metrics if the last scene was not processed
+    if output_metrics: ac.acolite.logging.metrics_stop()
+
     ## reproject data
     try:
         project = (l1r_setu['output_projection']) & (~l1r_setu['reproject_before_ac'])
@@ -260,7 +364,7 @@ def acolite_run(settings, inputfile=None, output=None):
                     if '{}_export_geotiff'.format(otype) in l1r_setu:
                         if l1r_setu['{}_export_geotiff'.format(otype)]:
                             ac.output.nc_to_geotiff(ncfo, match_file = l1r_setu['export_geotiff_match_file'],
-                                                                        cloud_optimized_geotiff = l1r_setu['export_cloud_optimized_geotiff'],
+                                                                        cloud_optimized_geotiff = l1r_setu['export_cloud_optimized_geotiff'], workers = l1r_setu['export_geotiff_workers'],
                                                                         skip_geo = l1r_setu['export_geotiff_coordinates'] is False)
                     ## output rgb geotiff
                     if '{}_export_geotiff_rgb'.format(otype) in l1r_setu:
@@ -270,7 +374,8 @@ def acolite_run(settings, inputfile=None, output=None):
     ## end reproject data
 
     ## end processing loop
-    log.__del__()
+    log.event('acolite_run', elapsed = (datetime.datetime.now()-time_start).total_seconds(), nscenes = len(processed))
+    log.close()
 
     ## remove files
     for ni in processed:
@@ -311,6 +416,7 @@ def acolite_run(settings, inputfile=None, output=None):
 
     if delete_text:
         tfiles = glob.glob('{}/acolite_run_{}_*.txt'.format(op, ri))
+        tfiles += glob.glob('{}/acolite_run_{}_*.jsonl'.format(op, ri))
         for tf in tfiles:
             os.remove(tf)
 
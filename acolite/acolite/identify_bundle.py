@@ -1,286 +1,267 @@
 ## def identify_bundle
 ## function to identify image that needs to be processed
+## sensors are tested with the probes in _identify_registry, each sensor declares cheap file name signatures
+## ('file' for single file inputs, 'dir' for names in bundle directories) that are matched before any files are opened
+## sensors with matching signatures are tested first, then the remaining sensors as before
+## successful identifications are cached per input path, modification time and extraction output
 ## written by Quinten Vanhellemont, RBINS
 ## 2021-03-10
 ## modifications: 2021-04-08 (QV) added VENUS
 ##                2022-07-21 (QV) added check for tar and zip files
+##                2026-10-19 (QV) added stream_archives keyword to identify Landsat and Sentinel-2 zip/tar files without extracting
+##                2026-10-19 (QV) moved sensor tests to registry with file name signatures, added identification cache
+##                2026-10-19 (QV) cache only successful identifications, added output to cache key
 
-def identify_bundle(bundle, input_type = None, output = None):
-    import os, glob, shutil, zipfile
+import os, glob
+
+################
+## ACOLITE
+def _identify_acolite(bundle):
+    import acolite as ac
+    gatts = ac.shared.nc_gatts(bundle)
+    datasets = ac.shared.nc_datasets(bundle)
+    rhot_ds = [ds for ds in datasets if 'rhot_' in ds]
+    return((gatts['generated_by'] == 'ACOLITE') & (len(rhot_ds) != 0))
+
+## Landsat
+def _identify_landsat(bundle):
+    import acolite as ac
+    mtl = ac.shared.vsi_glob('{}/{}'.format(bundle, '*MTL.txt'))
+    mtl += ac.shared.vsi_glob('{}/{}'.format(bundle, '*MTL_L1T.TXT'))
+    mtl += ac.shared.vsi_glob('{}/{}'.format(bundle, '*MTL_L1GST.TXT'))
+    if len(mtl) == 0: return(False)
+    meta = ac.landsat.metadata_read(mtl[0])
+    ## get relevant data from meta
+    if 'PRODUCT_CONTENTS' in meta: pk = 'IMAGE_ATTRIBUTES'## COLL2
+    elif 'PRODUCT_METADATA' in meta: pk = 'PRODUCT_METADATA'## COLL1
+    spacecraft_id, sensor_id = meta[pk]['SPACECRAFT_ID'],meta[pk]['SENSOR_ID']
+    return((spacecraft_id in ['LANDSAT_5', 'LANDSAT_7', 'LANDSAT_8', 'LANDSAT_9']) | ((spacecraft_id == 'EO1') & (sensor_id == 'ALI')))
+
+## Sentinel-2
+def _identify_sentinel2(bundle):
+    import acolite as ac
+    safe_files = ac.sentinel2.safe_test(bundle)
+    granule = safe_files['granules'][0]
+    meta, band_data= ac.sentinel2.metadata_scene(safe_files['metadata']['path'])
+    return(meta['SPACECRAFT_NAME'] in ['Sentinel-2A', 'Sentinel-2B'])
+
+## Sentinel-3
+def _identify_sentinel3(bundle):
+    import acolite as ac
+    dfiles = glob.glob('{}/*.nc'.format(bundle))
+    dfiles.sort()
+    gatts = ac.shared.nc_gatts(dfiles[0])
+    if ('OLCI Level 1b Product' in gatts['title']) | ('MERIS Level 1b Product' in gatts['title']): return(True)
+    print(gatts['title'])
+    return(False)
+
+## Pléiades/SPOT
+def _identify_pleiades(bundle):
+    import acolite as ac
+    ifiles,mfiles,pifiles,pmfiles = ac.pleiades.bundle_test(bundle, listpan=True)
+    mfiles_set = set(mfiles)
+    for mfile in mfiles_set: meta = ac.pleiades.metadata_parse(mfile)
+    return(meta['satellite'] in ['Pléiades', 'SPOT'])
+
+## VENUS
+def _identify_venus(bundle):
+    import acolite as ac
+    meta = ac.venus.metadata_parse(bundle)
+    return(meta['PLATFORM'] == 'VENUS')
+
+## WorldView
+def _identify_worldview(bundle):
+    import acolite as ac
+    metafiles = glob.glob('{}/{}'.format(bundle,'*.XML'))
+    metafiles.sort()
+    if len(metafiles) == 0: return(False)
+    idx = 0
+    for idx, mf in enumerate(metafiles):
+        if ('.aux.' not in mf) & ('README' not in mf) & ('(1)' not in mf):
+            break
+    metafile = metafiles[idx]
+    meta = ac.worldview.metadata_parse(metafile)
+    return(meta['satellite'] in ['WorldView2', 'WorldView3', 'QuickBird2', 'GeoEye1'])
+
+## CHRIS
+def _identify_chris(bundle):
+    import acolite as ac
+    gains, mode_info = ac.chris.vdata(bundle)
+    return(True)
+
+## PRISMA
+def _identify_prisma(bundle):
+    import acolite as ac
+    gatts = ac.prisma.attributes(bundle)
+    return(gatts['Product_ID'] == b'PRS_L1_STD')
+
+## HICO
+def _identify_hico(bundle):
+    import acolite as ac
+    gatts = ac.hico.attributes(bundle)
+    return(gatts['Instrument_Short_Name'] == 'hico')
+
+## HYPERION
+def _identify_hyperion(bundle):
+    import acolite as ac
+    metadata = ac.hyperion.metadata(bundle)
+    return(metadata['PRODUCT_METADATA']['SENSOR_ID'] == 'HYPERION')
+
+## DESIS
+def _identify_desis(bundle):
+    import acolite as ac
+    metafile, imagefile = ac.desis.bundle_test(bundle)
+    meta = ac.desis.metadata(metafile)
+    return((meta['mission'] == 'DESIS') & (meta['productType'] in ['L1B', 'L1C']))
+
+## Planet
+def _identify_planet(bundle):
+    import acolite as ac
+    files = ac.planet.bundle_test(bundle)
+    if 'metadata' in files:
+        metafile = files['metadata']['path']
+    elif 'metadata_json' in files:
+        metafile = files['metadata_json']['path']
+
+    if 'analytic' in files:
+        image_file = files['analytic']['path']
+    elif 'pansharpened' in files:
+        image_file = files['pansharpened']['path']
+    meta = ac.planet.metadata_parse(metafile)
+    return(('platform' in meta) & (os.path.exists(image_file)))
+
+## GF
+def _identify_gf(bundle):
+    import acolite as ac
+    tiles, metafile = ac.gf.bundle_test(bundle)
+    if metafile is None: return(False)
+    meta = ac.gf.metadata(metafile)
+    return(meta['SatelliteID'] in ['GF1D', 'GF6'])
+
+## AMAZONIA
+def _identify_amazonia(bundle):
+    import acolite as ac
+    files_xml, files_tiff = ac.amazonia.bundle_test(bundle)
+    meta = ac.amazonia.metadata(files_xml[0])
+    return(meta['sensor'] in ['AMAZONIA1_WFI', 'CBERS4A_WFI'])
+
+## FORMOSAT
+def _identify_formosat(bundle):
+    import acolite as ac
+    tiles, metafile = ac.formosat.bundle_test(bundle)
+    if metafile is None: return(False)
+    meta = ac.formosat.metadata(metafile)
+    return(meta['sensor'] in ['FORMOSAT5_RSI'])
+
+## ECOSTRESS
+def _identify_ecostress(bundle):
+    import acolite as ac
+    meta = ac.ecostress.attributes(bundle)
+    return((meta['InstrumentShortName'] == 'ECOSTRESS') & (meta['ProcessingLevelID'] == 'L1B'))
+################
+
+## sensors in order of testing, with case insensitive file name signatures
+_identify_registry = [
+    {'input_type': 'ACOLITE', 'file': ['*.nc'], 'dir': [], 'test': _identify_acolite},
+    {'input_type': 'Landsat', 'file': [], 'dir': ['*MTL.txt', '*MTL_L1T.TXT', '*MTL_L1GST.TXT'], 'test': _identify_landsat},
+    {'input_type': 'Sentinel-2', 'file': [], 'dir': ['MTD*.xml'], 'test': _identify_sentinel2},
+    {'input_type': 'Sentinel-3', 'file': [], 'dir': ['*.nc'], 'test': _identify_sentinel3},
+    {'input_type': 'Pléiades', 'file': [], 'dir': ['VOL_PHR.XML', 'SPOT_VOL.XML'], 'test': _identify_pleiades},
+    {'input_type': 'VENUS', 'file': [], 'dir': ['*.xml'], 'test': _identify_venus},
+    {'input_type': 'WorldView', 'file': [], 'dir': ['*.XML'], 'test': _identify_worldview},
+    {'input_type': 'CHRIS', 'file': ['*.hdf'], 'dir': [], 'test': _identify_chris},
+    {'input_type': 'PRISMA', 'file': ['*.he5'], 'dir': [], 'test': _identify_prisma},
+    {'input_type': 'HICO', 'file': ['*.nc', '*.h5', '*.hdf'], 'dir': [], 'test': _identify_hico},
+    {'input_type': 'HYPERION', 'file': [], 'dir': ['*MTL*.TXT'], 'test': _identify_hyperion},
+    {'input_type': 'DESIS', 'file': [], 'dir': ['*METADATA.xml'], 'test': _identify_desis},
+    {'input_type': 'Planet', 'file': ['*.xml', '*.json', '*.tif'], 'dir': ['*metadata*.xml', '*metadata.json', 'files', 'analytic*'], 'test': _identify_planet},
+    {'input_type': 'GF', 'file': [], 'dir': ['*.xml'], 'test': _identify_gf},
+    {'input_type': 'AMAZONIA', 'file': [], 'dir': ['*.xml'], 'test': _identify_amazonia},
+    {'input_type': 'FORMOSAT', 'file': [], 'dir': ['*.dim'], 'test': _identify_formosat},
+    {'input_type': 'ECOSTRESS', 'file': ['*.h5'], 'dir': [], 'test': _identify_ecostress},
+]
+
+## cached identifications
+_identify_cache = {}
+
+## returns input types with signatures matching the bundle
+def _identify_signatures(bundle):
+    import fnmatch
+    import acolite as ac
+    if (ac.shared.vsi_split(bundle) is None) and (os.path.isfile(bundle)):
+        sk, names = 'file', [os.path.basename(bundle)]
+    else:
+        sk, names = 'dir', ac.shared.vsi_listdir(bundle)
+    names = [n.upper() for n in names]
+    return([r['input_type'] for r in _identify_registry
+                if any([fnmatch.fnmatchcase(n, p.upper()) for p in r[sk] for n in names])])
+
+## cache key from input path, modification time and extraction output
+def _identify_key(bundle, stream_archives, output = None):
+    import acolite as ac
+    sp = ac.shared.vsi_split(bundle)
+    try:
+        st = os.stat(bundle if sp is None else sp[0])
+    except OSError:
+        return(None)
+    return(bundle if sp is not None else os.path.abspath(bundle), st.st_mtime_ns, stream_archives,
+           None if output is None else os.path.abspath(output))
+
+def identify_bundle(bundle, input_type = None, output = None, stream_archives = False,
+                    use_signatures = True, use_cache = True):
+    import shutil
     import acolite as ac
 
     zipped = False
     orig_bundle = '{}'.format(bundle)
 
+    ## return cached identification if the (extracted) bundle still exists
+    key = None
+    if (input_type is None) & (use_cache):
+        key = _identify_key(bundle, stream_archives, output = output)
+        if key in _identify_cache:
+            cached_type, cached_bundle = _identify_cache[key]
+            if ac.shared.vsi_exists(cached_bundle): return(cached_type, cached_bundle)
+
     while input_type is None:
-        if not os.path.exists(bundle):
+        if not ac.shared.vsi_exists(bundle):
             print('Input file {} does not exist'.format(bundle))
             break ## exit loop if path does not exist
 
         ## test if zip/tar file
         bn, ext = os.path.splitext(bundle)
         if os.path.isfile(bundle) & (ext in ['.zip', '.tar', '.gz', '.tgz']):
+            ## identify from the metadata in the archive, bands are then read with GDAL /vsizip/ or /vsitar/
+            ## only for sensors whose converters support these paths, others are extracted
+            vsi_bundle = ac.shared.vsi_path(bundle) if stream_archives else None
+            if vsi_bundle is not None:
+                vsi_type, vsi_bundle = ac.acolite.identify_bundle(vsi_bundle, use_signatures = use_signatures, use_cache = False)
+                if vsi_type in ['Landsat', 'Sentinel-2']:
+                    input_type, bundle = vsi_type, vsi_bundle
+                    break ## exit loop
             targ_bundle = ac.shared.extract_bundle(bundle, output=output, verbosity=2)
             if targ_bundle is not None:
                 print(targ_bundle)
                 bundle = '{}'.format(targ_bundle)
                 zipped = True
 
-        ################
-        ## ACOLITE
-        try:
-            gatts = ac.shared.nc_gatts(bundle)
-            datasets = ac.shared.nc_datasets(bundle)
-            rhot_ds = [ds for ds in datasets if 'rhot_' in ds]
-            if (gatts['generated_by'] == 'ACOLITE') & (len(rhot_ds) != 0):
-                input_type = 'ACOLITE'
-                break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end ACOLITE
-        ################
-
-        ################
-        ## Landsat
-        try:
-            mtl = glob.glob('{}/{}'.format(bundle, '*MTL.txt'))
-            mtl += glob.glob('{}/{}'.format(bundle, '*MTL_L1T.TXT'))
-            mtl += glob.glob('{}/{}'.format(bundle, '*MTL_L1GST.TXT'))
-            if len(mtl)>0:
-                meta = ac.landsat.metadata_read(mtl[0])
-                ## get relevant data from meta
-                if 'PRODUCT_CONTENTS' in meta: pk = 'IMAGE_ATTRIBUTES'## COLL2
-                elif 'PRODUCT_METADATA' in meta: pk = 'PRODUCT_METADATA'## COLL1
-                spacecraft_id, sensor_id = meta[pk]['SPACECRAFT_ID'],meta[pk]['SENSOR_ID']
-                if (spacecraft_id in ['LANDSAT_5', 'LANDSAT_7', 'LANDSAT_8', 'LANDSAT_9']) | ((spacecraft_id == 'EO1') & (sensor_id == 'ALI')):
-                    input_type = 'Landsat'
-                    break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end Landsat
-        ################
-
-        ################
-        ## Sentinel-2
-        try:
-            safe_files = ac.sentinel2.safe_test(bundle)
-            granule = safe_files['granules'][0]
-            #grmeta = ac.sentinel2.metadata_granule(safe_files[granule]['metadata']['path'])
-            meta, band_data= ac.sentinel2.metadata_scene(safe_files['metadata']['path'])
-            if meta['SPACECRAFT_NAME'] in ['Sentinel-2A', 'Sentinel-2B']:
-                input_type = 'Sentinel-2'
-                break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end Sentinel-2
-        ################
-
-        ################
-        ## Sentinel-3
-        try:
-            dfiles = glob.glob('{}/*.nc'.format(bundle))
-            dfiles.sort()
-            gatts = ac.shared.nc_gatts(dfiles[0])
-            if 'OLCI Level 1b Product' in gatts['title']:
-                input_type = 'Sentinel-3'
-                break ## exit loop
-            elif 'MERIS Level 1b Product' in gatts['title']:
-                input_type = 'Sentinel-3'
-                break ## exit loop
-            else:
-                print(gatts['title'])
-        except:
-            pass ## continue to next sensor
-        ## end Sentinel-3
-        ################
-
-        ################
-        ## Pléiades/SPOT
-        try:
-            ifiles,mfiles,pifiles,pmfiles = ac.pleiades.bundle_test(bundle, listpan=True)
-            mfiles_set = set(mfiles)
-            for mfile in mfiles_set: meta = ac.pleiades.metadata_parse(mfile)
-            if meta['satellite'] in ['Pléiades', 'SPOT']:
-                input_type = 'Pléiades'
-                break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end Pléiades/SPOT
-        ################
-
-        ################
-        ## VENUS
-        try:
-            meta = ac.venus.metadata_parse(bundle)
-            if meta['PLATFORM'] == 'VENUS':
-                input_type = 'VENUS'
-                break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end VENUS
-        ################
-
-        ################
-        ## WorldView
-        try:
-            metafiles = glob.glob('{}/{}'.format(bundle,'*.XML'))
-            metafiles.sort()
-            if len(metafiles)>0:
-                idx = 0
-                if len(metafiles) >= 1:
-                    for idx, mf in enumerate(metafiles):
-                        if ('.aux.' not in mf) & ('README' not in mf) & ('(1)' not in mf):
-                            break
-                metafile = metafiles[idx]
-                meta = ac.worldview.metadata_parse(metafile)
-                if meta['satellite'] in ['WorldView2', 'WorldView3', 'QuickBird2', 'GeoEye1']:
-                    input_type = 'WorldView'
-                    break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end WorldView
-        ################
-
-        ################
-        ## CHRIS
-        try:
-            gains, mode_info = ac.chris.vdata(bundle)
-            input_type = 'CHRIS'
-            break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end CHRIS
-        ################
-
-        ################
-        ## PRISMA
-        try:
-            gatts = ac.prisma.attributes(bundle)
-            if gatts['Product_ID'] == b'PRS_L1_STD':
-                input_type = 'PRISMA'
-                break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end PRISMA
-        ################
-
-        ################
-        ## HICO
-        try:
-            gatts = ac.hico.attributes(bundle)
-            if gatts['Instrument_Short_Name'] == 'hico':
-                input_type = 'HICO'
-                break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end HICO
-        ################
-
-        ################
-        ## HYPERION
-        try:
-            metadata = ac.hyperion.metadata(bundle)
-            if metadata['PRODUCT_METADATA']['SENSOR_ID'] == 'HYPERION':
-                input_type = 'HYPERION'
-                break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end HYPERION
-        ################
-
-        ################
-        ## DESIS
-        try:
-            metafile, imagefile = ac.desis.bundle_test(bundle)
-            #headerfile = imagefile.replace('.tif', '.hdr')
-            # header = ac.desis.hdr(headerfile)
-            meta = ac.desis.metadata(metafile)
-            if (meta['mission'] == 'DESIS') & (meta['productType'] in ['L1B', 'L1C']):
-                input_type = 'DESIS'
-                break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end DESIS
-        ################
-
-        ################
-        ## Planet data
-        ## unzip files if needed
-        try:
-            ## test files
-            files = ac.planet.bundle_test(bundle)
-            if 'metadata' in files:
-                metafile = files['metadata']['path']
-            elif 'metadata_json' in files:
-                metafile = files['metadata_json']['path']
-
-            if 'analytic' in files:
-                image_file = files['analytic']['path']
-            elif 'pansharpened' in files:
-                image_file = files['pansharpened']['path']
-            meta = ac.planet.metadata_parse(metafile)
-            if ('platform' in meta) & (os.path.exists(image_file)):
-                input_type = 'Planet'
-                break  ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end Planet
-        ################
-
-        ################
-        ## GF
-        try:
-            tiles, metafile = ac.gf.bundle_test(bundle)
-            if metafile is not None:
-                meta = ac.gf.metadata(metafile)
-                if meta['SatelliteID'] in ['GF1D', 'GF6']:
-                    input_type = 'GF'
-                    break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end GF
-        ################
-
-        ################
-        ## AMAZONIA
-        try:
-            files_xml, files_tiff = ac.amazonia.bundle_test(bundle)
-            meta = ac.amazonia.metadata(files_xml[0])
-            if meta['sensor'] in ['AMAZONIA1_WFI', 'CBERS4A_WFI']:
-                input_type = 'AMAZONIA'
-                break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end AMAZONIA
-        ################
-
-        ################
-        ## FORMOSAT
-        try:
-            tiles, metafile = ac.formosat.bundle_test(bundle)
-            if metafile is not None:
-                meta = ac.formosat.metadata(metafile)
-                if meta['sensor'] in ['FORMOSAT5_RSI']:
-                    input_type = 'FORMOSAT'
+        ## test sensors with matching signatures first
+        registry = _identify_registry
+        if use_signatures:
+            try:
+                matched = _identify_signatures(bundle)
+            except:
+                matched = []
+            registry = [r for r in _identify_registry if r['input_type'] in matched] + \
+                       [r for r in _identify_registry if r['input_type'] not in matched]
+
+        for r in registry:
+            try:
+                if r['test'](bundle):
+                    input_type = r['input_type']
                     break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end FORMOSAT
-        ################
-
-        ################
-        ## ECOSTRESS
-        try:
-            meta = ac.ecostress.attributes(bundle)
-            if (meta['InstrumentShortName'] == 'ECOSTRESS') & (meta['ProcessingLevelID'] == 'L1B'):
-                input_type = 'ECOSTRESS'
-                break ## exit loop
-        except:
-            pass ## continue to next sensor
-        ## end ECOSTRESS
-        ################
-
-        ################
+            except:
+                pass ## continue to next sensor
         break ## exit loop
 
     ## remove the extracted bundle if it could not be identified
@@ -288,5 +269,8 @@ def identify_bundle(bundle, input_type = None, output = None):
         shutil.rmtree(bundle)
         bundle = '{}'.format(orig_bundle)
 
+    ## failed identifications are not cached, so they are retried
+    if (key is not None) & (input_type is not None): _identify_cache[key] = input_type, bundle
+
     ## return input_type
     return(input_type, bundle)
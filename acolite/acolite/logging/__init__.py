@@ -1 +1,2 @@
 from .logtee import *
+from .metrics import *
@@ -1,8 +1,11 @@
-import os, sys, datetime
+import os, sys, datetime, time, json
 ## object for logging stdout to log file when processing
+## the log file is kept open and written through a buffer, which is flushed at least every flush_interval seconds
+## if events is given, structured events (stage names and timings) are written as JSON lines to that file
+## a forked worker process does not write to the log of its parent, it should make its own LogTee
 class LogTee(object):
 
-        def __init__(self, name):
+        def __init__(self, name, flush_interval = 5.0, events = None, buffering = 65536):
             self.name=name
             ## make new file
             if os.path.exists(os.path.dirname(self.name)) is False:
@@ -11,21 +14,53 @@ class LogTee(object):
                 except:
                     print('Error: could not create directory: {}'.format(os.path.dirname(self.name)))
                     exit(1)
-            self.file = open(self.name, 'w')
-            self.file.close()
+            self.file = open(self.name, 'w', buffering=buffering)
             self.mode='a'
+            self.flush_interval = flush_interval
+            self.flush_time = time.time()
+            self.pid = os.getpid()
+            ## file for JSON lines events
+            self.events = events
+            self.events_file = None
+            if self.events is not None:
+                self.events_file = open(self.events, 'w', buffering=buffering)
             self.stdout = sys.stdout
             sys.stdout = self
         def __del__(self):
+            self.close()
+        def close(self):
             try:
-                sys.stdout = self.stdout
+                if sys.stdout is self: sys.stdout = self.stdout
             except:
                 pass
+            if os.getpid() != getattr(self, 'pid', None): return
+            for f in ['file', 'events_file']:
+                try:
+                    if getattr(self, f) is not None: getattr(self, f).close()
+                except:
+                    pass
+                setattr(self, f, None)
         def write(self, data):
             self.stdout.write(data)
+            if (self.file is None) or (os.getpid() != self.pid): return
             data = data.strip()
             if len(data) > 0:
-                with open(self.name, self.mode) as self.file:
-                    self.file.write('{}: {}\n'.format(datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),data))
+                self.file.write('{}: {}\n'.format(datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),data))
+                if time.time() - self.flush_time > self.flush_interval: self.flush()
+        def event(self, stage, **kwargs):
+            if (self.events_file is None) or (os.getpid() != self.pid): return
+            evt = {'time': datetime.datetime.now().isoformat(timespec='milliseconds'), 'pid': self.pid, 'stage': stage}
+            for k in kwargs: evt[k] = kwargs[k]
+            self.events_file.write(json.dumps(evt, default=str)+'\n')
+            if time.time() - self.flush_time > self.flush_interval: self.flush()
         def flush(self):
-            pass
+            self.stdout.flush()
+            if os.getpid() != self.pid: return
+            for f in [self.file, self.events_file]:
+                if f is not None: f.flush()
+            self.flush_time = time.time()
+
+## def log_event
+## writes an event to the active LogTee (if stdout is redirected to one)
+def log_event(stage, **kwargs):
+    if isinstance(sys.stdout, LogTee): sys.stdout.event(stage, **kwargs)
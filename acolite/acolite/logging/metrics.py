@@ -0,0 +1,111 @@
+## def metrics_start
+## stage level instrumentation of processing runs
+## metrics_start enables and resets the metrics, stage_start/stage_stop (or the stage context manager) record
+## wall time, CPU time, peak RSS and bytes read and written per stage, metrics_stop returns them and writes a JSON file
+## stages are nested per thread, and named by their path (e.g. l2r/aot_estimate), repeated stages are accumulated
+## bytes read and written are the process I/O counters from /proc/self/io (if available), so they include all files
+## peak RSS is the process peak at the end of the stage
+## when metrics are not enabled the stage functions return immediately
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+import os, sys, time, json, threading, contextlib
+
+_metrics = {'enabled': False, 'stages': {}, 'start': None}
+_metrics_lock = threading.Lock()
+_metrics_local = threading.local()
+
+## returns current process counters
+def metrics_usage():
+    usage = {'wall': time.perf_counter(), 'cpu': time.process_time(),
+             'bytes_read': None, 'bytes_written': None, 'rss_peak': None}
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage['rss_peak'] = rss if sys.platform == 'darwin' else rss * 1024
+    except:
+        pass
+    try:
+        with open('/proc/self/io', 'r') as f:
+            io = dict([l.split(':') for l in f.readlines() if ':' in l])
+        usage['bytes_read'] = int(io['rchar'])
+        usage['bytes_written'] = int(io['wchar'])
+    except:
+        pass
+    return(usage)
+
+def metrics_start():
+    with _metrics_lock:
+        _metrics['stages'] = {}
+        _metrics['start'] = metrics_usage()
+        _metrics['enabled'] = True
+    _metrics_local.stack = []
+
+def metrics_enabled():
+    return(_metrics['enabled'])
+
+def stage_start(name):
+    if not _metrics['enabled']: return
+    if not hasattr(_metrics_local, 'stack'): _metrics_local.stack = []
+    _metrics_local.stack.append((name, metrics_usage()))
+
+def stage_stop(name = None):
+    if not _metrics['enabled']: return
+    stack = getattr(_metrics_local, 'stack', [])
+    if len(stack) == 0: return
+    ## stop stages until the named stage
+    if name is not None:
+        if name not in [s[0] for s in stack]: return
+        while stack[-1][0] != name: stage_stop()
+
+    end = metrics_usage()
+    path = '/'.join([s[0] for s in stack])
+    name, start = stack.pop()
+
+    with _metrics_lock:
+        if path not in _metrics['stages']:
+            _metrics['stages'][path] = {'count': 0, 'wall': 0., 'cpu': 0.,
+                                        'bytes_read': 0, 'bytes_written': 0, 'rss_peak': 0}
+        cur = _metrics['stages'][path]
+        cur['count'] += 1
+        for k in ['wall', 'cpu', 'bytes_read', 'bytes_written']:
+            if (end[k] is None) or (start[k] is None): continue
+            cur[k] += end[k] - start[k]
+        if end['rss_peak'] is not None: cur['rss_peak'] = max(cur['rss_peak'], end['rss_peak'])
+
+    ## top level stages are also sent to the log events
+    if len(stack) == 0:
+        import acolite as ac
+        ac.acolite.logging.log_event(name, wall = end['wall'] - start['wall'], cpu = end['cpu'] - start['cpu'],
+                                     rss_peak = end['rss_peak'])
+
+@contextlib.contextmanager
+def stage(name):
+    stage_start(name)
+    try:
+        yield
+    finally:
+        stage_stop(name)
+
+def metrics_stop(file = None, **kwargs):
+    if not _metrics['enabled']: return(None)
+    while len(getattr(_metrics_local, 'stack', [])) > 0: stage_stop()
+
+    end = metrics_usage()
+    with _metrics_lock:
+        start = _metrics['start']
+        metrics = {k: kwargs[k] for k in kwargs}
+        metrics['total'] = {'wall': end['wall'] - start['wall'], 'cpu': end['cpu'] - start['cpu'], 'rss_peak': end['rss_peak']}
+        for k in ['bytes_read', 'bytes_written']:
+            metrics['total'][k] = None if (end[k] is None) or (start[k] is None) else end[k] - start[k]
+        metrics['stages'] = [dict(stage=s, **_metrics['stages'][s]) for s in _metrics['stages']]
+        _metrics['enabled'] = False
+        _metrics['stages'] = {}
+
+    if file is not None:
+        odir = os.path.dirname(file)
+        if (len(odir) > 0) and (not os.path.exists(odir)): os.makedirs(odir)
+        with open(file, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=1)
+    return(metrics)
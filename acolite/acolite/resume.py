@@ -0,0 +1,114 @@
+## def resume_fingerprint
+## checkpointing of processing stages for resuming batch runs
+## resume_fingerprint computes a fingerprint of the stage inputs (path, size and modification time),
+## the processing settings and the ACOLITE version
+## resume_record writes a completed stage with its fingerprint and output files to a manifest in the output directory
+## resume_check returns the outputs of a completed stage if the fingerprint matches and the outputs are unchanged
+## the settings returned by the stage (and the converted bundle) can be stored with the outputs,
+## and are returned by resume_check with return_settings, so resumed runs continue with the same settings
+## the manifest is only updated after a stage completes, so outputs of interrupted stages are not reused
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) store the stage settings and bundle in the manifest
+##                2026-10-19 (QV) explicit encoding of tuples and numpy types in stored settings
+
+import os, json, time, hashlib
+
+## settings that do not change the outputs
+_resume_ignore = ['runid', 'inputfile', 'verbosity', 'resume', 'EARTHDATA_u', 'EARTHDATA_p',
+                  'log_flush_interval', 'log_events', 'output_metrics']
+
+## encodes tuples and numpy arrays as tagged objects and numpy scalars as Python types
+## so stored settings are returned with the same types by resume_check
+def _resume_encode(obj):
+    import numpy as np
+    if isinstance(obj, dict): return({k: _resume_encode(obj[k]) for k in obj})
+    if isinstance(obj, list): return([_resume_encode(v) for v in obj])
+    if isinstance(obj, tuple): return({'__tuple__': [_resume_encode(v) for v in obj]})
+    if isinstance(obj, np.ndarray): return({'__ndarray__': _resume_encode(obj.tolist()), 'dtype': obj.dtype.str})
+    if isinstance(obj, np.generic): return(obj.item())
+    return(obj)
+
+def _resume_decode(obj):
+    import numpy as np
+    if '__tuple__' in obj: return(tuple(obj['__tuple__']))
+    if '__ndarray__' in obj: return(np.asarray(obj['__ndarray__'], dtype=obj['dtype']))
+    return(obj)
+
+## returns file (or directory) path, size and modification time
+def _resume_stat(path):
+    path = os.path.abspath(path)
+    if not os.path.exists(path): return([path, None, None])
+    st = os.stat(path)
+    if os.path.isdir(path):
+        ## top level entries only, to avoid walking large bundles
+        size = sum([os.stat(os.path.join(path, f)).st_size for f in sorted(os.listdir(path))])
+    else:
+        size = st.st_size
+    return([path, size, st.st_mtime_ns])
+
+def resume_fingerprint(inputs, settings = None, stage = None):
+    import acolite as ac
+    if type(inputs) is not list: inputs = [inputs]
+    setu = {}
+    if settings is not None:
+        setu = {k: settings[k] for k in settings if k not in _resume_ignore}
+    fp = {'stage': stage, 'version': ac.version,
+          'inputs': [_resume_stat(f) for f in inputs], 'settings': setu}
+    return(hashlib.sha256(json.dumps(fp, sort_keys=True, default=str).encode('utf-8')).hexdigest())
+
+def resume_manifest(output):
+    return('{}/acolite_resume.json'.format(output))
+
+def resume_read(output):
+    manifest = resume_manifest(output)
+    if not os.path.exists(manifest): return({})
+    try:
+        with open(manifest, 'r', encoding='utf-8') as f:
+            return(json.load(f, object_hook=_resume_decode))
+    except:
+        return({})
+
+def resume_check(output, stage, key, fingerprint, return_settings = False):
+    entry = resume_read(output).get('{}:{}'.format(stage, key))
+    if entry is None: return(None)
+    if entry['fingerprint'] != fingerprint: return(None)
+    ## outputs should be unchanged since the stage was recorded
+    for o in entry['outputs']:
+        if _resume_stat(o[0]) != o: return(None)
+    outputs = [o[0] for o in entry['outputs']]
+    if return_settings:
+        ## entries recorded without settings can not be resumed
+        if entry.get('settings') is None: return(None)
+        return(outputs, entry['settings'], entry.get('bundle'))
+    return(outputs)
+
+def resume_record(output, stage, key, fingerprint, outputs, settings = None, bundle = None):
+    if type(outputs) is not list: outputs = [outputs]
+    manifest = resume_manifest(output)
+    if not os.path.exists(output): os.makedirs(output)
+
+    ## lock the manifest when several runs write to the same output
+    lock = None
+    try:
+        import fcntl
+        lock = open('{}.lock'.format(manifest), 'w')
+        fcntl.flock(lock, fcntl.LOCK_EX)
+    except:
+        pass
+
+    try:
+        entries = resume_read(output)
+        entries['{}:{}'.format(stage, key)] = {'stage': stage, 'fingerprint': fingerprint,
+                                                                  'outputs': [_resume_stat(f) for f in outputs],
+                                                                  'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        if settings is not None: entries['{}:{}'.format(stage, key)]['settings'] = settings
+        if bundle is not None: entries['{}:{}'.format(stage, key)]['bundle'] = bundle
+        entries = _resume_encode(entries)
+        ## write to temporary file and replace the manifest
+        tmp = '{}.{}.tmp'.format(manifest, os.getpid())
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=1, default=str)
+        os.replace(tmp, manifest)
+    finally:
+        if lock is not None: lock.close()
@@ -3,3 +3,5 @@ from .read import *
 from .read_list import *
 from .write import *
 from .parse import *
+from .cache import *
+from .compiled import *
@@ -0,0 +1,47 @@
+## def read_cached
+## reads ACOLITE configuration files (defaults, sensor defaults, int and float lists) only once per process
+## returns a copy, so the cached settings are not modified by the caller
+## the cache can be emptied with clear_cache, e.g. after editing the configuration files
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+_settings_files = {}
+_settings_lists = {}
+_settings_defaults = {}
+
+def read_cached(file):
+    import os
+    import acolite as ac
+    key = os.path.abspath(file)
+    if key not in _settings_files:
+        _settings_files[key] = ac.acolite.settings.read(file)
+    return({k: list(v) if type(v) is list else v for k, v in _settings_files[key].items()})
+
+## def read_list_cached
+## returns a cached set of the entries in a list file (e.g. settings_int.txt)
+def read_list_cached(file):
+    import os
+    import acolite as ac
+    key = os.path.abspath(file)
+    if key not in _settings_lists:
+        _settings_lists[key] = frozenset(ac.acolite.settings.read_list(file))
+    return(_settings_lists[key])
+
+## def defaults
+## returns the compiled default settings for a sensor (or the generic defaults if sensor is None)
+## the defaults are parsed and converted once per sensor, a settings file path given as sensor is not cached
+def defaults(sensor = None):
+    import os
+    import acolite as ac
+    if sensor in _settings_defaults: return(_settings_defaults[sensor])
+    setd = ac.acolite.settings.compiled(ac.acolite.settings.load(sensor))
+    if (sensor is None) or (not os.path.isfile(sensor)): _settings_defaults[sensor] = setd
+    return(setd)
+
+## def clear_cache
+## empties the settings caches
+def clear_cache():
+    _settings_files.clear()
+    _settings_lists.clear()
+    _settings_defaults.clear()
@@ -0,0 +1,86 @@
+## class compiled
+## immutable ACOLITE settings, with values converted to int and float according to settings_int and settings_float
+## values can be accessed as keys or attributes, e.g. setc['luts'] or setc.luts, list values are stored as tuples
+## override returns a new object with some values replaced, sharing the unchanged values with the original
+## dict returns a regular (mutable) settings dict as returned by ac.acolite.settings.parse
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+import collections.abc
+
+class compiled(collections.abc.Mapping):
+    __slots__ = ('_data',)
+
+    def __init__(self, settings = None, convert = True):
+        data = {} if settings is None else dict(settings)
+        if convert: data = convert_settings(data)
+        object.__setattr__(self, '_data', {k: tuple(v) if type(v) is list else v for k, v in data.items()})
+
+    def __getitem__(self, key):
+        return(self._data[key])
+
+    def __iter__(self):
+        return(iter(self._data))
+
+    def __len__(self):
+        return(len(self._data))
+
+    def __getattr__(self, key):
+        try:
+            return(self._data[key])
+        except KeyError:
+            raise AttributeError('Setting {} not found.'.format(key))
+
+    def __setattr__(self, key, value):
+        raise TypeError('Compiled settings can not be modified, use override.')
+
+    def __delattr__(self, key):
+        raise TypeError('Compiled settings can not be modified, use override.')
+
+    def __repr__(self):
+        return('compiled({} settings)'.format(len(self._data)))
+
+    def override(self, settings = None, convert = True, **kwargs):
+        new = {} if settings is None else dict(settings)
+        new.update(kwargs)
+        if convert: new = convert_settings(new)
+        obj = compiled.__new__(compiled)
+        data = dict(self._data)
+        for k, v in new.items(): data[k] = tuple(v) if type(v) is list else v
+        object.__setattr__(obj, '_data', data)
+        return(obj)
+
+    def dict(self):
+        return({k: list(v) if type(v) is tuple else v for k, v in self._data.items()})
+
+## def convert_settings
+## converts settings values to int and float, makes sure luts is a list, and sets the default pressure
+def convert_settings(setu):
+    import acolite as ac
+
+    ## make sure luts setting is a list
+    if 'luts' in setu:
+        if type(setu['luts']) not in [list, tuple]: setu['luts'] = [setu['luts']]
+
+    ## import settings that need to be converted to ints and floats
+    int_list = ac.acolite.settings.read_list_cached(ac.config['data_dir']+'/ACOLITE/settings_int.txt')
+    float_list = ac.acolite.settings.read_list_cached(ac.config['data_dir']+'/ACOLITE/settings_float.txt')
+
+    ## convert values to numbers
+    for k in setu:
+        if setu[k] is None: continue
+        if (k not in int_list) & (k not in float_list): continue
+
+        if type(setu[k]) in [list, tuple]:
+            if k in int_list: setu[k] = [int(i) for i in setu[k]]
+            if k in float_list: setu[k] = [float(i) for i in setu[k]]
+        else:
+            if k in int_list: setu[k] = int(setu[k])
+            if k in float_list: setu[k] = float(setu[k])
+
+    ## default pressure
+    if 'pressure' in setu:
+        setu['pressure'] = 1013.25 if setu['pressure'] is None else float(setu['pressure'])
+
+    return(setu)
@@ -4,6 +4,7 @@
 ## Written by Quinten Vanhellemont 2017-11-30
 ## Last modifications:
 ##                2018-07-18 (QV) changed acolite import name
+##                2026-10-19 (QV) read defaults through read_cached
 
 def load(settings):
     import os, glob
@@ -11,7 +12,7 @@ def load(settings):
 
     ## read defaults
     default_settings = '{}/config/defaults.txt'.format(ac.path)
-    setd = ac.acolite.settings.read(default_settings)
+    setd = ac.acolite.settings.read_cached(default_settings)
 
     ## read settings file
     if settings is not None:
@@ -21,7 +22,7 @@ def load(settings):
             if (os.path.exists(settings)) and (not os.path.isdir(settings)):
                 setu = ac.acolite.settings.read(settings)
             elif os.path.exists(setf):
-                setu = ac.acolite.settings.read(setf)
+                setu = ac.acolite.settings.read_cached(setf)
             else:
                 print('Settings file {} not found.'.format(settings))
                 setu = setd
@@ -3,56 +3,31 @@
 ## written by Quinten Vanhellemont, RBINS
 ## 2021-03-09
 ## modifications: 2022-03-28 (QV) moved int and float lists to external files
+##                2026-10-19 (QV) use cached compiled defaults, only convert user settings
+##                                added compiled keyword to return a compiled settings object
 
-
-def parse(sensor, settings=None, merge=True):
-    import os, time
-    import numpy as np
-    import scipy.ndimage
+def parse(sensor, settings=None, merge=True, compiled=False):
     import acolite as ac
 
     ## read default settings for sensor
     if (sensor is not None) | (merge):
-        setu = ac.acolite.settings.load(sensor)
+        setd = ac.acolite.settings.defaults(sensor)
     else:
-        setu = {}
+        setd = ac.acolite.settings.compiled()
 
-    ## add user settings
+    ## read user settings
+    sets = {}
     if settings is not None:
         if type(settings) is str:
             sets = ac.acolite.settings.read(settings)
-            if merge:
-                for k in sets: setu[k] = sets[k]
-            else:
-                setu = {k:sets[k] for k in sets}
         elif type(settings) is dict:
-            if merge:
-                for k in settings: setu[k] = settings[k]
-            else:
-                setu = {k:settings[k] for k in settings}
-
-    ## make sure luts setting is a list
-    if 'luts' in setu:
-        if type(setu['luts']) is not list: setu['luts'] = [setu['luts']]
-
-    ## import settings that need to be converted to ints and floats
-    int_list = ac.acolite.settings.read_list(ac.config['data_dir']+'/ACOLITE/settings_int.txt')
-    float_list = ac.acolite.settings.read_list(ac.config['data_dir']+'/ACOLITE/settings_float.txt')
+            sets = {k:settings[k] for k in settings}
+        elif isinstance(settings, ac.acolite.settings.compiled):
+            sets = settings.dict()
 
-    ## convert values to numbers
-    for k in setu:
-        if k not in setu: continue
-        if setu[k] is None: continue
-
-        if type(setu[k]) is list:
-            if k in int_list: setu[k] = [int(i) for i in setu[k]]
-            if k in float_list: setu[k] = [float(i) for i in setu[k]]
-        else:
-            if k in int_list: setu[k] = int(setu[k])
-            if k in float_list: setu[k] = float(setu[k])
-
-    ## default pressure
-    if 'pressure' in setu:
-        setu['pressure'] = 1013.25 if setu['pressure'] is None else float(setu['pressure'])
+    ## add user settings
+    if (not merge) & (settings is not None): setd = ac.acolite.settings.compiled()
+    setc = setd.override(sets)
 
-    return(setu)
+    if compiled: return(setc)
+    return(setc.dict())
@@ -7,6 +7,11 @@
 ##                2021-10-12 (QV) added "target" fit option, added interface reflectance option
 ##                2021-10-14 (QV) new version of ACSTAR3
 ##                2021-10-21 (QV) added PSF extent check and masking of scene edges where PSF coverage is not complete
+##                2026-10-19 (QV) added cache for aerosol/Rayleigh PSF kernel transforms and image transforms,
+##                               real-to-complex transforms and optional padding to fast fft sizes
+##                2026-10-19 (QV) LUT evaluated once per model at the scene geometry for all bands and aot nodes,
+##                               atmosphere parameters interpolated as arrays in fit_aot_adj
+##                2026-10-19 (QV) fft_cache off by default, image transforms only cached during the aot fit
 
 def acstar3(ncf, output=None, settings=None,
             ex = 3, ## radius of psf
@@ -24,11 +29,13 @@ def acstar3(ncf, output=None, settings=None,
             method = 'min_rmsd',
             target_rhos = None, target_lat = None, target_lon = None,
             include_interface = False, interface_wind = 20, interface_par = 'rsky_s',
+            fft_cache = False, fft_real = True, fft_fast_shape = False,
             verbosity=0):
 
     import acolite as ac
     import numpy as np
     from scipy import optimize
+    import scipy.fft
     import sys, os, time
 
     import matplotlib.pyplot as plt ## for diagnostic plots alone
@@ -38,30 +45,36 @@ def acstar3(ncf, output=None, settings=None,
     ## QV 2021-07-08
     ## edited 2021-10-06 QV removed raster loading from this function
     def fit_aot_adj(aot, lut, return_results = False, return_negatives = False, plot_results = False):
+        ## keep only transforms for the current lut
+        if cache_lut['lut'] != lut:
+            otf_cache.clear()
+            cache_lut['lut'] = lut
+        if not fft_cache:
+            otf_cache.clear()
+            psf_cache.clear()
+        ## image transforms are only reused between aot steps of the fit, not for the final results
+        cache_ext = (fft_cache) & (not return_results) & (not (include_interface & (interface_par == 'rsky_t')))
+        if not cache_ext: ext_cache.clear()
+        ## compute atmosphere parameters for all bands from the tabulated LUT
+        atm_arr = atm_interp(lut, aot)
         if include_interface:
-            rgi_pos = [pressure, 0, raa, vza, sza, interface_wind, aot]
-            rgi_pos[1] = lutdw[lut]['ipd'][interface_par]
-            int_cur = {b: float(lutdw[lut]['rgi'][b](rgi_pos)) for b in bands}
-        else:
-            rgi_pos = [pressure, 0, raa, vza, sza, aot]
-
-
-        ## compute atmosphere parameters
-        atm = {'tt_gas': tg_dict['tt_gas']}
-        for par in lut_par:
-            rgi_pos[1] = lutdw[lut]['ipd'][par]
-            atm[par] = {b: float(lutdw[lut]['rgi'][b](rgi_pos)) for b in bands}
+            int_cur = {b: float(atm_arr[interface_par][bi]) for bi, b in enumerate(band_list)}
 
         ## get gas optical depth from transmittance
-        atm['tgas'] = {b: -np.log(atm['tt_gas'][b]) for b in bands}
+        atm_arr['tgas'] = -np.log(tt_gas_arr)
 
         ## compute upward direct and diffuse total transmittances
-        atm['udirt'] = {b: np.exp(-(atm['ttot'][b]+atm['tgas'][b])/cos_vza) for b in bands}
-        atm['udift'] = {b: atm['utott'][b] - atm['udirt'][b] for b in bands}
+        atm_arr['udirt'] = np.exp(-(atm_arr['ttot']+atm_arr['tgas'])/cos_vza)
+        atm_arr['udift'] = atm_arr['utott'] - atm_arr['udirt']
 
         ## compute aerosol and rayleigh upward direct and diffuse transmittances
-        atm['udifa'] = {b: atm['utott'][b] * np.exp(-0.5 * atm['tray'][b] / cos_vza) - atm['udirt'][b] for b in bands}
-        atm['udifr'] = {b: atm['utott'][b] - atm['udirt'][b] - atm['udifa'][b] for b in bands}
+        atm_arr['udifa'] = atm_arr['utott'] * np.exp(-0.5 * atm_arr['tray'] / cos_vza) - atm_arr['udirt']
+        atm_arr['udifr'] = atm_arr['utott'] - atm_arr['udirt'] - atm_arr['udifa']
+
+        atm = {'tt_gas': tg_dict['tt_gas']}
+        for par in lut_par + ['tgas', 'udirt', 'udift', 'udifa', 'udifr']:
+            atm[par] = {b: float(atm_arr[par][bi]) for bi, b in enumerate(band_list)}
+        atm_arr = None
 
         ## compute estimate of rhos
         data, data_mean = {}, {}
@@ -71,8 +84,10 @@ def acstar3(ncf, output=None, settings=None,
             data_mean[b] = np.nanmean(data[b])
 
         ## compute psf
-        psf_a, psf_cv = {}, {}
+        ## the psf is a linear combination of the aerosol and Rayleigh kernels in kern
+        psf_a, psf_cv, kern = {}, {}, {}
         for b in datat:
+            kern[b] = None
             wave = bands[b]['wave_name']
             ## raster psf
             if psf_raster_sub:
@@ -89,6 +104,7 @@ def acstar3(ncf, output=None, settings=None,
 
                 ## new 2021-10-14
                 wm = (atm['udifa'][b] * pa_crop + atm['udifr'][b] * pr_crop) / (atm['udifa'][b]+atm['udifr'][b])
+                kern[b] = [(('raster', lut, aw), pa_crop), (('raster', 'Rayleigh'), pr_crop)]
 
                 ## commented 2021-10-14
                 ##
@@ -110,8 +126,20 @@ def acstar3(ncf, output=None, settings=None,
             else:
                 coef_ray = np.array([apsfs_fits['Rayleigh'][c] for c in ['c1', 'c2', 'c3', 'c4', 'c5', 'c6']])
                 coef_aer = np.array([apsfs_fits[lut][b][c] for c in ['c1', 'c2', 'c3', 'c4', 'c5', 'c6']])
-                wm, exm = ac.adjacency.acstar3.w_kernel(coef_aer, coef_ray, atm['udifr'][b], atm['udifa'][b],
-                                                        ex = ex, res = resolution/1000, pressure=pressure)
+                if ex == 0:
+                    wm, exm = ac.adjacency.acstar3.w_kernel(coef_aer, coef_ray, atm['udifr'][b], atm['udifa'][b],
+                                                            ex = ex, res = resolution/1000, pressure=pressure)
+                else:
+                    ## the kernel is linear in the Rayleigh and aerosol weights, so compute them separately once
+                    kern[b] = []
+                    for k, tray, taer in [('aer', 0, 1), ('ray', 1, 0)]:
+                        ## Rayleigh kernel is the same for all bands
+                        key = ('fit', lut, b, k) if k == 'aer' else ('fit', 'Rayleigh')
+                        if key not in psf_cache:
+                            psf_cache[key] = ac.adjacency.acstar3.w_kernel(coef_aer, coef_ray, tray, taer,
+                                                                           ex = ex, res = resolution/1000, pressure=pressure)[0]
+                        kern[b].append((key, psf_cache[key]))
+                    wm = (atm['udifa'][b] * kern[b][0][1] + atm['udifr'][b] * kern[b][1][1]) / (atm['udifa'][b]+atm['udifr'][b])
                 ## commented 2021-10-14
                 ##idp = int(((wm.shape[0]) - 1) / 2)
                 #psf_cv[b] = wm.sum()
@@ -143,7 +171,7 @@ def acstar3(ncf, output=None, settings=None,
             ## new 2021-10-14
             idp = int(((wm.shape[0]) - 1) / 2)
             psf_cv[b] = wm.sum()
-            psf_a[b] = wm
+            psf_a[b] = wm * 1.0
 
             psf_a[b] *= atm['udift'][b] * atm['dtott'][b]
             psf_a[b][idp, idp] += atm['udirt'][b] * atm['dtott'][b]
@@ -165,10 +193,30 @@ def acstar3(ncf, output=None, settings=None,
                 psf_a[b] = cur
 
         ## compute otf
-        otf_a = {}
+        otf_a, dim_fft = {}, {}
         ## make otf
         for b in datat:
-            otf_a[b] = ac.adjacency.acstar3.psf_otf(data[b].shape, psf_a[b])
+            idp_ = int(((psf_a[b].shape[0]) - 1) / 2)
+            dim_fft[b] = fft_shape(data[b].shape, idp_)
+            if kern[b] is None:
+                otf_a[b] = ac.adjacency.acstar3.psf_otf(dim_fft[b], psf_a[b], edge=False, real=fft_real, workers=-1)
+            else:
+                ## combine transformed aerosol and Rayleigh kernels
+                ## psf = k1 * (wa * pa + wr * pr) + k2 * delta, and the delta function transforms to 1
+                wa = atm['udifa'][b] / (atm['udifa'][b]+atm['udifr'][b])
+                wr = atm['udifr'][b] / (atm['udifa'][b]+atm['udifr'][b])
+                k1 = atm['udift'][b] * atm['dtott'][b] / (1 - data_mean[b] * atm['astot'][b])
+                k2 = atm['udirt'][b] * atm['dtott'][b] / (1 - data_mean[b] * atm['astot'][b])
+                otf_k = []
+                for key, kernel in kern[b]:
+                    okey = (key, dim_fft[b], fft_real)
+                    if okey not in otf_cache:
+                        otf_cache[okey] = ac.adjacency.acstar3.psf_otf(dim_fft[b], kernel, edge=False, real=fft_real, workers=-1)
+                    otf_k.append(otf_cache[okey])
+                otf_a[b] = (k1 * wa) * otf_k[0]
+                otf_a[b] += (k1 * wr) * otf_k[1]
+                otf_a[b] += k2
+                otf_k = None
 
         ## checked with R code
         datac, datac_mean = {}, {}
@@ -183,16 +231,30 @@ def acstar3(ncf, output=None, settings=None,
             #ext = ac.adjacency.acstar3.extend(tmp, idp_)
             mask = np.isnan(datat[b])
 
-            if include_interface & (interface_par == 'rsky_t'):
-                ext = ac.adjacency.acstar3.extend((datat[b]/atm['tt_gas'][b])-int_cur[b], idp_, fill_nan=True)
+            ## the extended image does not depend on aot, unless the interface reflectance is subtracted
+            ekey = (b, dim_fft[b], fft_real)
+            if (cache_ext) & (ekey in ext_cache):
+                x_f = ext_cache[ekey].copy()
             else:
-                ext = ac.adjacency.acstar3.extend(datat[b]/atm['tt_gas'][b], idp_, fill_nan=True)
+                if include_interface & (interface_par == 'rsky_t'):
+                    ext = ac.adjacency.acstar3.extend((datat[b]/atm['tt_gas'][b])-int_cur[b], idp_, fill_nan=True)
+                else:
+                    ext = ac.adjacency.acstar3.extend(datat[b]/atm['tt_gas'][b], idp_, fill_nan=True)
 
-            dim_ext = ext.shape
-            dsize = dim_ext[0] * dim_ext[1]
+                ## pad further to fft size by mirroring
+                if ext.shape != dim_fft[b]:
+                    ext = np.pad(ext, ((0, dim_fft[b][0]-ext.shape[0]), (0, dim_fft[b][1]-ext.shape[1])), mode='symmetric')
 
-            ## fft the image data
-            x_f = np.fft.fftn(ext)
+                ## fft the image data
+                if fft_real:
+                    x_f = scipy.fft.rfft2(ext, workers=-1)
+                else:
+                    x_f = np.fft.fftn(ext)
+                ext = None
+                if cache_ext: ext_cache[ekey] = x_f.copy()
+
+            dim_ext = dim_fft[b]
+            dsize = dim_ext[0] * dim_ext[1]
 
             ## subtract path reflectance from first element of fft
             x_f[0,0] = x_f[0,0] - atm['romix'][b] * dsize
@@ -200,19 +262,27 @@ def acstar3(ncf, output=None, settings=None,
             #x_f[1, 1, band] <- x_f[1, 1, band] - (x_eff[band] * (1 - psf_cv[band]) *
             #   udift[band] * dtott[band] / (1 - x_eff[band] * astot[band])) * dsize
             ## new 2021-10-14
+            ## for the real fft the conjugate element is implicit, so half is subtracted to get the same result
             x_f[1,1] -= (data_mean[b] * (1 - psf_cv[b]) * \
-                         atm['udift'][b] * atm['dtott'][b] / (1 - data_mean[b] * atm['astot'][b])) * dsize
+                         atm['udift'][b] * atm['dtott'][b] / (1 - data_mean[b] * atm['astot'][b])) * dsize * \
+                         (0.5 if fft_real else 1.0)
 
             ## if otf not yet transformed
             #tmp = x_f / np.fft.fftn(otf_a[b])
 
             ## otf is transformed in acstar3.psf_otf
             tmp = x_f / otf_a[b]
-            tmp2 = np.fft.ifftn(tmp)
-            tmp3 = (np.sign(tmp2) * np.abs(tmp2)).real
+            x_f = None
+            if fft_real:
+                tmp3 = scipy.fft.irfft2(tmp, s=dim_ext, workers=-1)
+            else:
+                tmp2 = np.fft.ifftn(tmp)
+                tmp3 = (np.sign(tmp2) * np.abs(tmp2)).real
+                tmp2 = None
+            tmp = None
 
             ## subset extended data back to image extent
-            x_s = tmp3[idp_:dim_ext[0]-idp_, idp_:dim_ext[1]-idp_]
+            x_s = tmp3[idp_:idp_+datat[b].shape[0], idp_:idp_+datat[b].shape[1]]
             datac[b] = x_s
             if include_interface & (interface_par == 'rsky_s'):
                 datac[b] -= int_cur[b]
@@ -340,6 +410,20 @@ def acstar3(ncf, output=None, settings=None,
     ## get output from settings
     if 'output' in setu: output = setu['output']
 
+    ## caches for psf kernels, their transforms and the transformed image data
+    ## these hold a complex transform per fitted band, so memory use scales with the number of bands
+    psf_cache, otf_cache, ext_cache, cache_lut = {}, {}, {}, {'lut': None}
+    if 'acstar3_fft_cache' in setu: fft_cache = setu['acstar3_fft_cache']
+    if 'acstar3_fft_real' in setu: fft_real = setu['acstar3_fft_real']
+    if 'acstar3_fft_fast_shape' in setu: fft_fast_shape = setu['acstar3_fft_fast_shape']
+
+    ## size of the extended image, optionally padded to a 5-smooth size for faster transforms
+    def fft_shape(dim, idp):
+        dim_ext = dim[0]+idp*2, dim[1]+idp*2
+        if fft_fast_shape:
+            dim_ext = tuple([scipy.fft.next_fast_len(d, real=True) for d in dim_ext])
+        return(dim_ext)
+
     ## set user settings
     if 'acstar3_method' in setu: method = setu['acstar3_method']
     if 'acstar3_psf_raster' in setu: psf_raster = setu['acstar3_psf_raster']
@@ -435,6 +519,42 @@ def acstar3(ncf, output=None, settings=None,
             bands[b]['wavelength']=bands[b]['wave_nm']
     ## end bands dataset
 
+    ## LUT evaluated at the scene geometry for all bands and aot nodes
+    ## the rgi is multilinear, and hence linear along aot, so interpolating
+    ## these tables in aot gives the same result as calling the rgi per aot
+    band_list = list(bands.keys())
+    tt_gas_arr = np.asarray([tg_dict['tt_gas'][b] for b in band_list])
+    atm_pars = lut_par + ([interface_par] if include_interface else [])
+    atm_tables = {}
+    def atm_table(lut):
+        if lut not in atm_tables:
+            tau = np.asarray(lutdw[lut]['meta']['tau'])
+            pos = []
+            for par in atm_pars:
+                for aot in tau:
+                    if include_interface:
+                        pos.append([pressure, lutdw[lut]['ipd'][par], raa, vza, sza, interface_wind, aot])
+                    else:
+                        pos.append([pressure, lutdw[lut]['ipd'][par], raa, vza, sza, aot])
+            pos = np.asarray(pos)
+            ## dimensions: band, parameter, aot
+            tab = np.asarray([lutdw[lut]['rgi'][b](pos).reshape(len(atm_pars), len(tau)) for b in band_list])
+            atm_tables[lut] = {'tau': tau, 'table': tab}
+        return(atm_tables[lut])
+
+    ## interpolate LUT table to aot (scalar or array), returns arrays per parameter with dimensions band(, aot)
+    def atm_interp(lut, aot):
+        tab = atm_table(lut)
+        tau, table = tab['tau'], tab['table']
+        scalar = np.ndim(aot) == 0 or np.size(aot) == 1
+        aot = np.atleast_1d(np.asarray(aot, dtype=np.float64)).ravel()
+        i1 = np.clip(np.searchsorted(tau, aot), 1, len(tau)-1)
+        w = (aot - tau[i1-1]) / (tau[i1] - tau[i1-1])
+        ret = table[:, :, i1-1] * (1 - w) + table[:, :, i1] * w
+        ret[:, :, (aot < tau[0]) | (aot > tau[-1])] = np.nan
+        if scalar: ret = ret[:, :, 0]
+        return({par: ret[:, pi] for pi, par in enumerate(atm_pars)})
+
     ## read all apsfs fits
     apsfs_fits = {}
     for lut in luts:
@@ -1,7 +1,8 @@
 ## move psf to corners and apply fft
 ## QV 2021-07-07 from AC code v0.9
+## modifications: 2026-10-19 (QV) added real keyword for real-to-complex fft (scipy.fft.rfft2)
 
-def psf_otf(dim, psf, edge=True, fft=True):
+def psf_otf(dim, psf, edge=True, fft=True, real=False, workers=None):
     import numpy as np
     pdim = psf.shape
 
@@ -24,6 +25,10 @@ def psf_otf(dim, psf, edge=True, fft=True):
 
     ## apply 2d fft
     if fft:
-        otf = np.fft.fftn(otf)
+        if real:
+            import scipy.fft
+            otf = scipy.fft.rfft2(otf, workers=workers)
+        else:
+            otf = np.fft.fftn(otf)
 
     return(otf)
@@ -6,6 +6,10 @@
 ## modifications: 2021-10-11 (QV) added output option
 ##                2021-10-12 (QV) added alternative interface reflectance method
 ##                2021-11-09 (QV) added output of glad_x/glad_y
+##                2026-10-19 (QV) added glad_array option, with LUT terms tabulated once for the scene geometry
+##                               and the bands after the start band corrected as one array,
+##                               added glad_convergence, timing and iteration count per band
+##                2026-10-19 (QV) cast glad_convergence to float, interface reflectance with item() for numpy 2
 
 
 def glad_l2r(ncf, output = None, ofile = None,
@@ -28,6 +32,8 @@ def glad_l2r(ncf, output = None, ofile = None,
                 glad_neg_max = 0.01,
                 glad_tau_step = 0.0025,
                 glad_neg_pixel_diff = 100,
+                glad_convergence = 0.01,
+                glad_array = False,
 
                 interface_method = 'default',
                 #interface_method = 'alternative',
@@ -36,7 +42,7 @@ def glad_l2r(ncf, output = None, ofile = None,
 
                 verbosity=0):
 
-    import os
+    import os, time
     import acolite as ac
     import numpy as np
 
@@ -67,6 +73,8 @@ def glad_l2r(ncf, output = None, ofile = None,
 
     ## copy settings for loading LUT
     setu = {k:settings[k] for k in settings}
+    if 'glad_array' in setu: glad_array = setu['glad_array']
+    if 'glad_convergence' in setu: glad_convergence = float(setu['glad_convergence'])
 
     ## read LUT with required parameters
     #lut_par = ['romix', 'dtott', 'utott', 'astot', 'ttot']
@@ -117,6 +125,7 @@ def glad_l2r(ncf, output = None, ofile = None,
     gatts_out['glad_neg_max'] = glad_neg_max
     gatts_out['glad_tau_step'] = glad_tau_step
     gatts_out['glad_neg_pixel_diff'] = glad_neg_pixel_diff
+    gatts_out['glad_convergence'] = glad_convergence
 
     if 'rhog' not in gatts_out['auto_grouping']:
         gatts_out['auto_grouping'] += ':rhog'
@@ -195,14 +204,61 @@ def glad_l2r(ncf, output = None, ofile = None,
         rgi_pos = [pressure, 0, raa, vza, sza, interface_wind, np.nanmin((0.1, aot))]
         rgi_pos[1] = lutdw[lut]['ipd'][interface_par]
 
-        int_cur = {b: float(lutdw[lut]['rgi'][b](rgi_pos)) for b in rsrd[sensor]['rsr_bands']}
+        int_cur = {b: lutdw[lut]['rgi'][b](rgi_pos).item() for b in rsrd[sensor]['rsr_bands']}
         int_cur_b1 = {b: int_cur[b]/int_cur[glad_ref1_band] if int_cur[glad_ref1_band]>0 else 0 for b in rsrd[sensor]['rsr_bands'] }
         int_cur_b2 = {b: int_cur[b]/int_cur[glad_ref2_band] if int_cur[glad_ref2_band]>0 else 0 for b in rsrd[sensor]['rsr_bands']}
 
+        ## array mode: evaluate the LUT once for all bands, parameters and aot nodes at the scene geometry
+        ## the rgi is linear along aot, so interpolating this table gives the same parameters for the updated aot
+        if glad_array:
+            atm_bands = list(rsrd[sensor]['rsr_bands'])
+            atm_tau = np.asarray(lutdw[lut]['meta']['tau'])
+            pos = np.asarray([[pressure, lutdw[lut]['ipd'][par], raa, vza, sza, wind, t] for par in lut_par for t in atm_tau])
+            atm_table = np.asarray([lutdw[lut]['rgi'][b](pos).reshape(len(lut_par), len(atm_tau)) for b in atm_bands])
+            pos = None
+
+            ## fresnel reflectance ratios and direct transmittance geometry
+            gi = [glad_bands.index(glad_ref1_band), glad_bands.index(glad_ref2_band)]
+            Rf_arr = np.asarray([Rf_sen[b] for b in glad_bands])
+            glad_cos = np.cos(vza*dtor), np.cos(sza*dtor)
+
+        ## write outputs for band b, returns update_attributes and new for the next write
+        def glad_write_band(b, cur_rhot, cur_att, cur_rhos, cur_rhosu, cur_rhog, cur_rhoe, update_attributes, new):
+            ## write current rhot
+            if write_rhot:
+                ac.output.nc_write(ofile, bands[b]['rhot_ds'], cur_rhot, dataset_attributes = cur_att,
+                       nc_projection=nc_projection, attributes=gatts_out, update_attributes = update_attributes, new=new)
+                update_attributes, new = False, False
+
+            ## update attributes
+            for k in atm: cur_att[k] = atm[k][b]
+            ac.output.nc_write(ofile, bands[b]['rhos_ds'], cur_rhos, dataset_attributes = cur_att,
+                                nc_projection=nc_projection, attributes=gatts_out, update_attributes = update_attributes, new=new)
+            update_attributes, new = False, False
+
+            ## write uncorrected rhos
+            if glad_write_rhosu:
+                ac.output.nc_write(ofile, bands[b]['rhos_ds'].replace('rhos_', 'rhosu_'), cur_rhosu,
+                                  dataset_attributes = cur_att)
+
+            ## write rhog
+            if glad_write_rhog:
+                ac.output.nc_write(ofile, bands[b]['rhos_ds'].replace('rhos_', 'rhog_'), cur_rhog,
+                                  dataset_attributes = cur_att)
+
+            ## write rhoe
+            if glad_write_rhoe:
+                ac.output.nc_write(ofile, bands[b]['rhos_ds'].replace('rhos_', 'rhoe_'), cur_rhoe,
+                                  dataset_attributes = cur_att)
+            return(update_attributes, new)
+
         ## run through bands
         for bi,b in enumerate(glad_order):
             if glad_skip: continue
             if bands[b]['rhos_ds'] not in datasets: continue
+            ## in array mode the other bands are corrected together after the start band
+            if (glad_array) & (bi > 0): continue
+            t0, glad_iter_start = time.time(), glad_iter
             wave = bands[b]['wave_nm']
             if verbosity > 0: print('Performing GLAD correction for band {} ({:.0f} nm)'.format(b, wave))
 
@@ -227,7 +283,15 @@ def glad_l2r(ncf, output = None, ofile = None,
                 ## first band
                 if bi == 0:
                     ## update atm parameters if new aot is different
-                    if caot != aot:
+                    if (caot != aot) & (glad_array):
+                        ## interpolate tabulated LUT to current aot
+                        i1 = int(np.clip(np.searchsorted(atm_tau, caot), 1, len(atm_tau)-1))
+                        w = (caot - atm_tau[i1-1]) / (atm_tau[i1] - atm_tau[i1-1])
+                        cur = atm_table[:, :, i1-1] * (1 - w) + atm_table[:, :, i1] * w
+                        if (caot < atm_tau[0]) | (caot > atm_tau[-1]): cur[:] = np.nan
+                        for pi, par in enumerate(lut_par):
+                            atm[par] = {b: float(cur[bi2, pi]) for bi2, b in enumerate(atm_bands)}
+                    elif caot != aot:
                         for par in lut_par:
                             atm[par] = {b: float(lutdw[lut]['rgi'][b]((pressure, lutdw[lut]['ipd'][par], raa, vza, sza, wind, caot))) \
                                         for b in rsrd[sensor]['rsr_bands']}
@@ -236,7 +300,7 @@ def glad_l2r(ncf, output = None, ofile = None,
                         rgi_pos = [pressure, 0, raa, vza, sza, interface_wind, np.nanmin((0.1, aot))]
                         rgi_pos[1] = lutdw[lut]['ipd'][interface_par]
 
-                        int_cur = {b: float(lutdw[lut]['rgi'][b](rgi_pos)) for b in rsrd[sensor]['rsr_bands']}
+                        int_cur = {b: lutdw[lut]['rgi'][b](rgi_pos).item() for b in rsrd[sensor]['rsr_bands']}
                         #int_cur_b1 = {b: int_cur[b]/int_cur[glad_ref1_band] for b in rsrd[sensor]['rsr_bands']}
                         #int_cur_b2 = {b: int_cur[b]/int_cur[glad_ref2_band] for b in rsrd[sensor]['rsr_bands']}
                         int_cur_b1 = {b: int_cur[b]/int_cur[glad_ref1_band] if int_cur[glad_ref1_band]>0 else 0 for b in rsrd[sensor]['rsr_bands'] }
@@ -248,33 +312,46 @@ def glad_l2r(ncf, output = None, ofile = None,
                                  'Rf_ref1':{}, 'Rf_ref2':{}, 'gc_ref1':{}, 'gc_ref2':{}}
 
                     ## compute for new ctau
-                    for bi2,b2 in enumerate(glad_bands):
-                        ## direct up and down transmittances
-                        glad_dict['Tu'][b2] = np.exp(-1.*(atm['ttot'][b2]/np.cos(vza*dtor)))
-                        glad_dict['Td'][b2] = np.exp(-1.*(atm['ttot'][b2]/np.cos(sza*dtor)))
+                    if glad_array:
+                        ttot = np.asarray([atm['ttot'][b2] for b2 in glad_bands])
+                        Tu, Td = np.exp(-1.*(ttot/glad_cos[0])), np.exp(-1.*(ttot/glad_cos[1]))
+                        T = Tu * Td
+                        tdu = np.asarray([atm['utott'][b2] for b2 in glad_bands]) - Tu
+                        tdd = np.asarray([atm['dtott'][b2] for b2 in glad_bands]) - Td
+                        garr = {'Tu': Tu, 'Td': Td, 'T': T, 'tdu': tdu, 'tdd': tdd,
+                                'u_diftodir': tdu / Tu, 'd_diftodir': tdd / Td,
+                                'Rf_ref1': Rf_arr / Rf_arr[gi[0]], 'Rf_ref2': Rf_arr / Rf_arr[gi[1]]}
+                        garr['gc_ref1'] = T * garr['Rf_ref1'] / T[gi[0]]
+                        garr['gc_ref2'] = T * garr['Rf_ref2'] / T[gi[1]]
+                        glad_dict = {k: {b2: garr[k][bi2] for bi2, b2 in enumerate(glad_bands)} for k in garr}
+                    else:
+                        for bi2,b2 in enumerate(glad_bands):
+                            ## direct up and down transmittances
+                            glad_dict['Tu'][b2] = np.exp(-1.*(atm['ttot'][b2]/np.cos(vza*dtor)))
+                            glad_dict['Td'][b2] = np.exp(-1.*(atm['ttot'][b2]/np.cos(sza*dtor)))
 
-                        ## two way direct transmittance
-                        glad_dict['T'][b2]  = glad_dict['Tu'][b2] * glad_dict['Td'][b2]
+                            ## two way direct transmittance
+                            glad_dict['T'][b2]  = glad_dict['Tu'][b2] * glad_dict['Td'][b2]
 
-                        ## diffuse up and down transmittances
-                        glad_dict['tdu'][b2] = atm['utott'][b2]-glad_dict['Tu'][b2]
-                        glad_dict['tdd'][b2] = atm['dtott'][b2]-glad_dict['Td'][b2]
+                            ## diffuse up and down transmittances
+                            glad_dict['tdu'][b2] = atm['utott'][b2]-glad_dict['Tu'][b2]
+                            glad_dict['tdd'][b2] = atm['dtott'][b2]-glad_dict['Td'][b2]
 
-                        ## diffuse to direct transmittance ratios
-                        glad_dict['u_diftodir'][b2] = glad_dict['tdu'][b2] / glad_dict['Tu'][b2]
-                        glad_dict['d_diftodir'][b2] = glad_dict['tdd'][b2] / glad_dict['Td'][b2]
+                            ## diffuse to direct transmittance ratios
+                            glad_dict['u_diftodir'][b2] = glad_dict['tdu'][b2] / glad_dict['Tu'][b2]
+                            glad_dict['d_diftodir'][b2] = glad_dict['tdd'][b2] / glad_dict['Td'][b2]
 
-                        ## fresnel reflectance ratio for SWIR1 and SWIR2
-                        glad_dict['Rf_ref1'][b2]  = Rf_sen[b2]/Rf_sen[glad_ref1_band]
-                        glad_dict['Rf_ref2'][b2]  = Rf_sen[b2]/Rf_sen[glad_ref2_band]
+                            ## fresnel reflectance ratio for SWIR1 and SWIR2
+                            glad_dict['Rf_ref1'][b2]  = Rf_sen[b2]/Rf_sen[glad_ref1_band]
+                            glad_dict['Rf_ref2'][b2]  = Rf_sen[b2]/Rf_sen[glad_ref2_band]
 
-                        ## glint correction factor for SWIR1 and SWIR2
-                        glad_dict['gc_ref1'][b2]  = glad_dict['T'][b2] * glad_dict['Rf_ref1'][b2]
-                        glad_dict['gc_ref2'][b2]  = glad_dict['T'][b2] * glad_dict['Rf_ref2'][b2]
+                            ## glint correction factor for SWIR1 and SWIR2
+                            glad_dict['gc_ref1'][b2]  = glad_dict['T'][b2] * glad_dict['Rf_ref1'][b2]
+                            glad_dict['gc_ref2'][b2]  = glad_dict['T'][b2] * glad_dict['Rf_ref2'][b2]
 
-                    for bi2,b2 in enumerate(glad_bands):
-                        glad_dict['gc_ref1'][b2] /= glad_dict['T'][glad_ref1_band]
-                        glad_dict['gc_ref2'][b2] /= glad_dict['T'][glad_ref2_band]
+                        for bi2,b2 in enumerate(glad_bands):
+                            glad_dict['gc_ref1'][b2] /= glad_dict['T'][glad_ref1_band]
+                            glad_dict['gc_ref2'][b2] /= glad_dict['T'][glad_ref2_band]
 
                     ## do atmospheric correction
                     ## ref band 1
@@ -360,7 +437,7 @@ def glad_l2r(ncf, output = None, ofile = None,
 
                 ## compute environment reflectance in this band
                 if glad_adj_difr:
-                    cur_rhoe_w = glad_y * (glad_dict['u_diftodir'][btag])
+                    cur_rhoe_w = glad_y * (glad_dict['u_diftodir'][b])
                 else:
                     cur_rhoe_w = glad_y
                 cur_rhoe = cur_rhoe_w*cur_rhos_ave
@@ -383,8 +460,8 @@ def glad_l2r(ncf, output = None, ofile = None,
 
                         glad_loop = (neg_fraction > glad_neg_max) & (glad_iter < glad_iter_max)
 
-                        ## stop if less than 1% of pixels were affected
-                        if dneg < nvalid*0.01: glad_loop = False
+                        ## stop if less than glad_convergence (default 1%) of pixels were affected
+                        if dneg < nvalid*glad_convergence: glad_loop = False
 
                         if not glad_iterate: glad_loop = False
 
@@ -407,33 +484,77 @@ def glad_l2r(ncf, output = None, ofile = None,
                 if glad_skip: continue
 
 
-            ## write current rhot
-            if write_rhot:
-                ac.output.nc_write(ofile, bands[b]['rhot_ds'], cur_rhot, dataset_attributes = cur_att,
-                       nc_projection=nc_projection, attributes=gatts_out, update_attributes = update_attributes, new=new)
-                update_attributes, new = False, False
+            if verbosity > 1: print('GLAD band {} ({:.0f} nm): {} iterations, {:.2f}s'.format(b, wave, glad_iter-glad_iter_start, time.time()-t0))
 
-            ## update attributes
-            for k in atm: cur_att[k] = atm[k][b]
-            ac.output.nc_write(ofile, bands[b]['rhos_ds'], cur_rhos, dataset_attributes = cur_att,
-                                nc_projection=nc_projection, attributes=gatts_out, update_attributes = update_attributes, new=new)
-            update_attributes, new = False, False
+            ## write outputs
+            update_attributes, new = glad_write_band(b, cur_rhot, cur_att, cur_rhos, cur_rhosu if glad_write_rhosu else None,
+                                                     cur_rhog, cur_rhoe, update_attributes, new)
 
+        ## array mode: correct the other bands together using the start band glad_x, glad_y and aot
+        glad_rest = [b for b in glad_order[1:] if bands[b]['rhos_ds'] in datasets] if glad_array else []
+        if (not glad_skip) & (len(glad_rest) > 0):
+            t0 = time.time()
+            if verbosity > 0: print('Performing GLAD correction for bands {}'.format(', '.join(glad_rest)))
 
-            ## write uncorrected rhos
-            if glad_write_rhosu:
-                ac.output.nc_write(ofile, bands[b]['rhos_ds'].replace('rhos_', 'rhosu_'), cur_rhosu,
-                                  dataset_attributes = cur_att)
+            ## load rhot for all bands
+            cur_rhot, cur_toa_mask, cur_atts = [], [], []
+            for b in glad_rest:
+                if b == glad_ref1_band:
+                    d, a = 1.0 * glad_ref_rhot1, {k:rhot1_att[k] for k in rhot1_att}
+                elif b == glad_ref2_band:
+                    d, a = 1.0 * glad_ref_rhot2, {k:rhot2_att[k] for k in rhot2_att}
+                else:
+                    d, a = ac.shared.nc_data(ncf, bands[b]['rhot_ds'], attributes=True)
+                cur_toa_mask.append(np.ma.getmaskarray(d))
+                cur_rhot.append(d.data)
+                cur_atts.append(a)
+            cur_rhot = np.asarray(cur_rhot)
+            cur_toa_mask = np.asarray(cur_toa_mask)
+            cur_rhot[cur_toa_mask] = np.nan
 
-            ## write rhog
-            if glad_write_rhog:
-                ac.output.nc_write(ofile, bands[b]['rhos_ds'].replace('rhos_', 'rhog_'), cur_rhog,
-                                  dataset_attributes = cur_att)
+            ## band parameters with dimensions band, y, x
+            bpar = lambda dct: np.asarray([dct[b] for b in glad_rest])[:, None, None]
 
-            ## write rhoe
-            if glad_write_rhoe:
-                ac.output.nc_write(ofile, bands[b]['rhos_ds'].replace('rhos_', 'rhoe_'), cur_rhoe,
-                                  dataset_attributes = cur_att)
+            ## a/c in all bands
+            cur_rhos = (cur_rhot / bpar({b: bands[b]['tt_gas'] for b in glad_rest})) - bpar(atm['romix'])
+            cur_rhos = (cur_rhos) / ((bpar(atm['dtott']) * bpar(atm['utott'])) + bpar(atm['astot'])*cur_rhos)
+            if glad_write_rhosu: cur_rhosu = cur_rhos * 1.0
+
+            if glad_adj_exclude_water:
+                cur_rhos_ave = np.asarray([np.nanmean(cur[glad_mask==1]) for cur in cur_rhos])
+            else:
+                cur_rhos_ave = np.nanmean(cur_rhos, axis=(1,2))
+
+            ## compute glint in these bands
+            if interface_method == 'default':
+                cur_rhog = bpar(glad_dict['gc_ref1']) * glad_x[None, :, :]
+            else:
+                cur_rhog = bpar(int_cur_b1) * glad_x[None, :, :]
+            cur_rhog[:, glad_mask == 1] = np.nan
+            cur_rhog[cur_toa_mask] = np.nan
+
+            ## compute environment reflectance in these bands
+            if glad_adj_difr:
+                cur_rhoe_w = glad_y[None, :, :] * bpar(glad_dict['u_diftodir'])
+            else:
+                cur_rhoe_w = glad_y[None, :, :]
+            cur_rhoe = cur_rhoe_w * cur_rhos_ave[:, None, None]
+            cur_rhoe_w = None
+            cur_rhoe[:, glad_mask == 1] = np.nan
+            cur_rhoe[cur_toa_mask] = np.nan
+
+            cur_rhos[:, glad_mask == 0] -= cur_rhog[:, glad_mask == 0]
+            cur_rhos[:, glad_mask == 0] -= cur_rhoe[:, glad_mask == 0]
+
+            if verbosity > 1: print('GLAD bands {}: {:.2f}s, {:.2f}s per band'.format(', '.join(glad_rest),
+                                                                              time.time()-t0, (time.time()-t0)/len(glad_rest)))
+
+            ## write outputs
+            for i, b in enumerate(glad_rest):
+                update_attributes, new = glad_write_band(b, cur_rhot[i], cur_atts[i], cur_rhos[i],
+                                                         cur_rhosu[i] if glad_write_rhosu else None,
+                                                         cur_rhog[i], cur_rhoe[i], update_attributes, new)
+            cur_rhot, cur_rhos, cur_rhosu, cur_rhog, cur_rhoe = None, None, None, None, None
 
     ## no valid pixels found
     if glad_skip:
@@ -3,3 +3,4 @@ from .import_luts import *
 from .reverse_lut import *
 from .import_rsky_lut import *
 from .import_rsky_luts import *
+from .lut_slice import *
@@ -11,6 +11,7 @@
 ##                  2021-06-08 (QV) added lut par subsetting
 ##                  2021-07-20 (QV) added retrieval of generic LUTs
 ##                  2021-10-22 (QV) compute ttot if not in LUT
+##                  2026-10-19 (QV) resample all bands with one sparse band weight matrix product
 
 def import_lut(lutid, lutdir, lut_par = ['utott', 'dtott', 'astot', 'ttot', 'romix'],
                override = False, sensor = None, get_remote = True,
@@ -131,10 +132,11 @@ def import_lut(lutid, lutdir, lut_par = ['utott', 'dtott', 'astot', 'ttot', 'rom
                 lut, meta = ac.aerlut.import_lut(lutid,lutdir, lut_par=None) ## add None so all pars are loaded when resampling
                 lut_dims = lut.shape
 
-                ## new ndim convolution
-                lut_sensor = {}
-                for band in rsr_bands:
-                    lut_sensor[band] = ac.shared.rsr_convolute_nd(lut, meta['wave'],rsr[band]['response'], rsr[band]['wave'], axis=1)
+                ## resample all bands at once
+                rsrm = ac.shared.rsr_matrix(meta['wave'], rsr, rsr_bands)
+                lut_bands = ac.shared.rsr_convolute_matrix(lut, rsrm, axis=1, squeeze=False)
+                lut_sensor = {band: lut_bands[:, bi] for bi, band in enumerate(rsr_bands)}
+                lut_bands = None
 
                 ## write nc file
                 try:
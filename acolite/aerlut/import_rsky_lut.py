@@ -9,6 +9,7 @@
 ##               2021-03-01 (QV) removed separate luts for wind speed
 ##               2021-05-31 (QV) added remote lut retrieval
 ##               2021-07-20 (QV) added retrieval of generic LUTs
+##               2026-10-19 (QV) resample all bands with one sparse band weight matrix product
 
 def import_rsky_lut(model, lutbase='ACOLITE-RSKY-202102-82W', sensor=None, override=False,
                     get_remote = True, remote_base = 'https://raw.githubusercontent.com/acolite/acolite_luts/main'):
@@ -88,9 +89,10 @@ def import_rsky_lut(model, lutbase='ACOLITE-RSKY-202102-82W', sensor=None, overr
                     ## read lut
                     lut, meta, dim, rgi = ac.aerlut.import_rsky_lut(model, lutbase=lutbase)
                     ## resample to bands
-                    lut_sensor = {}
-                    for band in rsr_bands:
-                        lut_sensor[band] = ac.shared.rsr_convolute_nd(lut, meta['wave'],rsr[band]['response'], rsr[band]['wave'], axis=0)
+                    rsrm = ac.shared.rsr_matrix(meta['wave'], rsr, rsr_bands)
+                    lut_bands = ac.shared.rsr_convolute_matrix(lut, rsrm, axis=0, squeeze=False)
+                    lut_sensor = {band: lut_bands[bi] for bi, band in enumerate(rsr_bands)}
+                    lut_bands = None
                     #return(lut_sensor, meta, dim)
                     ## save to new file
                     from netCDF4 import Dataset
@@ -0,0 +1,50 @@
+## def lut_slice
+## evaluates a list of LUT interpolators (e.g. all bands of all models) on the same grid in one call
+## rgis is a list of RegularGridInterpolators as set up by import_luts and import_rsky_luts
+## coords gives the coordinate for each LUT dimension, or None for dimensions that are kept in the output
+## e.g. [pressure, None, raa, vza, sza, None] returns all parameters and aot for the given geometry
+## interpolation is linear as the RegularGridInterpolator, and NaN is returned outside the grid
+## returns an array with the rgis in the first dimension and the kept dimensions after that
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+def lut_slice(rgis, coords):
+    import numpy as np
+
+    grid = rgis[0].grid
+    if len(coords) != len(grid):
+        raise ValueError('Got {} coordinates for {} LUT dimensions'.format(len(coords), len(grid)))
+    for rgi in rgis[1:]:
+        if any([(len(g) != len(grid[gi])) or (not np.allclose(g, grid[gi])) for gi, g in enumerate(rgi.grid)]):
+            raise ValueError('LUT interpolators do not have the same grid')
+
+    ## find grid cell and weights for the given coordinates
+    sub, weights = [], {}
+    for di, c in enumerate(coords):
+        if c is None:
+            sub.append(slice(None))
+            continue
+        g = np.asarray(grid[di], dtype=np.float64)
+        if len(g) == 1:
+            sub.append(slice(0, 1))
+            weights[di] = np.ones(1)
+            continue
+        if (not np.isfinite(c)) or (c < g[0]) or (c > g[-1]): weights = None
+        if weights is None: break
+        i = min(max(int(np.searchsorted(g, c, side='right'))-1, 0), len(g)-2)
+        w = (c - g[i]) / (g[i+1] - g[i])
+        sub.append(slice(i, i+2))
+        weights[di] = np.asarray([1-w, w])
+
+    ## outside of the grid
+    if weights is None:
+        shape = [len(rgis)] + [len(grid[di]) for di, c in enumerate(coords) if c is None]
+        return(np.zeros(shape) + np.nan)
+
+    ## stack the grid cells and contract the fixed dimensions
+    data = np.stack([rgi.values[tuple(sub)] for rgi in rgis])
+    for di in reversed(range(len(coords))):
+        if di not in weights: continue
+        data = np.tensordot(data, weights[di], axes=([di+1], [0]))
+    return(data)
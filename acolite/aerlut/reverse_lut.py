@@ -5,6 +5,7 @@
 ## last updates: 2021-05-31 (QV) added remote lut retrieval
 ##               2021-10-24 (QV) added pressures and get_remote as keyword to other functions
 ##               2021-10-25 (QV) test if the wind dimension is != 1 or missing
+##               2026-10-19 (QV) np.product > np.prod, pass par to import_luts so rsky is added for romix+rsky_t
 
 def reverse_lut(sensor, lutdw=None, par = 'romix',
                        pct = (1,60), nbins = 20, override = False,
@@ -56,7 +57,7 @@ def reverse_lut(sensor, lutdw=None, par = 'romix',
                     print('Creating reverse LUTs for {}'.format(sensor))
                     if lutdw is None:
                         print('Importing source LUTs')
-                        lutdw = ac.aerlut.import_luts(sensor=sensor, base_luts = base_luts,
+                        lutdw = ac.aerlut.import_luts(sensor=sensor, base_luts = base_luts, par = par,
                                                         lut_par = [par], return_lut_array = True,
                                                         pressures = pressures, get_remote = get_remote,
                                                         add_rsky = par == 'romix+rsky_t', rsky_lut = rsky_lut)
@@ -84,7 +85,7 @@ def reverse_lut(sensor, lutdw=None, par = 'romix',
                     dims = [len(d) for d in dim]
                     luta = np.zeros(dims) + np.nan
                     ii = 0
-                    ni = np.product(dims[:-1])
+                    ni = np.prod(dims[:-1])
                     for pi, pressure in enumerate(pressures):
                         for ri, raa in enumerate(raas):
                             for vi, vza in enumerate(vzas):
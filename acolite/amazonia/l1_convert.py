@@ -6,6 +6,8 @@
 ## written by Quinten Vanhellemont, RBINS
 ## 2022-01-14
 ## modifications: 2022-02-06 (QV) added vza
+##                2026-10-19 (QV) added polylakes_spatial_index
+##                2026-10-19 (QV) added polygon_cache
 
 def l1_convert(inputfile, output = None, settings = {}, verbosity=5):
     import os, zipfile, shutil
@@ -78,7 +80,7 @@ def l1_convert(inputfile, output = None, settings = {}, verbosity=5):
 
             ## check if ROI polygon is given
             if setu['polylakes']:
-                poly = ac.shared.polylakes(setu['polylakes_database'])
+                poly = ac.shared.polylakes(setu['polylakes_database'], spatial_index=setu['polylakes_spatial_index'])
                 setu['polygon_limit'] = False
             else:
                 poly = setu['polygon']
@@ -86,7 +88,7 @@ def l1_convert(inputfile, output = None, settings = {}, verbosity=5):
             if poly is not None:
                 if os.path.exists(poly):
                     try:
-                        limit = ac.shared.polygon_limit(poly)
+                        limit = ac.shared.polygon_limit(poly, cache=setu['polygon_cache'])
                         if setu['polygon_limit']:
                             print('Using limit from polygon envelope: {}'.format(limit))
                         else:
@@ -251,7 +253,7 @@ def l1_convert(inputfile, output = None, settings = {}, verbosity=5):
 
         ## if we are clipping to a given polygon get the clip_mask here
         if clip:
-            clip_mask = ac.shared.polygon_crop(dct_prj, poly, return_sub=False)
+            clip_mask = ac.shared.polygon_crop(dct_prj, poly, return_sub=False, cache=setu['polygon_cache'])
             clip_mask = clip_mask.astype(bool) == False
 
 
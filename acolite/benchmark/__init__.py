@@ -0,0 +1,12 @@
+from .warp_and_merge import *
+from .olci_smile_tpg import *
+from .rsr_convolute import *
+from .nc_subwindow import *
+from .polylakes import *
+from .point_extract import *
+from .synthetic_luts import *
+from .synthetic_l1r import *
+from .processing_chain import *
+from .synthetic_gee import *
+from .gee_agh import *
+from .identify_bundles import *
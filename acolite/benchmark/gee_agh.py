@@ -0,0 +1,57 @@
+## def gee_agh
+## offline benchmark of ACOLITE/GEE hybrid processing with the local Earth Engine client
+## runs agh_run on nimages synthetic Sentinel-2 images for the given numbers of download workers,
+## with latency (seconds) added to each client request to simulate the network
+## uses the synthetic LUT fixtures of ac.benchmark.synthetic_luts
+## output defaults to a new temporary directory, which is removed unless keep is set
+## a given output directory is only removed if it was created here
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) only remove output directories created by the benchmark
+
+def gee_agh(dims = (1500, 1500), sensor = 'S2A_MSI', nimages = 1, workers = [1, 4], latency = 0.2, failure_rate = 0.0,
+            limit = None, settings = None, output = None, lut_dir = None, keep = False, seed = 0):
+    import os, time, shutil, datetime, tempfile
+    import acolite as ac
+    from acolite import gee ## currently not imported in main acolite
+
+    if output is None:
+        output = tempfile.mkdtemp(prefix='acolite_benchmark_gee_agh_')
+        remove = True
+    else:
+        remove = not os.path.exists(output)
+        if remove: os.makedirs(output)
+    if lut_dir is None: lut_dir = '{}/acolite_benchmark_luts'.format(tempfile.gettempdir())
+
+    results = {}
+    lut_dir_ = ac.config['lut_dir']
+    try:
+        ac.benchmark.synthetic_luts(lut_dir, sensor = sensor)
+        ac.config['lut_dir'] = lut_dir
+
+        ## synthetic images and preloaded LUTs
+        images = '{}/images'.format(output)
+        for ii in range(nimages):
+            isodate = (datetime.datetime(2022, 6, 21, 10, 30, 31) + datetime.timedelta(minutes = ii)).isoformat()
+            ac.benchmark.synthetic_gee(images, dims = dims, sensor = sensor, isodate = isodate, seed = seed + ii)
+        rsrd = {sensor: ac.shared.rsr_dict(sensor)[sensor]}
+        lutd = {sensor: ac.aerlut.import_luts(sensor = sensor)}
+        luti = {sensor: ac.aerlut.import_rsky_luts(models = [1, 2], sensor = sensor)}
+
+        for nw in workers:
+            setg = {'gee_client': 'local', 'gee_local_path': images,
+                    'isodate_start': '2022-06-21', 'sensors': [sensor], 'limit': limit,
+                    'pressure': 1013.25, 'override': True, 'output': '{}/agh_{}'.format(output, nw),
+                    'download_workers': nw}
+            if settings is not None:
+                for k in settings: setg[k] = settings[k]
+            gee.local.Initialize(cache = '{}/cache'.format(output), latency = latency, failure_rate = failure_rate)
+            t0 = time.perf_counter()
+            gee.agh_run(setg, rsrd = rsrd, lutd = lutd, luti = luti)
+            results['workers_{}'.format(nw)] = time.perf_counter()-t0
+            print('{:>30}: {:.2f} s'.format('workers_{}'.format(nw), results['workers_{}'.format(nw)]))
+    finally:
+        ac.config['lut_dir'] = lut_dir_
+
+    if (remove) & (not keep): shutil.rmtree(output)
+    return(results)
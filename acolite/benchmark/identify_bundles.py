@@ -0,0 +1,76 @@
+## def identify_bundles
+## offline benchmark of identify_bundle on a directory of stub bundles
+## writes nbundles stubs cycling through the given types (Landsat MTL directories, small ACOLITE L1R files,
+## Sentinel-3 directories with a NetCDF title, and unknown directories with only image files)
+## and times identification by testing all sensors in order (probes), with the file name signatures (signatures),
+## and from the identification cache (cached)
+## output defaults to a new temporary directory, a given output directory has to be empty or not exist
+## output is removed unless keep is set, a given output directory only if it was created here
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) only remove output directories created by the benchmark
+
+def identify_bundles(nbundles = 100, types = ['Landsat', 'ACOLITE', 'Sentinel-3', 'unknown'],
+                     output = None, keep = False, seed = 0):
+    import os, time, shutil, contextlib, io, tempfile
+    import acolite as ac
+    from netCDF4 import Dataset
+
+    if output is None:
+        output = tempfile.mkdtemp(prefix='acolite_benchmark_identify_bundles_')
+        remove = True
+    elif os.path.exists(output):
+        if len(os.listdir(output)) > 0:
+            raise ValueError('Output directory {} is not empty'.format(output))
+        remove = False
+    else:
+        os.makedirs(output)
+        remove = True
+
+    ## write stub bundles
+    mtl = ['GROUP = LANDSAT_METADATA_FILE', '  GROUP = PRODUCT_CONTENTS',
+           '    FILE_NAME_BAND_1 = "{}_B1.TIF"', '  END_GROUP = PRODUCT_CONTENTS',
+           '  GROUP = IMAGE_ATTRIBUTES', '    SPACECRAFT_ID = "LANDSAT_8"', '    SENSOR_ID = "OLI_TIRS"',
+           '  END_GROUP = IMAGE_ATTRIBUTES', 'END_GROUP = LANDSAT_METADATA_FILE']
+    bundles, expected = [], []
+    for bi in range(nbundles):
+        btype = types[bi % len(types)]
+        if btype == 'ACOLITE':
+            bundle = '{}/SYNTHETIC_{}_L1R.nc'.format(output, str(bi).zfill(4))
+            with contextlib.redirect_stdout(io.StringIO()):
+                ac.benchmark.synthetic_l1r(bundle, dims = (8, 8), seed = seed + bi)
+        else:
+            bundle = '{}/{}_{}'.format(output, btype.replace('-', ''), str(bi).zfill(4))
+            os.makedirs(bundle)
+            if btype == 'Landsat':
+                bn = 'LC08_L1TP_{}'.format(str(bi).zfill(4))
+                with open('{}/{}_MTL.txt'.format(bundle, bn), 'w', encoding = 'utf-8') as f:
+                    f.write('\n'.join(mtl).format(bn)+'\n')
+                open('{}/{}_B1.TIF'.format(bundle, bn), 'w').close()
+            elif btype == 'Sentinel-3':
+                for ds in ['Oa01_radiance', 'geo_coordinates']:
+                    with Dataset('{}/{}.nc'.format(bundle, ds), 'w') as nc:
+                        nc.setncattr('title', 'OLCI Level 1b Product')
+            else:
+                btype = None
+                for fi in range(4): open('{}/image_{}.tif'.format(bundle, fi), 'w').close()
+        bundles.append(bundle)
+        expected.append(btype)
+
+    ## identify all bundles
+    def identify(use_signatures, use_cache):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ret = [ac.acolite.identify_bundle(b, use_signatures = use_signatures, use_cache = use_cache)[0] for b in bundles]
+        return(time.perf_counter()-t0, ret)
+
+    results = {'nbundles': nbundles, 'types': types, 'timings': {}}
+    for key, use_signatures, use_cache in [('probes', False, False), ('signatures', True, False),
+                                           ('cache_fill', True, True), ('cached', True, True)]:
+        dt, ret = identify(use_signatures, use_cache)
+        results['timings'][key] = round(dt, 4)
+        results['{}_correct'.format(key)] = sum([r == e for r, e in zip(ret, expected)])
+        print('{:>30}: {:.3f} s ({}/{} correct)'.format(key, dt, results['{}_correct'.format(key)], nbundles))
+
+    if (remove) & (not keep): shutil.rmtree(output)
+    return(results)
@@ -0,0 +1,65 @@
+## def nc_subwindow
+## benchmark of sub-window read latency from NetCDF files written by ac.output.nc_write
+## compares contiguous, 10x10 tile and chunk_bytes derived layouts, with and without compression
+## output defaults to a new temporary directory, which is removed unless keep is set
+## a given output directory is only removed if it was created here
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) only remove output directories created by the benchmark
+
+def nc_subwindow(dims = (5000, 5000), nbands = 4, window = (256, 256), nwindows = 50,
+                 chunk_bytes = [262144, 1048576, 4194304], compression_level = 4,
+                 output = None, keep = False, seed = 0):
+    import os, time, shutil, tempfile
+    from math import ceil
+    import numpy as np
+    import acolite as ac
+
+    if output is None:
+        output = tempfile.mkdtemp(prefix='acolite_benchmark_nc_subwindow_')
+        remove = True
+    else:
+        remove = not os.path.exists(output)
+        if remove: os.makedirs(output)
+
+    rng = np.random.default_rng(seed)
+    ## smooth synthetic reflectance so compression is representative
+    yy, xx = np.mgrid[0:dims[0], 0:dims[1]]
+    data = [(0.05+0.02*np.sin(xx/(50.+bi))*np.cos(yy/(70.+bi))+\
+             rng.normal(0, 0.002, dims)).astype(np.float32) for bi in range(nbands)]
+    yy, xx = None, None
+
+    ## layouts as keyword arguments to nc_write
+    layouts = {'contiguous': {'chunking': False}}
+    layouts['tiles'] = {'chunksizes': (ceil(dims[0]/10), ceil(dims[1]/10))}
+    for cb in chunk_bytes: layouts['bytes_{}'.format(cb)] = {'chunk_bytes': cb}
+
+    ## random window offsets
+    offsets = [(rng.integers(0, dims[1]-window[1]), rng.integers(0, dims[0]-window[0])) for i in range(nwindows)]
+
+    results = {}
+    for layout in layouts:
+        for compression in [False, True]:
+            if (layout == 'contiguous') & (compression): continue
+            key = '{}{}'.format(layout, '_compressed' if compression else '')
+            ofile = '{}/{}.nc'.format(output, key)
+
+            t0 = time.time()
+            for bi in range(nbands):
+                ac.output.nc_write(ofile, 'rhot_{}'.format(bi), data[bi], new=bi==0,
+                                   netcdf_compression=compression, netcdf_compression_level=compression_level,
+                                   **layouts[layout])
+            twrite = time.time()-t0
+
+            t0 = time.time()
+            for xoff, yoff in offsets:
+                for bi in range(nbands):
+                    sub = ac.shared.nc_data(ofile, 'rhot_{}'.format(bi), sub=[xoff, yoff, window[1], window[0]])
+            tread = time.time()-t0
+
+            results[key] = {'write': twrite, 'read': tread/(nwindows*nbands), 'size': os.path.getsize(ofile)}
+            print('{:>30}: write {:.2f}s, sub-window read {:.1f}ms, {:.1f} MB'.format(key, twrite,
+                                        results[key]['read']*1000, results[key]['size']/1e6))
+
+    if (remove) & (not keep): shutil.rmtree(output)
+    return(results)
@@ -0,0 +1,67 @@
+## def olci_smile_tpg
+## benchmark of the OLCI tie point grid interpolation and smile correction on synthetic frames
+## compares the interp2d and per band reference implementations with the bilinear and vectorized versions
+## the default dims are half an EFR frame in each dimension, a full frame (4091, 4865) needs about 5 GB of memory
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) copy the radiance data once for the reference, smaller default dims,
+##                               smile difference relative to the mean band radiance
+
+def olci_smile_tpg(dims = (2046, 2433), tpg_dims = (33, 39), ndetectors = 3700,
+                   ntpg = 10, block_rows = 256, seed = 0):
+    import time
+    import numpy as np
+    import acolite as ac
+
+    rng = np.random.default_rng(seed)
+    bands_data = ac.sentinel3.olci_band_info()
+    nbands = len(bands_data)
+    results = {}
+
+    ## tie point grids
+    tpx = np.linspace(0, dims[1]-1, tpg_dims[1])
+    tpy = np.linspace(0, dims[0]-1, tpg_dims[0])
+    subx = np.arange(0, dims[1])+0.5
+    suby = np.arange(0, dims[0])+0.5
+    tpgs = [rng.uniform(0, 90, tpg_dims) for i in range(ntpg)]
+
+    out = {}
+    for method in ['interp2d', 'bilinear']:
+        t0 = time.time()
+        out[method] = [ac.sentinel3.tpg_interp(z, tpx, tpy, subx, suby, method=method) for z in tpgs]
+        results['tpg_{}'.format(method)] = time.time()-t0
+        print('TPG interpolation {}: {:.2f}s for {} grids'.format(method, results['tpg_{}'.format(method)], ntpg))
+    results['tpg_max_difference'] = max([np.nanmax(np.abs(out['interp2d'][i]-out['bilinear'][i])) for i in range(ntpg)])
+    print('TPG interpolation maximum difference: {:.2e}'.format(results['tpg_max_difference']))
+    out = None
+
+    ## radiance data and instrument data
+    instrument_data = {'solar_flux': rng.uniform(1000, 2000, (nbands, ndetectors)).astype(np.float32),
+                       'lambda0': (np.asarray([bands_data[b]['wavelength'] for b in bands_data])[:, None]+\
+                                   rng.normal(0, 0.5, (nbands, ndetectors))).astype(np.float32)}
+    di = rng.integers(0, ndetectors, dims).astype(np.int16)
+    tt_gas = {b: rng.uniform(0.9, 1.0) for b in bands_data}
+    data = {'{}_radiance'.format(b): np.ma.masked_array(rng.uniform(10, 100, dims).astype(np.float32),
+                                                         mask=np.zeros(dims, dtype=bool)) for b in bands_data}
+
+    ## the reference is run on a copy of the radiance arrays, the vectorized version in place
+    corrected = {}
+    for method in ['per_band', 'vectorized']:
+        if method == 'per_band':
+            data_ = {d: data[d].copy() for d in data}
+        else:
+            data_ = data
+        t0 = time.time()
+        ac.sentinel3.smile_correction(data_, bands_data, instrument_data, di, tt_gas, 'Oa',
+                                      method=method, block_rows=block_rows)
+        results['smile_{}'.format(method)] = time.time()-t0
+        print('Smile correction {}: {:.2f}s for {} bands'.format(method, results['smile_{}'.format(method)], nbands))
+        corrected[method] = data_
+        data_ = None
+
+    ## maximum difference between implementations, relative to the mean band radiance
+    ## as the per pixel relative difference is dominated by float32 rounding where the corrected radiance is close to 0
+    results['smile_max_relative_difference'] = max([np.nanmax(np.abs(corrected['vectorized'][d]-corrected['per_band'][d]))/\
+                                                    np.nanmean(np.abs(corrected['per_band'][d])) for d in corrected['per_band']])
+    print('Smile correction maximum relative difference: {:.2e}'.format(results['smile_max_relative_difference']))
+    return(results)
@@ -0,0 +1,86 @@
+## def point_extract
+## benchmark of point extraction from a synthetic ACOLITE NetCDF file
+## compares nc_extract_point per point with nc_extract_points for all points at once
+## and checks that the kdtree and projection methods give the same pixels as nc_extract_point
+## for a synthetic UTM scene with lon, lat at the pixel corners and at the pixel centres
+## output defaults to a new temporary directory, which is removed unless keep is set
+## a given output directory is only removed if it was created here
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) only remove output directories created by the benchmark
+##                2026-10-19 (QV) added projection method check
+
+def point_extract(dims = (2000, 2000), nbands = 10, npoints = 200, box_size = 3,
+                  output = None, keep = False, seed = 0):
+    import os, time, shutil, tempfile
+    import numpy as np
+    import acolite as ac
+
+    if output is None:
+        output = tempfile.mkdtemp(prefix='acolite_benchmark_point_extract_')
+        remove = True
+    else:
+        remove = not os.path.exists(output)
+        if remove: os.makedirs(output)
+
+    ## synthetic unprojected scene with slightly rotated lat/lon
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:dims[0], 0:dims[1]]
+    lon = 3.0 + xx * 0.0002 + yy * 0.00002
+    lat = 51.5 - yy * 0.0002 + xx * 0.00002
+    yy, xx = None, None
+
+    ofile = '{}/point_extract_L2W.nc'.format(output)
+    ac.output.nc_write(ofile, 'lon', lon.astype(np.float32), new=True, attributes={'sensor': 'synthetic'})
+    ac.output.nc_write(ofile, 'lat', lat.astype(np.float32))
+    for bi in range(nbands):
+        ac.output.nc_write(ofile, 'Rrs_{}'.format(400+bi*50), rng.uniform(0, 0.02, dims).astype(np.float32))
+
+    ## random points inside the scene
+    pi = rng.integers(box_size, dims[0]-box_size-1, npoints)
+    pj = rng.integers(box_size, dims[1]-box_size-1, npoints)
+    st_lon, st_lat = lon[pi, pj], lat[pi, pj]
+
+    results = {}
+    t0 = time.time()
+    ref = [ac.shared.nc_extract_point(ofile, st_lon[p], st_lat[p], extract_datasets=['Rrs'], box_size=box_size) for p in range(npoints)]
+    results['nc_extract_point'] = npoints/(time.time()-t0)
+
+    ## first call builds the index, second call uses the cached index
+    for key in ['nc_extract_points', 'nc_extract_points_cached']:
+        t0 = time.time()
+        ret = ac.shared.nc_extract_points(ofile, st_lon, st_lat, extract_datasets=['Rrs'], box_size=box_size)
+        results[key] = npoints/(time.time()-t0)
+
+    for key in results: print('{:>30}: {:.1f} points/s'.format(key, results[key]))
+    results['identical'] = all([all([np.array_equal(ref[p]['data'][ds], ret[p]['data'][ds]) for ds in ref[p]['data']]) for p in range(npoints)])
+    print('Identical results: {}'.format(results['identical']))
+
+    ## synthetic UTM scene, with lon, lat at the pixel corners or centres
+    from pyproj import Proj
+    pdims = (min(dims[0], 500), min(dims[1], 500))
+    proj4_string = '+proj=utm +zone=31 +ellps=WGS84 +datum=WGS84 +units=m +no_defs'
+    dct = {'p': Proj(proj4_string), 'pixel_size': [30., -30.], 'ydim': pdims[0], 'xdim': pdims[1],
+           'xrange': [500000., 500000.+30.*pdims[1]], 'yrange': [5700000., 5700000.-30.*pdims[0]]}
+    gatts = {'sensor': 'synthetic', 'proj4_string': proj4_string, 'xrange': dct['xrange'],
+             'yrange': dct['yrange'], 'pixel_size': dct['pixel_size']}
+    ## random points in the scene, away from the edges
+    plon, plat = dct['p'](rng.uniform(dct['xrange'][0]+90, dct['xrange'][1]-90, npoints),
+                          rng.uniform(dct['yrange'][1]+90, dct['yrange'][0]-90, npoints), inverse=True)
+    for add_half_pixel in [False, True]:
+        pfile = '{}/point_extract_projected_{}_L2W.nc'.format(output, 'centre' if add_half_pixel else 'corner')
+        lon, lat = ac.shared.projection_geo(dct, add_half_pixel=add_half_pixel)
+        ac.output.nc_write(pfile, 'lon', lon, new=True, attributes=gatts, double=True)
+        ac.output.nc_write(pfile, 'lat', lat, double=True)
+        ac.output.nc_write(pfile, 'Rrs_560', rng.uniform(0, 0.02, pdims).astype(np.float32))
+        lon, lat = None, None
+        pref = [ac.shared.nc_extract_point(pfile, plon[p], plat[p], extract_datasets=['Rrs'])['data']['Rrs_560'] for p in range(npoints)]
+        for method in ['kdtree', 'projection']:
+            ret = ac.shared.nc_extract_points(pfile, plon, plat, extract_datasets=['Rrs'],
+                                              method=method, add_half_pixel=add_half_pixel)
+            key = '{}_{}_mismatches'.format(method, 'centre' if add_half_pixel else 'corner')
+            results[key] = int(sum([not np.array_equal(pref[p], ret[p]['data']['Rrs_560']) for p in range(npoints)]))
+            print('{:>30}: {}/{} points'.format(key, results[key], npoints))
+
+    if (remove) & (not keep): shutil.rmtree(output)
+    return(results)
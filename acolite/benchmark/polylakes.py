@@ -0,0 +1,73 @@
+## def polylakes
+## benchmark of lake polygon selection for a scene in a lake dense region
+## compares rasterising from the full shapefile with the spatially filtered shapefile and indexed GeoPackage
+## output defaults to a new temporary directory, which is removed unless keep is set
+## a given output directory is only removed if it was created here
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) only remove output directories created by the benchmark
+##                2026-10-19 (QV) write the GeoPackage index to the benchmark output directory
+
+def polylakes(npolygons = 200000, dense_fraction = 0.2, dense_region = [60., 25., 62., 29.],
+              scene_dims = (2000, 2000), pixel_size = 0.001, output = None, keep = False, seed = 0):
+    import os, time, shutil, tempfile
+    import numpy as np
+    import acolite as ac
+    from osgeo import ogr, osr
+
+    if output is None:
+        output = tempfile.mkdtemp(prefix='acolite_benchmark_polylakes_')
+        remove = True
+    else:
+        remove = not os.path.exists(output)
+        if remove: os.makedirs(output)
+
+    ## synthetic lakes, a fraction in the dense region [S, W, N, E] and the rest globally
+    rng = np.random.default_rng(seed)
+    ndense = int(npolygons * dense_fraction)
+    lat = np.concatenate((rng.uniform(dense_region[0], dense_region[2], ndense), rng.uniform(-60, 75, npolygons-ndense)))
+    lon = np.concatenate((rng.uniform(dense_region[1], dense_region[3], ndense), rng.uniform(-180, 180, npolygons-ndense)))
+    radius = rng.uniform(0.0005, 0.01, npolygons)
+
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    shp = '{}/lakes.shp'.format(output)
+    t0 = time.time()
+    ds = ogr.GetDriverByName('ESRI Shapefile').CreateDataSource(shp)
+    lyr = ds.CreateLayer('lakes', srs, ogr.wkbPolygon)
+    defn = lyr.GetLayerDefn()
+    for i in range(npolygons):
+        feat = ogr.Feature(defn)
+        feat.SetGeometry(ogr.CreateGeometryFromWkt('POINT ({} {})'.format(lon[i], lat[i])).Buffer(radius[i], 4))
+        lyr.CreateFeature(feat)
+        feat = None
+    ds = None
+    print('Wrote {} synthetic lakes in {:.1f}s'.format(npolygons, time.time()-t0))
+
+    results = {}
+    t0 = time.time()
+    gpkg = ac.shared.polygon_index(shp, output='{}/lakes.gpkg'.format(output))
+    results['index'] = time.time()-t0
+    print('Building spatial index: {:.1f}s'.format(results['index']))
+
+    ## scene in the centre of the dense region
+    yc, xc = (dense_region[0]+dense_region[2])/2, (dense_region[1]+dense_region[3])/2
+    x0, y0 = xc-scene_dims[1]*pixel_size/2, yc+scene_dims[0]*pixel_size/2
+    dct = {'xdim': scene_dims[1], 'ydim': scene_dims[0], 'pixel_size': (pixel_size, -pixel_size),
+           'xrange': [x0, x0+scene_dims[1]*pixel_size], 'yrange': [y0, y0-scene_dims[0]*pixel_size],
+           'proj4_string': srs.ExportToProj4()}
+
+    masks = {}
+    for key, poly, spatial_filter in [('shapefile', shp, False),
+                                      ('shapefile_filter', shp, True),
+                                      ('gpkg_filter', gpkg, True)]:
+        t0 = time.time()
+        masks[key] = ac.shared.polygon_crop(dct, poly, spatial_filter=spatial_filter)
+        results[key] = time.time()-t0
+        print('{:>20}: {:.2f}s, {} lake pixels'.format(key, results[key], int(np.sum(masks[key]))))
+
+    results['identical'] = all([np.array_equal(masks['shapefile'], masks[k]) for k in masks])
+    print('Identical masks: {}'.format(results['identical']))
+
+    if (remove) & (not keep): shutil.rmtree(output)
+    return(results)
@@ -0,0 +1,143 @@
+## def processing_chain
+## offline benchmark of the processing chain on a synthetic L1R scene and synthetic LUT fixtures
+## times acolite_l2r for the given dsf_aot_estimate modes, acolite_l2w for the given parameter sets,
+## GLAD adjacency correction (glad_l2r) with settings parsed as in acolite_run, in loop and array mode,
+## and the NetCDF and GeoTIFF writers (GeoTIFF only if GDAL is available)
+## each timing is the fastest of repeats, the stage metrics of the fastest run are included
+## results are written to a JSON file with the ACOLITE version (including the git commit if available),
+## the scene size and the benchmark settings, so runs on different commits can be compared
+## LUT fixtures are kept in lut_dir (default acolite_benchmark_luts in the system temporary directory) and reused
+## output defaults to a new temporary directory, which is removed unless keep is set
+## a given output directory is only removed if it was created here
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) default lut_dir, output and results_file outside the source tree
+##                2026-10-19 (QV) added glad option
+
+def processing_chain(dims = (1000, 1000), sensor = 'S2A_MSI', nbands = None,
+                     modes = ['fixed', 'tiled', 'segmented', 'resolved'],
+                     l2w_parameters = {'reflectance': ['Rrs_*', 'rhow_*'],
+                                       'chl': ['chl_oc2', 'chl_oc3', 'chl_re_mishra'],
+                                       'turbidity': ['spm_nechad2016', 'tur_nechad2016', 'tur_dogliotti2015']},
+                     glad = True, writers = True, repeats = 1, settings = None,
+                     output = None, lut_dir = None, results_file = None, keep = False,
+                     seed = 0, verbosity = 0):
+    import os, sys, time, json, shutil, datetime, tempfile
+    import numpy as np
+    import acolite as ac
+
+    if lut_dir is None: lut_dir = '{}/acolite_benchmark_luts'.format(tempfile.gettempdir())
+    if output is None:
+        output = tempfile.mkdtemp(prefix='acolite_benchmark_processing_chain_')
+        remove = True
+    else:
+        remove = not os.path.exists(output)
+        if remove: os.makedirs(output)
+
+    results = {'version': ac.version, 'date': datetime.datetime.now().isoformat(timespec='seconds'),
+               'python': sys.version.split()[0], 'numpy': np.__version__,
+               'sensor': sensor, 'dims': list(dims), 'nbands': nbands, 'repeats': repeats, 'seed': seed,
+               'timings': {}, 'stages': {}}
+    try:
+        import subprocess
+        results['commit'] = subprocess.run(['git', '-C', ac.path, 'rev-parse', 'HEAD'], capture_output=True,
+                                           text=True, timeout=10).stdout.strip()
+    except:
+        results['commit'] = None
+
+    ## run one benchmark function and keep the fastest run
+    def timed(key, fun, *args, **kwargs):
+        best, ret = None, None
+        for r in range(repeats):
+            ac.acolite.logging.metrics_start()
+            t0 = time.perf_counter()
+            ret = fun(*args, **kwargs)
+            dt = time.perf_counter()-t0
+            metrics = ac.acolite.logging.metrics_stop()
+            if (best is None) or (dt < best):
+                best = dt
+                results['stages'][key] = {s['stage']: round(s['wall'], 4) for s in metrics['stages']}
+        results['timings'][key] = round(best, 4)
+        print('{:>30}: {:.2f} s'.format(key, best))
+        return(ret)
+
+    lut_dir_ = ac.config['lut_dir']
+    try:
+        ## LUT fixtures
+        t0 = time.perf_counter()
+        ac.benchmark.synthetic_luts(lut_dir, sensor = sensor)
+        results['fixtures'] = round(time.perf_counter()-t0, 4)
+        ac.config['lut_dir'] = lut_dir
+
+        ## synthetic scene
+        l1r = '{}/SYNTHETIC_{}_{}x{}_L1R.nc'.format(output, sensor, dims[0], dims[1])
+        ac.benchmark.synthetic_l1r(l1r, dims = dims, sensor = sensor, nbands = nbands, seed = seed)
+
+        setb = {'ancillary_data': False, 'dem_pressure': False, 'blackfill_skip': False,
+                'l2r_export_geotiff': False, 'l2w_export_geotiff': False,
+                'rgb_rhot': False, 'rgb_rhos': False, 'map_l2w': False,
+                'dsf_tile_dimensions': [max(1, dims[0]//4), max(1, dims[1]//4)],
+                'verbosity': verbosity}
+        if settings is not None:
+            for k in settings: setb[k] = settings[k]
+
+        ## atmospheric correction
+        l2r = None
+        for mode in modes:
+            odir = '{}/l2r_{}'.format(output, mode)
+            setu = {k: setb[k] for k in setb}
+            setu['output'] = odir
+            setu['dsf_aot_estimate'] = mode
+            setu['resolved_geometry'] = mode == 'resolved'
+            ret = timed('l2r_{}'.format(mode), ac.acolite.acolite_l2r, l1r, settings = setu, verbosity = verbosity)
+            if (mode == modes[0]) & (len(ret) == 2): l2r = ret[0]
+
+        ## parameter computation
+        if l2r is not None:
+            for key in l2w_parameters:
+                setu = {k: setb[k] for k in setb}
+                setu['output'] = '{}/l2w_{}'.format(output, key)
+                setu['l2w_parameters'] = l2w_parameters[key]
+                timed('l2w_{}'.format(key), ac.acolite.acolite_l2w, l2r, settings = setu, verbosity = verbosity)
+
+        ## adjacency correction, with settings parsed as in acolite_run
+        if (l2r is not None) & (glad):
+            for glad_array in [False, True]:
+                key = 'glad_{}'.format('array' if glad_array else 'loop')
+                setu = ac.acolite.settings.parse(sensor, settings = setb)
+                setu['glad_array'] = glad_array
+                timed(key, ac.adjacency.glad.glad_l2r, l2r, output = '{}/{}'.format(output, key),
+                      settings = setu, verbosity = verbosity)
+
+        ## writers
+        if writers:
+            rng = np.random.default_rng(seed)
+            data = [rng.uniform(0, 0.1, dims).astype(np.float32) for bi in range(4)]
+            ofile = '{}/writers/nc_write.nc'.format(output)
+            def nc_write():
+                for bi in range(len(data)):
+                    ac.output.nc_write(ofile, 'rhos_{}'.format(bi), data[bi], new = bi == 0)
+            timed('nc_write', nc_write)
+
+            try:
+                from osgeo import gdal
+            except ImportError:
+                gdal = None
+                print('{:>30}: GDAL not available'.format('nc_to_geotiff'))
+            if (gdal is not None) & (l2r is not None):
+                timed('nc_to_geotiff', ac.output.nc_to_geotiff, l2r)
+    finally:
+        ac.config['lut_dir'] = lut_dir_
+
+    ## write results
+    if results_file is None:
+        results_file = '{}/acolite_benchmark_processing_chain_{}_{}.json'.format(tempfile.gettempdir(),
+                                                                       datetime.datetime.now().strftime('%Y%m%d_%H%M%S'),
+                                                                       results['commit'][0:8] if results['commit'] else 'nogit')
+    with open(results_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1)
+    print('Wrote {}'.format(results_file))
+    results['results_file'] = results_file
+
+    if (remove) & (not keep): shutil.rmtree(output)
+    return(results)
@@ -0,0 +1,43 @@
+## def rsr_convolute
+## benchmark of resampling a synthetic hyperspectral LUT to gaussian sensor bands
+## compares per band rsr_convolute_nd with the sparse band weight matrix
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) separate result keys for filling and using the cache
+
+def rsr_convolute(lut_dims = (5, 6, 6, 8, 10), nbands = 230, wave_range = (0.35, 2.45), wave_step = 0.001,
+                  band_range = (400, 2400), fwhm = 10, axis = 1, seed = 0):
+    import time
+    import numpy as np
+    import acolite as ac
+
+    rng = np.random.default_rng(seed)
+    results = {}
+
+    ## synthetic lut with the wavelength dimension at axis
+    wave = np.arange(wave_range[0], wave_range[1]+wave_step/2, wave_step)
+    dims = list(lut_dims)
+    dims.insert(axis, len(wave))
+    lut = rng.uniform(0, 0.2, dims)
+
+    waves = np.linspace(band_range[0], band_range[1], nbands)
+    widths = np.zeros(nbands)+fwhm
+    rsr = ac.shared.rsr_hyper(waves, widths)
+
+    t0 = time.time()
+    ref = np.stack([ac.shared.rsr_convolute_nd(lut, wave, rsr[b]['response'], rsr[b]['wave'], axis=axis) for b in rsr], axis=axis)
+    results['rsr_convolute_nd'] = time.time()-t0
+    print('Per band rsr_convolute_nd: {:.2f}s for {} bands'.format(results['rsr_convolute_nd'], nbands))
+
+    ## without cache, filling the cache, and from the cache
+    for case, cache in [('nocache', False), ('cache_fill', True), ('cached', True)]:
+        t0 = time.time()
+        rsrm = ac.shared.rsr_hyper_matrix(wave, waves, widths, cache=cache)
+        res = ac.shared.rsr_convolute_matrix(lut, rsrm, axis=axis)
+        key = 'rsr_convolute_matrix_{}'.format(case)
+        results[key] = time.time()-t0
+        print('Sparse band weight matrix ({}): {:.2f}s for {} bands'.format(case, results[key], nbands))
+
+        results['{}_max_relative_difference'.format(key)] = np.nanmax(np.abs(res-ref)/np.abs(ref))
+        print('Maximum relative difference: {:.2e}'.format(results['{}_max_relative_difference'.format(key)]))
+    return(results)
@@ -0,0 +1,48 @@
+## def synthetic_gee
+## writes a synthetic Sentinel-2 image for the local Earth Engine client (acolite.gee.local)
+## DN values are a smooth water/land scene with path reflectance, scaled as Sentinel-2 L1C with processing baseline 4
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+def synthetic_gee(path, dims = (1500, 1500), sensor = 'S2A_MSI', isodate = '2022-06-21T10:30:31',
+                  tile = '31UES', crs = 'EPSG:32631', transform = [10., 0., 500000., 0., -10., 5700000.],
+                  sza = 35., vza = 5., saa = 150., vaa = 100., seed = 0):
+    import os, dateutil.parser, datetime
+    import numpy as np
+    import acolite as ac
+    from acolite.gee import local
+
+    dt = dateutil.parser.parse(isodate).replace(tzinfo=datetime.timezone.utc)
+    rsrd = ac.shared.rsr_dict(sensor)[sensor]
+
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:dims[0], 0:dims[1]].astype(np.float32)
+    yy /= dims[0]
+    xx /= dims[1]
+    land = (xx + 0.1 * np.sin(yy * 12)) > 0.7
+
+    dtime = dt.strftime('%Y%m%dT%H%M%S')
+    pid = '{}_MSIL1C_{}_N0400_R108_T{}_{}'.format(sensor[0:3], dtime, tile, dtime)
+    properties = {'PRODUCT_ID': pid, 'GRANULE_ID': 'L1C_T{}_A036490_{}'.format(tile, dtime),
+                  'MGRS_TILE': tile, 'PROCESSING_BASELINE': '04.00', 'SPACECRAFT_NAME': 'Sentinel-{}'.format(sensor[1:3]),
+                  'MEAN_SOLAR_AZIMUTH_ANGLE': saa, 'MEAN_SOLAR_ZENITH_ANGLE': sza,
+                  'system:time_start': int(dt.timestamp() * 1000)}
+
+    bands = {}
+    for b in rsrd['rsr_bands']:
+        bname = 'B{}'.format(b)
+        wave = rsrd['wave_mu'][b]
+        path_rho = 0.01 + 0.04 * (wave / 0.44) ** -2.5
+        rho_w = 0.02 * np.exp(-((wave - 0.56) / 0.08) ** 2) + 0.002 * (wave < 0.75)
+        rho_l = 0.04 + 0.3 / (1 + np.exp(-(wave - 0.72) / 0.02))
+        rhot = path_rho + np.where(land, rho_l, rho_w) + rng.normal(0, 0.0005, dims)
+        bands[bname] = np.round(rhot * 10000 + 1000).astype(np.float32)
+        properties['MEAN_INCIDENCE_AZIMUTH_ANGLE_{}'.format(bname)] = vaa
+        properties['MEAN_INCIDENCE_ZENITH_ANGLE_{}'.format(bname)] = vza
+    bands['QA60'] = np.zeros(dims, dtype=np.float32)
+
+    file = '{}/{}.npz'.format(path, pid)
+    local.write_image(file, bands, properties, crs, transform, 'COPERNICUS/S2',
+                      'COPERNICUS/S2/{}_{}_T{}'.format(dtime, dtime, tile))
+    return(file)
@@ -0,0 +1,60 @@
+## def synthetic_l1r
+## writes a synthetic L1R NetCDF file for offline benchmarking, with the attributes and datasets of converted scenes
+## rhot is a smooth water/land scene with path reflectance increasing towards the blue, for all bands in the sensor RSR
+## (or the first nbands), with per pixel geometry and lat/lon
+## a blackfill strip (NaN) splits the scene in two segments for segmented processing
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+def synthetic_l1r(ofile, dims = (1000, 1000), sensor = 'S2A_MSI', nbands = None,
+                  isodate = '2022-06-21T10:30:00', sza = 35., vza = 5., saa = 150., vaa = 100.,
+                  lon = 3.0, lat = 51.5, pixel_size = 10., seed = 0):
+    import os
+    import numpy as np
+    import acolite as ac
+
+    rsrd = ac.shared.rsr_dict(sensor)[sensor]
+    bands = rsrd['rsr_bands'] if nbands is None else rsrd['rsr_bands'][0:nbands]
+
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:dims[0], 0:dims[1]].astype(np.float32)
+    yy /= dims[0]
+    xx /= dims[1]
+
+    ## water on the left, land on the right
+    land = (xx + 0.1 * np.sin(yy * 12)) > 0.7
+    blackfill = np.abs(yy - 0.5) < max(2/dims[0], 0.01)
+
+    ## geometry varying over the scene
+    geom = {'sza': sza + 1.0 * (yy - 0.5), 'vza': vza + 6.0 * (xx - 0.5),
+            'saa': saa + 0.5 * (xx - 0.5), 'vaa': vaa + 0.2 * (yy - 0.5)}
+    raa = np.abs(geom['saa'] - geom['vaa'])
+    geom['raa'] = np.where(raa > 180, 360 - raa, raa)
+
+    gatts = {'sensor': sensor, 'isodate': isodate, 'acolite_file_type': 'L1R',
+             'oname': os.path.basename(ofile).replace('_L1R.nc', ''),
+             'sza': sza, 'vza': vza, 'raa': float(np.nanmean(geom['raa'])), 'saa': saa, 'vaa': vaa,
+             'pixel_size': [pixel_size, -pixel_size], 'synthetic': 'True'}
+
+    gemo = ac.gem.gem(ofile, new=True)
+    gemo.gatts = gatts
+    gemo.write('lon', (lon + xx * dims[1] * pixel_size / 70000.).astype(np.float32))
+    gemo.new = False
+    gemo.write('lat', (lat - yy * dims[0] * pixel_size / 111000.).astype(np.float32))
+    for k in ['sza', 'vza', 'raa']:
+        gemo.write(k, geom[k].astype(np.float32))
+
+    for b in bands:
+        wave = rsrd['wave_mu'][b]
+        ## path reflectance, water and vegetation surface
+        path = 0.01 + 0.04 * (wave / 0.44) ** -2.5
+        rho_w = 0.02 * np.exp(-((wave - 0.56) / 0.08) ** 2) + 0.002 * (wave < 0.75)
+        rho_l = 0.04 + 0.3 / (1 + np.exp(-(wave - 0.72) / 0.02))
+        rhot = path + np.where(land, rho_l, rho_w + 0.01 * np.sin(xx * 20) * np.cos(yy * 15) ** 2 * (wave < 0.75))
+        rhot = (rhot + rng.normal(0, 0.0005, dims)).astype(np.float32)
+        rhot[blackfill] = np.nan
+        ds_att = {'wavelength': rsrd['wave_nm'][b], 'band_name': b}
+        gemo.write('rhot_{}'.format(rsrd['wave_name'][b]), rhot, ds_att = ds_att)
+
+    return(ofile)
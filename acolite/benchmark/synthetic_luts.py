@@ -0,0 +1,119 @@
+## def synthetic_luts
+## writes small synthetic LUT fixtures for offline benchmarking of the processing chain
+## the LUTs use the file names and formats of the ACOLITE LUTs, but simple analytical Rayleigh and aerosol models
+## generic aerosol LUTs (per model and pressure), sky reflectance LUTs, gas and water vapour transmittance LUTs
+## are written to lut_dir, and then resampled to the sensor (and reverse LUTs made) without remote retrieval
+## lut_dir should be a scratch directory, set as ac.config['lut_dir'] when running with these LUTs
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) restore ac.config['lut_dir'] on errors
+
+def synthetic_luts(lut_dir, sensor = 'S2A_MSI',
+                   base_luts = ['ACOLITE-LUT-202110-MOD1', 'ACOLITE-LUT-202110-MOD2'],
+                   pressures = [500, 750, 1013, 1100],
+                   rsky_lut = 'ACOLITE-RSKY-202102-82W',
+                   reverse_pars = ['romix'], override = False):
+    import os
+    import numpy as np
+    import acolite as ac
+
+    lut_dir_ = ac.config['lut_dir']
+    ac.config['lut_dir'] = lut_dir
+    try:
+        ## LUT grids
+        wave = np.array([0.39, 0.41, 0.44, 0.47, 0.51, 0.55, 0.61, 0.67, 0.75, 0.865,
+                         1.04, 1.24, 1.55, 1.65, 2.01, 2.11, 2.2, 2.4])
+        azi = np.array([0., 30., 60., 90., 120., 150., 180.])
+        thv = np.array([0., 4., 8., 12., 16., 24., 40., 60.])
+        ths = np.array([0., 10., 20., 30., 40., 50., 60., 70., 80.])
+        tau = np.array([0.001, 0.01, 0.02, 0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 0.7, 1.0, 1.3, 1.6, 2.0, 3.0, 5.0])
+        wind = np.array([0.1, 2., 5., 10., 15., 20.])
+        par = ['utott', 'dtott', 'astot', 'ttot', 'romix', 'rsurf']
+
+        ## geometry and optical thickness on the LUT grid (wave, azi, thv, ths, tau)
+        w, a, v, s, t = np.meshgrid(wave, azi, thv, ths, tau, indexing='ij')
+        mu0, muv = np.cos(np.radians(s)), np.cos(np.radians(v))
+        phase = 1 + 0.1 * np.cos(np.radians(a))
+
+        ## aerosol and rsky models
+        for lut in base_luts:
+            model = int(lut[-1])
+            alpha = 1.5 if model == 1 else 0.5
+            taua = t * (w / 0.55) ** -alpha
+
+            for pr in pressures:
+                lutid = '{}-{}mb'.format(lut, '{}'.format(pr).zfill(4))
+                lutnc = '{}/{}/{}.nc'.format(lut_dir, '-'.join(lutid.split('-')[0:3]), lutid)
+                if (os.path.exists(lutnc)) & (not override): continue
+                if not os.path.exists(os.path.dirname(lutnc)): os.makedirs(os.path.dirname(lutnc))
+
+                taur = 0.0088 * w ** -4.05 * pr / 1013.25
+                ttot = taur + taua
+                data = {'utott': np.exp(-(0.5 * taur + 0.15 * taua) / muv),
+                        'dtott': np.exp(-(0.5 * taur + 0.15 * taua) / mu0),
+                        'astot': 0.2 * ttot / (1 + ttot),
+                        'ttot': ttot,
+                        'romix': (0.9 * taur + 0.2 * taua) / (4 * mu0 * muv) * phase,
+                        'rsurf': 0.02 + 0.01 * ttot / (1 + ttot)}
+                ## lut is par, wave, azi, thv, ths, wnd, tau
+                arr = np.stack([data[p] for p in par])[:, :, :, :, :, None, :]
+                meta = {'par': par, 'wave': wave, 'azi': azi, 'thv': thv, 'ths': ths, 'wnd': [2.], 'tau': tau,
+                        'base': lut, 'press': pr, 'synthetic': 'True'}
+                ac.shared.lutnc_write(lutnc, arr, meta, dims = ['par', 'wave', 'azi', 'thv', 'ths', 'wnd', 'tau'])
+
+            ## sky reflectance at the surface, flipped in azimuth as the OSOAA LUTs
+            lutnc = '{}/{}/{}-MOD{}.nc'.format(lut_dir, '-'.join(rsky_lut.split('-')[1:3]), rsky_lut, model)
+            if (not os.path.exists(lutnc)) | (override):
+                if not os.path.exists(os.path.dirname(lutnc)): os.makedirs(os.path.dirname(lutnc))
+                rsky = (0.02 + 0.01 * taua / (1 + taua))[:, :, :, :, None, :] * \
+                       (1 + 0.002 * wind[None, None, None, None, :, None])
+                rsky = np.flip(rsky, axis=1)
+                meta = {'wave': wave, 'azi': azi, 'thv': thv, 'ths': ths, 'wind': wind, 'tau': tau,
+                        'base': rsky_lut, 'synthetic': 'True'}
+                ac.shared.lutnc_write(lutnc, rsky, meta, dims = ['wave', 'azi', 'thv', 'ths', 'wind', 'tau'])
+
+        ## gas and water vapour transmittance
+        wave_h = np.linspace(0.3, 2.6, 461)
+        def band(c, wdt): return(np.exp(-0.5*((wave_h - c) / wdt) ** 2))
+
+        lutnc = '{}/Gas/Gas_202106F.nc'.format(lut_dir)
+        if (not os.path.exists(lutnc)) | (override):
+            if not os.path.exists(os.path.dirname(lutnc)): os.makedirs(os.path.dirname(lutnc))
+            gpr = np.array([500., 750., 1013., 1100.])
+            gvza, gsza = np.array([0., 20., 40., 60.]), np.array([0., 20., 40., 60., 80.])
+            gpars = ['ttdica', 'ttoxyg', 'ttniox', 'ttmeth']
+            k = {'ttdica': 0.02 * band(2.01, 0.01) + 0.01 * band(1.6, 0.01),
+                 'ttoxyg': 0.3 * band(0.761, 0.003) + 0.02 * band(0.688, 0.003),
+                 'ttniox': 0.005 * band(2.25, 0.02),
+                 'ttmeth': 0.02 * band(2.3, 0.03) + 0.01 * band(1.67, 0.01)}
+            m = 1 / np.cos(np.radians(gvza))[:, None] + 1 / np.cos(np.radians(gsza))[None, :]
+            ## lut is pressure, par, wave, vza, sza
+            arr = np.stack([np.stack([np.exp(-k[p][:, None, None] * m[None, :, :] * pr / 1013.25) for p in gpars]) for pr in gpr])
+            meta = {'par': gpars, 'pressure': gpr, 'wave': wave_h, 'vza': gvza, 'sza': gsza, 'synthetic': 'True'}
+            ac.shared.lutnc_write(lutnc, arr, meta, dims = ['pressure', 'par', 'wave', 'vza', 'sza'])
+
+        lutnc = '{}/WV/WV_201710C.nc'.format(lut_dir)
+        if (not os.path.exists(lutnc)) | (override):
+            if not os.path.exists(os.path.dirname(lutnc)): os.makedirs(os.path.dirname(lutnc))
+            wths, wthv, wwv = np.array([0., 20., 40., 60., 80.]), np.array([0., 20., 40., 60.]), np.array([0., 1., 2., 4., 8.])
+            kw = 0.05 * band(0.94, 0.02) + 0.08 * band(1.13, 0.03) + 0.5 * band(1.38, 0.04) + 0.5 * band(1.87, 0.05)
+            m = 1 / np.cos(np.radians(wths))[:, None] + 1 / np.cos(np.radians(wthv))[None, :]
+            tt = np.exp(-kw[None, None, None, :] * (m[:, :, None] * wwv[None, None, :])[:, :, :, None])
+            ## lut is ths, thv, wv, par, wave
+            arr = np.stack([1 - tt, 1 - tt, tt], axis=3)
+            meta = {'ths': wths, 'thv': wthv, 'wv': wwv, 'par': ['abs', 'abs_wv', 'tt_wv'], 'wave': wave_h, 'synthetic': 'True'}
+            ac.shared.lutnc_write(lutnc, arr, meta, dims = ['ths', 'thv', 'wv', 'par', 'wave'])
+
+        ## resample to sensor and make reverse LUTs without remote retrieval
+        if sensor is not None:
+            for lut in base_luts:
+                for pr in pressures:
+                    lutid = '{}-{}mb'.format(lut, '{}'.format(pr).zfill(4))
+                    ac.aerlut.import_lut(lutid, '{}/{}'.format(lut_dir, '-'.join(lutid.split('-')[0:3])),
+                                         sensor = sensor, get_remote = False)
+                ac.aerlut.import_rsky_lut(int(lut[-1]), lutbase = rsky_lut, sensor = sensor, get_remote = False)
+            for par in reverse_pars:
+                ac.aerlut.reverse_lut(sensor, par = par, base_luts = base_luts, rsky_lut = rsky_lut, get_remote = False)
+    finally:
+        ac.config['lut_dir'] = lut_dir_
+    return(lut_dir)
@@ -0,0 +1,79 @@
+## def warp_and_merge
+## benchmark of ac.shared.warp_and_merge on synthetic multi-tile GeoTIFF inputs
+## compares the temporary GeoTIFF pipeline with the in memory VRT pipeline
+## output defaults to a new temporary directory, which is removed unless keep is set
+## a given output directory is only removed if it was created here
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) only remove output directories created by the benchmark
+
+def warp_and_merge(ntiles = 4, tile_dims = (2000, 2000), nbands = 4,
+                   pixel_size = 2.0, epsg = 32631, x0 = 500000., y0 = 5700000.,
+                   output = None, keep = False, repeats = 1, block_rows = 512):
+    import os, time, shutil, tempfile
+    import numpy as np
+    import acolite as ac
+    from osgeo import gdal, osr
+
+    if output is None:
+        output = tempfile.mkdtemp(prefix='acolite_benchmark_warp_and_merge_')
+        remove = True
+    else:
+        remove = not os.path.exists(output)
+        if remove: os.makedirs(output)
+    tile_dir = '{}/tiles'.format(output)
+    if not os.path.exists(tile_dir): os.makedirs(tile_dir)
+
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(epsg)
+
+    ## make synthetic tiles in a row, overlapping by 10%
+    tiles = []
+    xstep = tile_dims[0] * pixel_size * 0.9
+    rng = np.random.default_rng(0)
+    for ti in range(ntiles):
+        tf = '{}/tile_{}.tif'.format(tile_dir, str(ti).zfill(3))
+        ds = gdal.GetDriverByName('GTiff').Create(tf, tile_dims[0], tile_dims[1], nbands, gdal.GDT_UInt16)
+        ds.SetGeoTransform((x0 + ti * xstep, pixel_size, 0, y0, 0, -pixel_size))
+        ds.SetProjection(srs.ExportToWkt())
+        for bi in range(nbands):
+            data = rng.integers(1, 10000, size=(tile_dims[1], tile_dims[0]), dtype=np.uint16)
+            ds.GetRasterBand(bi+1).WriteArray(data)
+        ds = None
+        tiles.append(tf)
+
+    results = {}
+    for in_memory in [False, True]:
+        mode = 'vsimem' if in_memory else 'gtiff'
+        results[mode] = {'warp_and_merge': [], 'read': []}
+        for r in range(repeats):
+            warp_dir = '{}/warped_{}'.format(output, mode)
+            if not os.path.exists(warp_dir): os.makedirs(warp_dir)
+
+            t0 = time.time()
+            ret = ac.shared.warp_and_merge(tiles, output = warp_dir, find_dem = False, in_memory = in_memory)
+            t1 = time.time()
+            merged_file = ret[0]
+
+            ## read merged output per band in row blocks
+            ds = gdal.Open(merged_file)
+            for bi in range(ds.RasterCount):
+                band = ds.GetRasterBand(bi+1)
+                for row in range(0, ds.RasterYSize, block_rows):
+                    nrows = min(block_rows, ds.RasterYSize-row)
+                    data = band.ReadAsArray(0, row, ds.RasterXSize, nrows)
+                band = None
+            ds = None
+            t2 = time.time()
+
+            results[mode]['warp_and_merge'].append(t1-t0)
+            results[mode]['read'].append(t2-t1)
+
+            if in_memory: ac.shared.vsimem_clear(os.path.dirname(merged_file))
+            shutil.rmtree(warp_dir)
+
+        print('{}: warp_and_merge {:.2f}s, read {:.2f}s (mean of {})'.format(mode,
+              np.mean(results[mode]['warp_and_merge']), np.mean(results[mode]['read']), repeats))
+
+    if (remove) & (not keep): shutil.rmtree(output)
+    return(results)
@@ -6,6 +6,8 @@
 ##                2022-01-04 (QV) added netcdf compression
 ##                2022-03-28 (QV) added masking using QL data, updated crop subsetting
 ##                2022-04-15 (QV) fixed polygon masking
+##                2026-10-19 (QV) added option to output rhot/Lt as (band, y, x) cubes
+##                2026-10-19 (QV) added polygon_cache
 
 def l1_convert(inputfile, output = None, settings = {}, verbosity = 5):
     import numpy as np
@@ -35,7 +37,7 @@ def l1_convert(inputfile, output = None, settings = {}, verbosity = 5):
     if poly is not None:
         if os.path.exists(poly):
             try:
-                limit = ac.shared.polygon_limit(poly)
+                limit = ac.shared.polygon_limit(poly, cache=setu['polygon_cache'])
                 print('Using limit from polygon envelope: {}'.format(limit))
                 clip = True
             except:
@@ -126,7 +128,7 @@ def l1_convert(inputfile, output = None, settings = {}, verbosity = 5):
 
             ## if we are clipping to a given polygon get the clip_mask here
             if clip:
-                clip_mask = ac.shared.polygon_crop(dct_prj, poly, return_sub=False)
+                clip_mask = ac.shared.polygon_crop(dct_prj, poly, return_sub=False, cache=setu['polygon_cache'])
                 clip_mask = clip_mask.astype(bool) == False
 
         ## make rsr and bands dataset
@@ -229,6 +231,10 @@ def l1_convert(inputfile, output = None, settings = {}, verbosity = 5):
                 ## mask cube data, assume any non zero is bad
                 cube[mask_cube > 0] = np.nan
 
+        ## store TOA data in cubes and write them at once
+        hyper_cube = setu['hyper_cube_output']
+        cube_rhot, cube_lt, cube_att = None, None, []
+
         ## write TOA data
         for bi, b in enumerate(bands):
             print('Computing rhot_{} for {}'.format(bands[b]['wave_name'], gatts['obase']))
@@ -252,7 +258,13 @@ def l1_convert(inputfile, output = None, settings = {}, verbosity = 5):
 
             if (clip) & (clip_mask is not None): cdata_radiance[clip_mask] = np.nan
 
-            if output_lt:
+            if hyper_cube:
+                if cube_rhot is None:
+                    cube_rhot = np.zeros((len(bands),)+cdata_radiance.shape, dtype=np.float32)
+                    if output_lt: cube_lt = np.zeros((len(bands),)+cdata_radiance.shape, dtype=np.float32)
+                cube_att.append(ds_att)
+                if output_lt: cube_lt[bi] = cdata_radiance
+            elif output_lt:
                 ## write toa radiance
                 ac.output.nc_write(ofile, 'Lt_{}'.format(bands[b]['wave_name']), cdata_radiance,
                                             attributes = gatts, dataset_attributes = ds_att, new = new,
@@ -265,6 +277,11 @@ def l1_convert(inputfile, output = None, settings = {}, verbosity = 5):
             cdata = cdata_radiance * (np.pi * gatts['se_distance'] * gatts['se_distance']) / (bands[b]['f0']/10 * mu0)
             cdata_radiance = None
 
+            if hyper_cube:
+                cube_rhot[bi] = cdata
+                cdata = None
+                continue
+
             ac.output.nc_write(ofile, 'rhot_{}'.format(bands[b]['wave_name']), cdata,\
                                             attributes = gatts, dataset_attributes = ds_att, new = new,
                                             netcdf_compression=setu['netcdf_compression'],
@@ -274,5 +291,18 @@ def l1_convert(inputfile, output = None, settings = {}, verbosity = 5):
             new = False
         cube = None
 
+        ## write TOA cubes
+        if hyper_cube:
+            cube_waves = [bands[b]['wavelength'] for b in bands]
+            for ds, cube in [('Lt', cube_lt), ('rhot', cube_rhot)]:
+                if cube is None: continue
+                print('Writing DESIS {} cube {}'.format(ds, cube.shape))
+                ac.output.nc_write(ofile, ds, cube, wavelength = cube_waves,
+                                            attributes = gatts, dataset_attributes = cube_att, new = new,
+                                            netcdf_compression=setu['netcdf_compression'],
+                                            netcdf_compression_level=setu['netcdf_compression_level'])
+                new = False
+            cube_lt, cube_rhot = None, None
+
         ofiles.append(ofile)
     return(ofiles, setu)
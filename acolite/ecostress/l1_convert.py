@@ -3,6 +3,7 @@
 ## written by Quinten Vanhellemont, RBINS
 ## 2022-08-11
 ## modifications: 2022-08-19 (QV) added ECO1BRAD support
+##                2026-10-19 (QV) added polygon_cache
 
 def l1_convert(inputfile, output=None, settings = {}, verbosity = 5):
     import os, h5py, json
@@ -25,7 +26,7 @@ def l1_convert(inputfile, output=None, settings = {}, verbosity = 5):
     if ('polygon' in setu) & (limit is None):
         poly = setu['polygon']
         if poly is not None:
-            limit = ac.shared.polygon_limit(poly)
+            limit = ac.shared.polygon_limit(poly, cache=setu['polygon_cache'])
             if setu['polygon_limit']:
                 print('Using limit from polygon envelope: {}'.format(limit))
             else:
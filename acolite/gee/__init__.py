@@ -2,3 +2,6 @@ from .agh import *
 from .agh_run import *
 from .check_task import *
 from .find_scenes import *
+from .client import *
+from .download_tiles import *
+from .tile_read import *
@@ -10,19 +10,18 @@
 ##                2022-04-15 (QV) added ancillary data
 ##                2022-05-22 (QV) added download of BT data from Landsat, added metadata copy
 ##                2022-07-18 (QV) added check for existing files & override setting
+##                2026-10-19 (QV) added pluggable Earth Engine client, parallel tile download with retries
+##                2026-10-19 (QV) evaluate LUTs for all bands, models and parameters in one call
 
 def agh(image, imColl, rsrd = {}, lutd = {}, luti = {}, settings = {}):
-    import os, dateutil.parser, requests
+    import os, dateutil.parser
     import acolite as ac
     from acolite import gee ## currently not imported in main acolite
 
     import numpy as np
-    from osgeo import gdal
-    gdal.UseExceptions()
 
-    import ee
-    #ee.Authenticate() ## assume ee use is authenticated in current environment
-    ee.Initialize()
+    ## Earth Engine client
+    ee = gee.client(settings['gee_client'], path = settings['gee_local_path'])
 
     uoz = settings['uoz_default']
     uwv = settings['uwv_default']
@@ -84,17 +83,16 @@ def agh(image, imColl, rsrd = {}, lutd = {}, luti = {}, settings = {}):
             region = ee.Geometry.BBox(limit[1], limit[0], limit[3], limit[2])
         else:
             ## determine image bounding box
-            imx = []
-            imy = []
+            ## get pixel coordinates in x/y of the corners in a single request
+            corners = []
             for ii in [[1,0], [1,2], [3,0], [3,2]]:
                 ## make point geometry
                 pt = ee.Geometry.Point([limit[ii[0]], limit[ii[1]]])
-
-                ## get pixel coordinates in x/y
                 tmp = ee.Image.clip(i.pixelCoordinates(i.select(tar_band).projection()),pt)
-                ret = ee.Image.reduceRegion(tmp, ee.Reducer.toList()).getInfo()
-                imx.append(ret['x'][0])
-                imy.append(ret['y'][0])
+                corners.append(ee.Image.reduceRegion(tmp, ee.Reducer.toList()))
+            corners = ee.List(corners).getInfo()
+            imx = [ret['x'][0] for ret in corners]
+            imy = [ret['y'][0] for ret in corners]
 
             ## use pixel coordinates from image to make new subset
             eesub = ee.List([min(imx), min(imy), max(imx), max(imy)])
@@ -281,27 +279,22 @@ def agh(image, imColl, rsrd = {}, lutd = {}, luti = {}, settings = {}):
         print('Fitting aerosol models')
         results = {}
         luts = list(lutd[sensor].keys())
-        for lut in luts:
-            taua_arr = None
-            rhot_arr = None
-            taua_bands = []
-            ## run through bands
-            for b in rsrd[sensor]['rsr_bands']:
-                if b in aot_skip_bands: continue
-                print(sensor, b, lut)
-                ret = lutd[sensor][lut]['rgi'][b]((pressure, lutd[sensor][lut]['ipd']['romix'],
-                                           geometry['raa'], geometry['vza'], geometry['sza'], lutd[sensor][lut]['meta']['tau']))
-                rhot = np.asarray([prc_data[p]['B{}'.format(b)] for p in percentiles])
-                rhot /= ttg['tt_gas'][b]
-                taua = np.interp(rhot, ret, lutd[sensor][lut]['meta']['tau'])
-                if taua_arr is None:
-                    rhot_arr = 1.0 * rhot
-                    taua_arr = 1.0 * taua
-                else:
-                    rhot_arr = np.vstack((rhot_arr, rhot))
-                    taua_arr = np.vstack((taua_arr, taua))
+        taua_bands = [b for b in rsrd[sensor]['rsr_bands'] if b not in aot_skip_bands]
+
+        ## gas corrected rhot for bands x percentiles
+        rhot_arr = np.asarray([[prc_data[p]['B{}'.format(b)] for p in percentiles] for b in taua_bands])
+        rhot_arr /= np.asarray([ttg['tt_gas'][b] for b in taua_bands])[:, None]
 
-                taua_bands.append(b)
+        ## path reflectance for all LUTs and bands at this geometry in one call
+        romix = ac.aerlut.lut_slice([lutd[sensor][lut]['rgi'][b] for lut in luts for b in taua_bands],
+                                    [pressure, lutd[sensor][luts[0]]['ipd']['romix'],
+                                     geometry['raa'], geometry['vza'], geometry['sza'], None])
+        romix = romix.reshape(len(luts), len(taua_bands), -1)
+
+        for li, lut in enumerate(luts):
+            tau = lutd[sensor][lut]['meta']['tau']
+            ## interpolate aot for all bands and percentiles
+            taua_arr = np.asarray([np.interp(rhot_arr[bi], romix[li, bi], tau) for bi in range(len(taua_bands))])
 
             ## find aot value
             bidx = np.argsort(taua_arr[:,settings['pidx']])
@@ -324,13 +317,12 @@ def agh(image, imColl, rsrd = {}, lutd = {}, luti = {}, settings = {}):
                 sel_aot = results[lut]['taua'] * 1.0
                 sel_lut = '{}'.format(lut)
 
-        ## get atmosphere parameters
+        ## get atmosphere parameters for all bands in one call
         print('Getting final atmosphere parameters')
-        am = {}
-        for par in lutd[sensor][sel_lut]['ipd']:
-            am[par] = {b: lutd[sensor][sel_lut]['rgi'][b]((pressure, lutd[sensor][sel_lut]['ipd'][par],
-                                                           geometry['raa'], geometry['vza'], geometry['sza'], sel_aot))
-                       for b in rsrd[sensor]['rsr_bands']}
+        ret = ac.aerlut.lut_slice([lutd[sensor][sel_lut]['rgi'][b] for b in rsrd[sensor]['rsr_bands']],
+                                  [pressure, None, geometry['raa'], geometry['vza'], geometry['sza'], sel_aot])
+        am = {par: {b: ret[bi, lutd[sensor][sel_lut]['ipd'][par]] for bi, b in enumerate(rsrd[sensor]['rsr_bands'])}
+              for par in lutd[sensor][sel_lut]['ipd']}
 
         print(sel_lut, sel_aot, sel_val)
 
@@ -365,7 +357,9 @@ def agh(image, imColl, rsrd = {}, lutd = {}, luti = {}, settings = {}):
             #glint = glint.multiply(glintMask)
             glint = glint.mask(glintMask)
             glint = glint.unmask(0)
-            glint_dict = {b:luti[sensor][model]['rgi'][b]((geometry['raa'], geometry['vza'], geometry['sza'], settings['glint_wind'], sel_aot)) for b in rsrd[sensor]['rsr_bands']}
+            ret = ac.aerlut.lut_slice([luti[sensor][model]['rgi'][b] for b in rsrd[sensor]['rsr_bands']],
+                                      [geometry['raa'], geometry['vza'], geometry['sza'], settings['glint_wind'], sel_aot])
+            glint_dict = {b: ret[bi] for bi, b in enumerate(rsrd[sensor]['rsr_bands'])}
             glint_spec = np.asarray([glint_dict[b] for b in glint_dict])
             glint_ave = {b: glint_dict[b]/((glint_dict[glint_bands[0]]+glint_dict[glint_bands[1]])/2) for b in glint_dict}
             i_rhos = None
@@ -477,10 +471,16 @@ def agh(image, imColl, rsrd = {}, lutd = {}, luti = {}, settings = {}):
 
     ## store data locally, with tiling if needed
     if settings['store_output_locally']:
-        ## empty list to track local files
-        rhot_files = []
-        geom_files = []
-        rhos_files = []
+        ## download url for image subset
+        def tile_url(image, bands, name, region):
+            return(lambda: image.getDownloadUrl({'name': name, 'bands': bands, 'region': region,
+                                                 'scale': output_config['scale'],
+                                                 'crs': output_config['crs'],
+                                                 'crs_transform': output_config['crs_transform'],
+                                                 'filePerBand': False}))
+
+        ## list tiles to download
+        jobs = {'rhot': [], 'geom': [], 'rhos': []}
         for ti, tile in enumerate(tiles):
             ## output file names
             ext = ''
@@ -488,7 +488,6 @@ def agh(image, imColl, rsrd = {}, lutd = {}, luti = {}, settings = {}):
             if tiled_transfer:
                 tile_id = tile[4]
                 ext+='_'+tile_id
-                print('Getting tile {} {}/{}'.format(tile_id, ti+1, num_tiles))
                 ## use pixel coordinates to make tile subset
                 mins = ee.List([origin[0]+tile[0], origin[1]+tile[2]])
                 maxs = ee.List([origin[0]+tile[1], origin[1]+tile[3]])
@@ -496,64 +495,35 @@ def agh(image, imColl, rsrd = {}, lutd = {}, luti = {}, settings = {}):
                 rect = ee.Geometry.Rectangle(mins.cat(maxs), p, True, False)#.transform("EPSG:4326")
                 output_config['region'] = rect
 
-            ## set output names for this tile
-            rhot_file_tile = pid+'_rhot'+ext
-            rhot_file_tile_local = '{}/{}.zip'.format(output,rhot_file_tile)
-            rhos_file_tile = pid+'_rhos'+ext
-            rhos_file_tile_local = '{}/{}.zip'.format(output,rhos_file_tile)
-            geom_file_tile = pid+'_geom'+ext
-            geom_file_tile_local = '{}/{}.zip'.format(output,geom_file_tile)
-
-            ## write rhot (tile)
+            ## rhot (tile)
             if settings['store_rhot']:
-                output_config['description'] = rhot_file_tile
-                url = i_rhot.getDownloadUrl({
-                        'name': output_config['description'],
-                        'bands': obands_rhot,
-                        'region': output_config['region'],
-                        'scale': output_config['scale'],
-                        'crs': output_config['crs'],
-                        'crs_transform': output_config['crs_transform'],
-                        'filePerBand': False})
-                print('Downloading {}'.format(rhot_file_tile))
-                response = requests.get(url)
-                with open(rhot_file_tile_local, 'wb') as f:
-                    f.write(response.content)
-                rhot_files.append(rhot_file_tile_local)
-
-            ## write geometry (tile)
+                name = pid+'_rhot'+ext
+                jobs['rhot'].append({'file': '{}/{}.zip'.format(output,name),
+                                     'url': tile_url(i_rhot, obands_rhot, name, output_config['region'])})
+
+            ## geometry (tile)
             if settings['store_geom'] & (i_geom is not None):
-                output_config['description'] = geom_file_tile
-                url = i_geom.getDownloadUrl({
-                    'name': output_config['description'],
-                    'bands': obands_geom,
-                    'region': output_config['region'],
-                    'scale': output_config['scale'],
-                    'crs': output_config['crs'],
-                    'crs_transform': output_config['crs_transform'],
-                    'filePerBand': False})
-                print('Downloading {}'.format(geom_file_tile))
-                response = requests.get(url)
-                with open(geom_file_tile_local, 'wb') as f:
-                    f.write(response.content)
-                geom_files.append(geom_file_tile_local)
-
-            ## write rhos (tile)
+                name = pid+'_geom'+ext
+                jobs['geom'].append({'file': '{}/{}.zip'.format(output,name),
+                                     'url': tile_url(i_geom, obands_geom, name, output_config['region'])})
+
+            ## rhos (tile)
             if settings['store_rhos'] & settings['run_hybrid_dsf']:
-                output_config['description'] = rhos_file_tile
-                url = i_rhos.getDownloadUrl({
-                    'name': output_config['description'],
-                    'bands': obands_rhos,
-                    'region': output_config['region'],
-                    'scale': output_config['scale'],
-                    'crs': output_config['crs'],
-                    'crs_transform': output_config['crs_transform'],
-                    'filePerBand': False})
-                print('Downloading {}'.format(rhos_file_tile))
-                response = requests.get(url)
-                with open(rhos_file_tile_local, 'wb') as f:
-                    f.write(response.content)
-                rhos_files.append(rhos_file_tile_local)
+                name = pid+'_rhos'+ext
+                jobs['rhos'].append({'file': '{}/{}.zip'.format(output,name),
+                                     'url': tile_url(i_rhos, obands_rhos, name, output_config['region'])})
+
+        ## download tiles in parallel
+        print('Downloading {} files with {} workers'.format(sum([len(jobs[k]) for k in jobs]), settings['download_workers']))
+        files = gee.download_tiles(jobs['rhot']+jobs['geom']+jobs['rhos'], workers = settings['download_workers'],
+                                   retries = settings['download_retries'], backoff = settings['download_backoff'],
+                                   override = settings['override'])
+        if None in files:
+            print('Could not download all tiles for {}'.format(pid))
+            return()
+        rhot_files = files[0:len(jobs['rhot'])]
+        geom_files = files[len(jobs['rhot']):len(jobs['rhot'])+len(jobs['geom'])]
+        rhos_files = files[len(jobs['rhot'])+len(jobs['geom']):]
     ## end store local files
 
     ## output to ACOLITE style NetCDF
@@ -570,56 +540,52 @@ def agh(image, imColl, rsrd = {}, lutd = {}, luti = {}, settings = {}):
         for ti, tile in enumerate(tiles):
             print(tile[4])
             rhotf = rhot_files[ti]
-            rhot_image_file = '/vsizip/{}/{}.tif'.format(rhotf, os.path.basename(os.path.splitext(rhotf)[0]))
             ## read rhot
             if os.path.exists(rhotf):
+                data, dct_ = gee.tile_read(rhotf)
                 if ti == 0:
-                    dct = ac.shared.projection_read(rhot_image_file)
+                    dct = dct_
                 else:
                     ## update dct
-                    dct_ = ac.shared.projection_read(rhot_image_file)
                     dct['yrange'] = max(dct['yrange'][0], dct_['yrange'][0]), min(dct['yrange'][1], dct_['yrange'][1])
                     dct['xrange'] = min(dct['xrange'][0], dct_['xrange'][0]), max(dct['xrange'][1], dct_['xrange'][1])
                     dct['ydim'] = int((dct['yrange'][1]-dct['yrange'][0])/dct['pixel_size'][1])
                     dct['xdim'] = int((dct['xrange'][1]-dct['xrange'][0])/dct['pixel_size'][0])
                     dct['dimensions'] = (dct['xdim'], dct['ydim'])
 
-                ds = gdal.Open(rhot_image_file)
                 if num_tiles == 1:
-                    rhot_data = ds.ReadAsArray()
+                    rhot_data = data
                 else:
-                    if rhot_data is None: rhot_data = np.zeros((ds.RasterCount, odim[1], odim[0]))+np.nan
-                    rhot_data[:, tile[2]:tile[3], tile[0]:tile[1]] = ds.ReadAsArray()
-                ds = None
+                    if rhot_data is None: rhot_data = np.zeros((data.shape[0], odim[1], odim[0]))+np.nan
+                    rhot_data[:, tile[2]:tile[3], tile[0]:tile[1]] = data
+                data = None
                 rhot_data[rhot_data==0.0] = np.nan
 
             ## read geom data
             if len(geom_files) == num_tiles:
                 geomf = geom_files[ti]
-                geom_image_file = '/vsizip/{}/{}.tif'.format(geomf, os.path.basename(os.path.splitext(geomf)[0]))
                 ## read geom
                 if os.path.exists(geomf):
-                    ds = gdal.Open(geom_image_file)
+                    data, _ = gee.tile_read(geomf, projection = False)
                     if num_tiles == 1:
-                        geom_data = ds.ReadAsArray()
+                        geom_data = data
                     else:
-                        if geom_data is None: geom_data = np.zeros((ds.RasterCount, odim[1], odim[0]))+np.nan
-                        geom_data[:, tile[2]:tile[3],tile[0]:tile[1]] = ds.ReadAsArray()
-                    ds = None
+                        if geom_data is None: geom_data = np.zeros((data.shape[0], odim[1], odim[0]))+np.nan
+                        geom_data[:, tile[2]:tile[3],tile[0]:tile[1]] = data
+                    data = None
 
             ## read rhos data
             if len(rhos_files) == num_tiles:
                 rhosf = rhos_files[ti]
-                rhos_image_file = '/vsizip/{}/{}.tif'.format(rhosf, os.path.basename(os.path.splitext(rhosf)[0]))
                 ## read rhos
                 if os.path.exists(rhosf):
-                    ds = gdal.Open(rhos_image_file)
+                    data, _ = gee.tile_read(rhosf, projection = False)
                     if num_tiles == 1:
-                        rhos_data = ds.ReadAsArray()
+                        rhos_data = data
                     else:
-                        if rhos_data is None: rhos_data = np.zeros((ds.RasterCount, odim[1], odim[0]))+np.nan
-                        rhos_data[:, tile[2]:tile[3],tile[0]:tile[1]] = ds.ReadAsArray()
-                    ds = None
+                        if rhos_data is None: rhos_data = np.zeros((data.shape[0], odim[1], odim[0]))+np.nan
+                        rhos_data[:, tile[2]:tile[3],tile[0]:tile[1]] = data
+                    data = None
                 rhos_data[rhos_data==0.0] = np.nan
 
         ## image file in zip
@@ -4,8 +4,10 @@
 ## written by Quinten Vanhellemont, RBINS
 ## 2022-04-13
 ## modifications: 2022-04-14 (QV) changed settings parsing, added option to add region name to output
+##                2026-10-19 (QV) pass Earth Engine client to find_scenes
+##                2026-10-19 (QV) added luti keyword, RSR and LUT dicts are reused for all images
 
-def agh_run(settings={}, acolite_settings=None, rsrd = {}, lutd = {}):
+def agh_run(settings={}, acolite_settings=None, rsrd = {}, lutd = {}, luti = {}):
     import acolite as ac
     from acolite import gee
     import os, time
@@ -35,7 +37,8 @@ def agh_run(settings={}, acolite_settings=None, rsrd = {}, lutd = {}):
     images, imColl = gee.find_scenes(setg['isodate_start'], isodate_end = setg['isodate_end'],
                                  day_range = setg['day_range'], sensors = setg['sensors'],
                                  filter_tiles = setg['filter_tiles'],
-                                 limit = setg['limit'], st_lat = setg['st_lat'], st_lon = setg['st_lon'])
+                                 limit = setg['limit'], st_lat = setg['st_lat'], st_lon = setg['st_lon'],
+                                 client = setg['gee_client'], client_path = setg['gee_local_path'])
 
     print('Found images ', len(images), images)
 
@@ -51,7 +54,7 @@ def agh_run(settings={}, acolite_settings=None, rsrd = {}, lutd = {}):
 
         ## get data
         t0 = time.time()
-        ret = gee.agh(image, imColl, rsrd=rsrd, lutd=lutd, settings=setg)
+        ret = gee.agh(image, imColl, rsrd=rsrd, lutd=lutd, luti=luti, settings=setg)
         t1 = time.time()
         print('AGH processing finished in {:.1f} seconds'.format(t1-t0))
 
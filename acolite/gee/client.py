@@ -0,0 +1,22 @@
+## def client
+## returns the initialised Earth Engine client used by find_scenes and agh
+## name is 'ee' for the earthengine-api, 'local' for the local file backed stand-in (acolite.gee.local),
+## or the name of another module providing the same subset of the ee API
+## keyword arguments are passed to Initialize for clients other than ee
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+def client(name = 'ee', **kwargs):
+    import importlib
+
+    if name in [None, 'ee']:
+        import ee
+        #ee.Authenticate() ## assume ee use is authenticated in current environment
+        ee.Initialize()
+        return(ee)
+
+    if name == 'local': name = 'acolite.gee.local'
+    mod = importlib.import_module(name)
+    mod.Initialize(**kwargs)
+    return(mod)
@@ -0,0 +1,71 @@
+## def download_tiles
+## downloads GEE image tiles with a bounded number of parallel workers
+## jobs is a list of dicts with 'file' the local file and 'url' the url or a function returning the url
+## (e.g. calling getDownloadUrl, so that these requests are also done by the workers)
+## failed downloads are retried with exponential backoff, data is written to a .part file that is
+## renamed when the download is complete, and partial files are resumed with a range request if the server supports it
+## existing complete files are not downloaded again unless override is set
+## file:// urls (from the local Earth Engine stand-in) are copied
+## returns list of downloaded files in the order of the jobs, None for failed downloads
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+def download_tiles(jobs, workers = 4, retries = 5, backoff = 2.0, timeout = 300,
+                   chunk_size = 1024*1024, override = False, verbosity = 1):
+    import os, time, random, shutil, zipfile
+    from urllib.parse import urlparse
+
+    ## download a single file
+    def download(job):
+        file = job['file']
+        if (os.path.exists(file)) & (not override):
+            if verbosity > 1: print('Using existing file {}'.format(file))
+            return(file)
+        part = '{}.part'.format(file)
+        odir = os.path.dirname(os.path.abspath(file))
+        if not os.path.exists(odir): os.makedirs(odir, exist_ok=True)
+
+        for attempt in range(retries+1):
+            try:
+                url = job['url']() if callable(job['url']) else job['url']
+                if verbosity > 0: print('Downloading {}'.format(os.path.basename(file)))
+                if url.startswith('file://'):
+                    shutil.copyfile(urlparse(url).path, part)
+                else:
+                    import requests
+                    ## resume partial download
+                    offset = os.path.getsize(part) if os.path.exists(part) else 0
+                    headers = {'Range': 'bytes={}-'.format(offset)} if offset > 0 else {}
+                    with requests.get(url, headers=headers, stream=True, timeout=timeout) as r:
+                        ## partial file can not be resumed
+                        if r.status_code == 416:
+                            os.remove(part)
+                            raise Exception('Range not satisfiable')
+                        r.raise_for_status()
+                        ## server ignored the range, restart the file
+                        mode = 'ab' if (offset > 0) & (r.status_code == 206) else 'wb'
+                        with open(part, mode) as f:
+                            for chunk in r.iter_content(chunk_size=chunk_size):
+                                if chunk: f.write(chunk)
+                ## GEE errors are sometimes returned as small non zip responses
+                if (file.endswith('.zip')) and (not zipfile.is_zipfile(part)):
+                    os.remove(part)
+                    raise Exception('Downloaded file is not a zip file')
+                os.replace(part, file)
+                return(file)
+            except Exception as e:
+                if attempt == retries:
+                    print('Download of {} failed after {} attempts: {}'.format(os.path.basename(file), attempt+1, e))
+                    return(None)
+                wait = backoff * (2 ** attempt) * (0.5 + random.random())
+                if verbosity > 0: print('Download of {} failed ({}), retrying in {:.1f}s'.format(os.path.basename(file), e, wait))
+                time.sleep(wait)
+
+    if (workers <= 1) or (len(jobs) <= 1):
+        return([download(job) for job in jobs])
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        files = list(executor.map(download, jobs))
+    return(files)
@@ -2,13 +2,14 @@
 ## finds L1 Landsat or Sentinel-2 scenes on GEE for a given limit ROI or lat/lon points
 ## written by Quinten Vanhellemont, RBINS
 ## 2022-04-12
+## modifications: 2026-10-19 (QV) added client and client_path keywords
 
 def find_scenes(isodate_start, isodate_end=None, day_range=1,
                 limit=None, st_lat=None, st_lon=None, filter_tiles=None,
-                sensors=['L5_TM', 'L7_ETM', 'L8_OLI', 'L9_OLI', 'S2A_MSI', 'S2B_MSI']):
-    import ee
-    #ee.Authenticate() ## assume ee use is authenticated in current environment
-    ee.Initialize()
+                sensors=['L5_TM', 'L7_ETM', 'L8_OLI', 'L9_OLI', 'S2A_MSI', 'S2B_MSI'],
+                client='ee', client_path=None):
+    from acolite import gee
+    ee = gee.client(client, path=client_path)
 
     import dateutil.parser, datetime
 
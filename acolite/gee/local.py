@@ -0,0 +1,358 @@
+## local file backed stand-in for the Earth Engine client
+## implements the subset of the ee API used by find_scenes and agh, with numpy arrays read from local files
+## so that the tiling, download and DSF steps can be tested and benchmarked without network access
+## images are stored as .npz files in config['path'] (see write_image), with bands on a single grid
+## operations are evaluated directly, masked pixels are NaN, and there is no resampling (scale is ignored)
+## downloads are written as zip files with an .npz image to config['cache'] and returned as file:// urls
+## latency (seconds) is added to each request, and failure_rate is the probability of a download url request failing
+## use through ac.gee.client('local', path=...)
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+import os, json, glob, time, random, datetime, uuid, zipfile, io
+import numpy as np
+
+config = {'path': None, 'cache': None, 'latency': 0.0, 'failure_rate': 0.0}
+
+def Initialize(path = None, cache = None, latency = None, failure_rate = None, **kwargs):
+    if path is not None: config['path'] = path
+    if cache is not None: config['cache'] = cache
+    if latency is not None: config['latency'] = float(latency)
+    if failure_rate is not None: config['failure_rate'] = float(failure_rate)
+
+def _request():
+    if config['latency'] > 0: time.sleep(config['latency'])
+
+## computed values returned by reductions and projections
+class _Info(object):
+    def __init__(self, value):
+        self.value = value
+    def getInfo(self):
+        _request()
+        return(self.value)
+
+class List(object):
+    def __init__(self, values):
+        self.values = list(values.values) if isinstance(values, List) else list(values)
+    def cat(self, other):
+        return(List(self.values + List(other).values))
+    def getInfo(self):
+        _request()
+        return([v.value if isinstance(v, _Info) else v.getInfo() if hasattr(v, 'getInfo') else v for v in self.values])
+
+class Date(object):
+    def __init__(self, date):
+        if type(date) is str:
+            import dateutil.parser
+            date = dateutil.parser.parse(date)
+        if date.tzinfo is None: date = date.replace(tzinfo=datetime.timezone.utc)
+        self.millis = date.timestamp() * 1000
+
+class Projection(object):
+    def __init__(self, crs, transform = None):
+        self.crs = crs
+        self.transform = list(transform) if transform is not None else [1., 0., 0., 0., -1., 0.]
+    def nominalScale(self):
+        return(_Info(abs(self.transform[0])))
+    def getInfo(self):
+        _request()
+        return({'type': 'Projection', 'crs': self.crs, 'transform': self.transform})
+    ## from projection coordinates (x, y) to pixel coordinates
+    def to_pixel(self, x, y):
+        return((np.asarray(x) - self.transform[2]) / self.transform[0], (np.asarray(y) - self.transform[5]) / self.transform[4])
+    def from_pixel(self, px, py):
+        return(self.transform[2] + np.asarray(px) * self.transform[0], self.transform[5] + np.asarray(py) * self.transform[4])
+    ## from lon/lat to projection coordinates and back
+    def from_lonlat(self, lon, lat):
+        if self.crs in ['EPSG:4326']: return(np.asarray(lon), np.asarray(lat))
+        from pyproj import Transformer
+        return(Transformer.from_crs('EPSG:4326', self.crs, always_xy=True).transform(lon, lat))
+    def to_lonlat(self, x, y):
+        if self.crs in ['EPSG:4326']: return(np.asarray(x), np.asarray(y))
+        from pyproj import Transformer
+        return(Transformer.from_crs(self.crs, 'EPSG:4326', always_xy=True).transform(x, y))
+
+## geometries are lon/lat points and boxes, or rectangles in pixel coordinates of a projection
+class Geometry(object):
+    def __init__(self, kind, coords, proj = None):
+        self.kind, self.coords, self.proj = kind, coords, proj
+    @staticmethod
+    def Point(coords, proj = None):
+        return(Geometry('point', List(coords).values, proj))
+    @staticmethod
+    def BBox(west, south, east, north):
+        return(Geometry('bbox', [west, south, east, north]))
+    @staticmethod
+    def Rectangle(coords, proj = None, geodesic = None, evenOdd = None):
+        return(Geometry('rectangle' if proj is not None else 'bbox', List(coords).values, proj))
+
+    ## pixel window x0, y0, x1, y1 on the given projection
+    def window(self, proj):
+        if self.kind == 'point':
+            px, py = proj.to_pixel(*proj.from_lonlat(self.coords[0], self.coords[1]))
+            x0, y0 = int(np.floor(px)), int(np.floor(py))
+            return(x0, y0, x0+1, y0+1)
+        if self.kind == 'bbox':
+            lon = [self.coords[0], self.coords[0], self.coords[2], self.coords[2]]
+            lat = [self.coords[1], self.coords[3], self.coords[1], self.coords[3]]
+            px, py = proj.to_pixel(*proj.from_lonlat(lon, lat))
+        else:
+            px, py = [self.coords[0], self.coords[2]], [self.coords[1], self.coords[3]]
+            if (self.proj.crs != proj.crs) or (self.proj.transform != proj.transform):
+                px, py = proj.to_pixel(*self.proj.from_pixel(px, py))
+        return(int(np.floor(np.min(px))), int(np.floor(np.min(py))),
+               int(np.ceil(np.max(px))), int(np.ceil(np.max(py))))
+
+class Filter(object):
+    @staticmethod
+    def eq(key, value):
+        return(('eq', key, value))
+
+class Reducer(object):
+    def __init__(self, kind, percentiles = None):
+        self.kind, self.percentiles = kind, percentiles
+    @staticmethod
+    def toList():
+        return(Reducer('toList'))
+    @staticmethod
+    def mean():
+        return(Reducer('mean'))
+    @staticmethod
+    def percentile(percentiles):
+        return(Reducer('percentile', percentiles))
+
+class Image(object):
+    def __init__(self, image = None, bands = None, proj = None, origin = None, properties = None, id = None, file = None):
+        if isinstance(image, Image):
+            bands, proj, origin, properties, id, file = image._bands, image.proj, image.origin, \
+                                                         image.properties, image.id, image.file
+        self._bands = bands
+        self.proj = proj
+        self.origin = [0, 0] if origin is None else origin
+        self.properties = {} if properties is None else properties
+        self.id = id
+        self.file = file
+
+    ## band data are read when first used
+    @property
+    def bands(self):
+        if self._bands is None:
+            with np.load(self.file) as f:
+                info = json.loads(str(f['__info__']))
+                self._bands = {b: f[b].astype(np.float64) for b in info['bands']}
+        return(self._bands)
+
+    def _new(self, bands, origin = None):
+        return(Image(bands = bands, proj = self.proj, origin = self.origin if origin is None else origin,
+                     properties = self.properties, id = self.id))
+
+    def _shape(self):
+        return(next(iter(self.bands.values())).shape)
+
+    def select(self, names):
+        if type(names) is not list: names = [names]
+        return(self._new({b: self.bands[b] for b in names}))
+
+    def addBands(self, image):
+        bands = {b: self.bands[b] for b in self.bands}
+        for b in image.bands: bands[b] = image.bands[b]
+        return(self._new(bands))
+
+    def rename(self, names):
+        if type(names) is not list: names = [names]
+        return(self._new({n: self.bands[b] for n, b in zip(names, self.bands)}))
+
+    def projection(self):
+        return(Projection(self.proj.crs, self.proj.transform))
+
+    def geometry(self):
+        ny, nx = self._shape()
+        return(Geometry('rectangle', [self.origin[0], self.origin[1], self.origin[0]+nx, self.origin[1]+ny], self.proj))
+
+    def clip(self, geometry):
+        ny, nx = self._shape()
+        x0, y0, x1, y1 = geometry.window(self.proj)
+        x0, x1 = max(x0, self.origin[0]), min(x1, self.origin[0]+nx)
+        y0, y1 = max(y0, self.origin[1]), min(y1, self.origin[1]+ny)
+        sx, sy = slice(x0-self.origin[0], max(x0, x1)-self.origin[0]), slice(y0-self.origin[1], max(y0, y1)-self.origin[1])
+        return(self._new({b: self.bands[b][sy, sx] for b in self.bands}, origin = [x0, y0]))
+
+    ## pixel coordinates of the given projection
+    def pixelCoordinates(self, proj):
+        ny, nx = self._shape()
+        px, py = np.meshgrid(np.arange(nx) + self.origin[0], np.arange(ny) + self.origin[1])
+        if (proj.crs != self.proj.crs) or (proj.transform != self.proj.transform):
+            px, py = proj.to_pixel(*self.proj.from_pixel(px, py))
+        return(self._new({'x': px.astype(np.float64), 'y': py.astype(np.float64)}))
+
+    def pixelLonLat(self):
+        ny, nx = self._shape()
+        px, py = np.meshgrid(np.arange(nx) + self.origin[0] + 0.5, np.arange(ny) + self.origin[1] + 0.5)
+        lon, lat = self.proj.to_lonlat(*self.proj.from_pixel(px, py))
+        return(self._new({'longitude': np.asarray(lon), 'latitude': np.asarray(lat)}))
+
+    def reproject(self, *args, **kwargs):
+        return(self)
+
+    def reduceRegion(self, reducer, geometry = None, scale = None, bestEffort = False, maxPixels = None, **kwargs):
+        image = self if geometry is None else self.clip(geometry)
+        ret = {}
+        for b in image.bands:
+            data = image.bands[b]
+            data = data[np.isfinite(data)]
+            if reducer.kind == 'toList':
+                ret[b] = data.tolist()
+            elif reducer.kind == 'mean':
+                ret[b] = float(np.mean(data)) if len(data) > 0 else None
+            elif reducer.kind == 'percentile':
+                for p in reducer.percentiles:
+                    ret['{}_p{}'.format(b, p)] = float(np.percentile(data, p)) if len(data) > 0 else None
+        return(_Info(ret))
+
+    ## band math, the output band names are those of the first image
+    def expression(self, expression, map = None):
+        names = {k: next(iter(map[k].bands.values())) for k in map}
+        name = next(iter(map[next(iter(map))].bands)) if len(map) > 0 else 'constant'
+        with np.errstate(divide='ignore', invalid='ignore'):
+            data = eval(expression, {'__builtins__': {}}, names)
+        return(self._new({name: data * np.ones(self._shape())}))
+
+    def _math(self, other, fun):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if isinstance(other, Image):
+                odata = list(other.bands.values())
+                return(self._new({b: fun(self.bands[b], odata[bi if len(odata) > 1 else 0])
+                                  for bi, b in enumerate(self.bands)}))
+            return(self._new({b: fun(self.bands[b], other) for b in self.bands}))
+
+    def add(self, other): return(self._math(other, np.add))
+    def subtract(self, other): return(self._math(other, np.subtract))
+    def multiply(self, other): return(self._math(other, np.multiply))
+    def divide(self, other): return(self._math(other, np.divide))
+    def gt(self, other): return(self._math(other, lambda a, b: np.where(np.isfinite(a), (a > b) * 1.0, np.nan)))
+    def lt(self, other): return(self._math(other, lambda a, b: np.where(np.isfinite(a), (a < b) * 1.0, np.nan)))
+
+    ## masks are NaN values
+    def selfMask(self):
+        return(self._new({b: np.where(self.bands[b] == 0, np.nan, self.bands[b]) for b in self.bands}))
+    def mask(self, mask):
+        return(self._math(mask, lambda a, m: np.where(np.isfinite(m) & (m != 0), a, np.nan)))
+    updateMask = mask
+    def unmask(self, value = 0):
+        return(self._new({b: np.where(np.isfinite(self.bands[b]), self.bands[b], value) for b in self.bands}))
+
+    def getInfo(self):
+        _request()
+        ny, nx = self._shape()
+        bands = [{'id': b, 'data_type': {'type': 'PixelType', 'precision': 'double'},
+                  'dimensions': [nx, ny], 'origin': list(self.origin),
+                  'crs': self.proj.crs, 'crs_transform': self.proj.transform} for b in self.bands]
+        return({'type': 'Image', 'id': self.id, 'bands': bands, 'properties': self.properties})
+
+    ## writes the requested region to a zip file and returns its file url
+    def getDownloadUrl(self, params):
+        _request()
+        if random.random() < config['failure_rate']: raise Exception('Simulated Earth Engine error')
+        image = self if params.get('bands') is None else self.select(params['bands'])
+        if params.get('region') is not None: image = image.clip(params['region'])
+        transform = list(image.proj.transform)
+        transform[2], transform[5] = image.proj.from_pixel(image.origin[0], image.origin[1])
+        transform[2], transform[5] = float(transform[2]), float(transform[5])
+        name = params.get('name', 'download')
+        cache = config['cache']
+        if cache is None:
+            import acolite as ac
+            cache = '{}/gee_local'.format(ac.config['scratch_dir'])
+        if not os.path.exists(cache): os.makedirs(cache, exist_ok=True)
+        ofile = '{}/{}_{}.zip'.format(cache, name, uuid.uuid4().hex[0:8])
+        buf = io.BytesIO()
+        np.savez(buf, data=np.asarray([image.bands[b] for b in image.bands], dtype=np.float32),
+             __info__=json.dumps({'bands': list(image.bands), 'crs': image.proj.crs, 'transform': transform}))
+        with zipfile.ZipFile(ofile, 'w') as z:
+            z.writestr('{}.npz'.format(name), buf.getvalue())
+        return('file://{}'.format(os.path.abspath(ofile)))
+
+class ImageCollection(object):
+    def __init__(self, collection = None, images = None):
+        if images is None:
+            images = []
+            for file in sorted(glob.glob('{}/*.npz'.format(config['path']))):
+                with np.load(file) as f:
+                    info = json.loads(str(f['__info__']))
+                if (collection is not None) and (info['collection'] != collection): continue
+                images.append(Image(proj = Projection(info['crs'], info['transform']),
+                                    properties = info['properties'], id = info['id'], file = file))
+        self.images = images
+
+    def filterDate(self, start, end = None):
+        start = start if isinstance(start, Date) else Date(start)
+        end = None if end is None else end if isinstance(end, Date) else Date(end)
+        return(ImageCollection(images = [im for im in self.images if (im.properties['system:time_start'] >= start.millis) and
+                                         ((end is None) or (im.properties['system:time_start'] < end.millis))]))
+
+    def filterBounds(self, geometry):
+        images = []
+        for im in self.images:
+            with np.load(im.file) as f:
+                ny, nx = f[json.loads(str(f['__info__']))['bands'][0]].shape
+            x0, y0, x1, y1 = geometry.window(im.proj)
+            if (x1 > 0) & (y1 > 0) & (x0 < nx) & (y0 < ny): images.append(im)
+        return(ImageCollection(images = images))
+
+    def filter(self, filter):
+        op, key, value = filter
+        return(ImageCollection(images = [im for im in self.images if im.properties.get(key) == value]))
+
+    def merge(self, other):
+        return(ImageCollection(images = self.images + other.images))
+
+    def first(self):
+        return(Image(self.images[0]))
+
+    def toList(self, count):
+        return(List(self.images[0:count]))
+
+    def getInfo(self):
+        _request()
+        return({'type': 'ImageCollection', 'features': [{'type': 'Image', 'id': im.id, 'properties': im.properties}
+                                                        for im in self.images]})
+
+## Google Drive exports are not available locally
+class batch(object):
+    class Export(object):
+        class image(object):
+            @staticmethod
+            def toDrive(*args, **kwargs):
+                raise NotImplementedError('Google Drive export is not available with the local Earth Engine client')
+
+## def write_image
+## writes an image for the local client
+## bands is a dict with band name and 2D arrays on the grid given by crs and transform
+## properties should include system:time_start (ms) and the metadata used by agh
+def write_image(file, bands, properties, crs, transform, collection, id):
+    odir = os.path.dirname(os.path.abspath(file))
+    if not os.path.exists(odir): os.makedirs(odir)
+    info = {'id': id, 'collection': collection, 'crs': crs, 'transform': list(transform),
+            'bands': list(bands), 'properties': properties}
+    np.savez(file, __info__=json.dumps(info), **{b: bands[b] for b in bands})
+    return(file)
+
+## def read_download
+## reads a zip file downloaded from the local client, returns data and the projection dict
+def read_download(file):
+    from pyproj import Proj
+    with zipfile.ZipFile(file, 'r') as z:
+        name = [n for n in z.namelist() if n.endswith('.npz')][0]
+        with np.load(io.BytesIO(z.read(name))) as f:
+            data = f['data']
+            info = json.loads(str(f['__info__']))
+    nb, dimy, dimx = data.shape
+    t = info['transform']
+    p = Proj(info['crs'])
+    dct = {'p': p, 'epsg': p.crs.to_epsg(), 'Wkt': p.crs.to_wkt(),
+           'xrange': (t[2], t[2]+dimx*t[0]), 'yrange': (t[5], t[5]+dimy*t[4]),
+           'xdim': dimx, 'ydim': dimy, 'proj4_string': p.crs.to_proj4(),
+           'dimensions': (dimx, dimy), 'pixel_size': (t[0], t[4])}
+    dct['projection'] = 'EPSG:{}'.format(dct['epsg'])
+    return(data, dct)
@@ -0,0 +1,26 @@
+## def tile_read
+## reads an image tile downloaded from GEE (zip file with GeoTIFF) or from the local client (zip file with npz)
+## returns the data and the projection dict if projection is True
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+def tile_read(file, projection = True):
+    import os, zipfile
+    import acolite as ac
+
+    with zipfile.ZipFile(file, 'r') as z:
+        names = z.namelist()
+    if any([n.endswith('.npz') for n in names]):
+        from acolite.gee import local
+        data, dct = local.read_download(file)
+        return(data, dct if projection else None)
+
+    from osgeo import gdal
+    gdal.UseExceptions()
+    image_file = '/vsizip/{}/{}.tif'.format(file, os.path.basename(os.path.splitext(file)[0]))
+    dct = ac.shared.projection_read(image_file) if projection else None
+    ds = gdal.Open(image_file)
+    data = ds.ReadAsArray()
+    ds = None
+    return(data, dct)
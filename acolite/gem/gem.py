@@ -4,6 +4,8 @@
 ## modifications: 2021-04-01 (QV) added some write support
 ##                2021-12-08 (QV) added nc_projection
 ##                2022-02-15 (QV) added L9/TIRS
+##                2026-10-19 (QV) added support for (band, y, x) cube datasets
+##                2026-10-19 (QV) return copies of preloaded cube bands
 
 import acolite as ac
 import os, sys
@@ -22,6 +24,8 @@ class gem(object):
             self.bands = {}
             self.verbosity = 0
             self.nc_projection = None
+            self.cube_datasets = {}
+            self.cube_mem = []
 
             self.netcdf_compression=netcdf_compression
             self.netcdf_compression_level=netcdf_compression_level
@@ -56,17 +60,43 @@ class gem(object):
 
         def datasets_read(self):
             self.datasets = ac.shared.nc_datasets(self.file)
+            ## list bands in cubes as separate datasets
+            self.cube_datasets = ac.shared.nc_cube_datasets(self.file)
+            if len(self.cube_datasets) > 0:
+                cubes = [self.cube_datasets[ds][0] for ds in self.cube_datasets]
+                self.datasets = [ds for ds in self.datasets if ds not in cubes+['wavelength']]
+                self.datasets += [ds for ds in self.cube_datasets]
+
+        def cube_read(self, cube):
+            ## read all bands of a cube with one read and store them per band
+            cdata, catt = ac.shared.nc_data(self.file, cube, attributes=True)
+            cmask = np.ma.getmaskarray(cdata)
+            cdata = cdata.data
+            if cdata.dtype in [np.dtype('float32'), np.dtype('float64')]:
+                cdata[cmask] = np.nan
+            for ds in self.cube_datasets:
+                cube_, bi = self.cube_datasets[ds]
+                if cube_ != cube: continue
+                self.data_mem[ds] = cdata[bi]
+                if ds not in self.cube_mem: self.cube_mem.append(ds)
+                self.data_att[ds] = {k: catt[k][bi] if (type(catt[k]) in [list, np.ndarray]) and (len(catt[k]) == cdata.shape[0]) else catt[k] for k in catt}
 
         def data(self, ds, attributes=False, store=False, return_data=True):
             if ds in self.data_mem:
                 cdata = self.data_mem[ds]
+                ## return a copy of preloaded cube bands, so they are not modified in place by the caller
+                if ds in self.cube_mem: cdata = cdata.copy()
                 if ds in self.data_att:
                     catt = self.data_att[ds]
                 else:
                     catt = {}
             else:
                 if ds in self.datasets:
-                    cdata, catt = ac.shared.nc_data(self.file, ds, attributes=True)
+                    if ds in self.cube_datasets:
+                        cdata, catt = ac.shared.nc_data(self.file, self.cube_datasets[ds][0], attributes=True,
+                                                        band=self.cube_datasets[ds][1])
+                    else:
+                        cdata, catt = ac.shared.nc_data(self.file, ds, attributes=True)
                     cmask = cdata.mask
                     cdata = cdata.data
                     if cdata.dtype in [np.dtype('float32'), np.dtype('float64')]:
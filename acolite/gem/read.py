@@ -4,6 +4,7 @@
 ## modifications: 2021-03-09 (QV) made reading data optional
 ##                2021-12-08 (QV) added nc_projection
 ##                2022-02-15 (QV) added L9/TIRS
+##                2026-10-19 (QV) added support for (band, y, x) cube datasets
 
 def read(ncf, sub = None, skip_datasets = [], load_data=True):
     import os
@@ -17,6 +18,14 @@ def read(ncf, sub = None, skip_datasets = [], load_data=True):
 
     ## get datasets and attributes from NetCDF
     gem['datasets'] = ac.shared.nc_datasets(ncf)
+
+    ## list bands in cubes as separate datasets
+    cube_datasets = ac.shared.nc_cube_datasets(ncf)
+    if len(cube_datasets) > 0:
+        cubes = [cube_datasets[ds][0] for ds in cube_datasets]
+        gem['datasets'] = [ds for ds in gem['datasets'] if ds not in cubes+['wavelength']]
+        gem['datasets'] += [ds for ds in cube_datasets]
+
     gem['gatts'] = ac.shared.nc_gatts(ncf)
     gem['gatts']['gemfile'] = ncf
 
@@ -43,7 +52,10 @@ def read(ncf, sub = None, skip_datasets = [], load_data=True):
             if ds in skip_datasets: continue
             if 'projection_key' in gem['gatts']:
                 if ds in ['x', 'y', gem['gatts']['projection_key']]: continue
-            d_, a_ = ac.shared.nc_data(ncf, ds, sub=sub, attributes=True)
+            if ds in cube_datasets:
+                d_, a_ = ac.shared.nc_data(ncf, cube_datasets[ds][0], sub=sub, attributes=True, band=cube_datasets[ds][1])
+            else:
+                d_, a_ = ac.shared.nc_data(ncf, ds, sub=sub, attributes=True)
             gem['data'][ds] = d_.data
             gem['data'][ds][d_.mask] = np.nan
             gem['atts'][ds] = a_
@@ -4,6 +4,7 @@
 ## 2021-08-03
 ## modifications: 2021-12-31 (QV) new handling of settings
 ##                2022-01-04 (QV) added netcdf compression
+##                2026-10-19 (QV) added option to output rhot/Lt as (band, y, x) cubes
 
 def l1_convert(inputfile, output = None, settings = {}, verbosity=5):
     import numpy as np
@@ -108,26 +109,41 @@ def l1_convert(inputfile, output = None, settings = {}, verbosity=5):
                            'rsr': band_rsr[b],
                            'f0': f0d[b]}
 
-        for bi, b in enumerate(band_rsr):
-            print('Reading HICO rhot_{}'.format(bands[b]['wave_name']))
-            cdata_radiance = data[:,:,bi]
-            cdata = cdata_radiance * (np.pi * d * d) / (bands[b]['f0'] * mu0)
+        if setu['hyper_cube_output']:
+            ## convert all bands at once and write as cubes
+            cube_att = [{k:bands[b][k] for k in bands[b] if k not in ['rsr']} for b in band_rsr]
+            cube_waves = [bands[b]['wavelength'] for b in band_rsr]
+            cube_f0 = np.asarray([bands[b]['f0'] for b in band_rsr])[:, None, None]
+            cube_lt = np.moveaxis(data, 2, 0)
+            cube_rhot = cube_lt * (np.pi * d * d) / (cube_f0 * mu0)
+            for ds, cube in [('Lt', cube_lt), ('rhot', cube_rhot)]:
+                if (ds == 'Lt') & (not output_lt): continue
+                print('Writing HICO {} cube {}'.format(ds, cube.shape))
+                ac.output.nc_write(ofile, ds, cube, wavelength = cube_waves, dataset_attributes = cube_att,
+                            netcdf_compression=setu['netcdf_compression'],
+                            netcdf_compression_level=setu['netcdf_compression_level'])
+            cube_lt, cube_rhot = None, None
+        else:
+            for bi, b in enumerate(band_rsr):
+                print('Reading HICO rhot_{}'.format(bands[b]['wave_name']))
+                cdata_radiance = data[:,:,bi]
+                cdata = cdata_radiance * (np.pi * d * d) / (bands[b]['f0'] * mu0)
 
-            ## output datasets
-            ds_att = {k:bands[b][k] for k in bands[b] if k not in ['rsr']}
+                ## output datasets
+                ds_att = {k:bands[b][k] for k in bands[b] if k not in ['rsr']}
 
-            if output_lt:
-                ## write toa radiance
-                ac.output.nc_write(ofile, 'Lt_{}'.format(bands[b]['wave_name']), cdata_radiance, dataset_attributes = ds_att,
-                            netcdf_compression=setu['netcdf_compression'],
-                            netcdf_compression_level=setu['netcdf_compression_level'],
-                            netcdf_compression_least_significant_digit=setu['netcdf_compression_least_significant_digit'])
+                if output_lt:
+                    ## write toa radiance
+                    ac.output.nc_write(ofile, 'Lt_{}'.format(bands[b]['wave_name']), cdata_radiance, dataset_attributes = ds_att,
+                                netcdf_compression=setu['netcdf_compression'],
+                                netcdf_compression_level=setu['netcdf_compression_level'],
+                                netcdf_compression_least_significant_digit=setu['netcdf_compression_least_significant_digit'])
 
-            ## write toa reflectance
-            ac.output.nc_write(ofile, 'rhot_{}'.format(bands[b]['wave_name']), cdata, dataset_attributes = ds_att,
-                            netcdf_compression=setu['netcdf_compression'],
-                            netcdf_compression_level=setu['netcdf_compression_level'],
-                            netcdf_compression_least_significant_digit=setu['netcdf_compression_least_significant_digit'])
+                ## write toa reflectance
+                ac.output.nc_write(ofile, 'rhot_{}'.format(bands[b]['wave_name']), cdata, dataset_attributes = ds_att,
+                                netcdf_compression=setu['netcdf_compression'],
+                                netcdf_compression_level=setu['netcdf_compression_level'],
+                                netcdf_compression_least_significant_digit=setu['netcdf_compression_least_significant_digit'])
 
         ## update gatts
         with Dataset(ofile, 'a') as nc:
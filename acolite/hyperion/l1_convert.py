@@ -4,6 +4,7 @@
 ## 2021-08-04
 ## modifications:  2021-12-31 (QV) new handling of settings
 ##                2022-01-04 (QV) added netcdf compression
+##                2026-10-19 (QV) added option to output rhot/Lt as (band, y, x) cubes
 
 def l1_convert(inputfile, output = None, settings = {}, verbosity=5):
     import numpy as np
@@ -155,6 +156,10 @@ def l1_convert(inputfile, output = None, settings = {}, verbosity=5):
         lat = None
         new = False
 
+        ## store TOA data in cubes and write them at once
+        hyper_cube = setu['hyper_cube_output']
+        cube_rhot, cube_lt, cube_att = None, None, []
+
         for b,band in enumerate(bands_vnir+bands_swir):
             if band in bands_vnir: det = 'VNIR'
             if band in bands_swir: det = 'SWIR'
@@ -173,6 +178,15 @@ def l1_convert(inputfile, output = None, settings = {}, verbosity=5):
             if det == 'SWIR': cdata_radiance /= scaling_swir
             cdata_radiance[cdata_radiance == 0] = np.nan
 
+            if hyper_cube:
+                if cube_rhot is None:
+                    cube_rhot = np.zeros((len(bands_vnir+bands_swir),)+cdata_radiance.shape, dtype=np.float32)
+                    if output_lt: cube_lt = np.zeros((len(bands_vnir+bands_swir),)+cdata_radiance.shape, dtype=np.float32)
+                cube_att.append(ds_att)
+                if output_lt: cube_lt[b] = cdata_radiance
+                cube_rhot[b] = (np.pi*cdata_radiance*d*d) / (ds_att['f0'] * mu0)
+                continue
+
             ## write toa radiance
             if output_lt:
                 ac.output.nc_write(ofile, 'Lt_{}'.format(ds_att['wave_name']), cdata_radiance,
@@ -193,7 +207,18 @@ def l1_convert(inputfile, output = None, settings = {}, verbosity=5):
                                netcdf_compression_least_significant_digit=setu['netcdf_compression_least_significant_digit'])
             new = False
 
-
+        ## write TOA cubes
+        if hyper_cube:
+            cube_waves = [a['wavelength'] for a in cube_att]
+            for ds, cube in [('Lt', cube_lt), ('rhot', cube_rhot)]:
+                if cube is None: continue
+                print('Writing HYPERION {} cube {}'.format(ds, cube.shape))
+                ac.output.nc_write(ofile, ds, cube, wavelength = cube_waves,
+                                   attributes = gatts, dataset_attributes = cube_att, new=new,
+                                   netcdf_compression=setu['netcdf_compression'],
+                                   netcdf_compression_level=setu['netcdf_compression_level'])
+                new = False
+            cube_lt, cube_rhot = None, None
 
         ofiles.append(ofile)
     return(ofiles, setu)
@@ -4,6 +4,7 @@ from .metadata_ali import *
 
 from .read_band import *
 from .read_toa import *
+from .angles import *
 
 from .projection import *
 from .image_corners import *
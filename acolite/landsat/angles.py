@@ -0,0 +1,76 @@
+## def read_angles
+## reads the Landsat per pixel angle bands at a decimated resolution
+## pixels outside the scene (all angles 0) are filled with the nearest valid value,
+## so interpolation near the scene edge is not affected, their positions are stored in 'mask'
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+def read_angles(fmeta, warp_to, decimation = 8):
+    import numpy as np
+    import scipy.ndimage
+    import acolite as ac
+
+    ## output dimensions of the full resolution warp
+    xyr = warp_to[1]
+    dims = int((xyr[3]-xyr[1])/abs(warp_to[3])+0.5), int((xyr[2]-xyr[0])/abs(warp_to[2])+0.5)
+
+    ## keep at least two angle pixels in each dimension for the interpolation
+    decimation = int(max(1, min(decimation, dims[0]//2, dims[1]//2)))
+    warp_to_dec = (warp_to[0], warp_to[1], warp_to[2]*decimation, warp_to[3]*decimation, 'near')
+
+    angles = {}
+    for k in ['SZA', 'SAA', 'VZA', 'VAA']:
+        angles[k.lower()] = ac.shared.read_band(fmeta[k]['FILE'], warp_to=warp_to_dec).astype(np.float32)/100
+
+    mask = (angles['vaa'] == 0) * (angles['vza'] == 0) * (angles['saa'] == 0) * (angles['sza'] == 0)
+    if (mask.any()) & (not mask.all()):
+        idx = scipy.ndimage.distance_transform_edt(mask, return_distances=False, return_indices=True)
+        for k in angles: angles[k] = angles[k][tuple(idx)]
+
+    angles['mask'] = mask
+    angles['decimation'] = decimation
+    angles['dims'] = dims
+    return(angles)
+
+## def angles_block
+## upsamples decimated angles from read_angles for output rows r0 to r1
+## scale gives the number of output pixels per full resolution pixel (e.g. pan_scale for the pan band)
+## par can be one of the angles, 'raa', 'mus' or 'mask' (nearest neighbour)
+## azimuth angles are interpolated as unit vectors to avoid errors at the 0/360 wrap
+def angles_block(angles, par, r0, r1, scale = 1):
+    import numpy as np
+    import acolite as ac
+
+    dec = angles['decimation']
+    ny, nx = angles['mask'].shape
+
+    ## output pixel centres in full resolution pixel coordinates
+    x = (np.arange(angles['dims'][1]*scale)+0.5)/scale-0.5
+    y = (np.arange(r0, r1)+0.5)/scale-0.5
+
+    if par == 'mask':
+        ix = np.clip(np.floor((x+0.5)/dec).astype(int), 0, nx-1)
+        iy = np.clip(np.floor((y+0.5)/dec).astype(int), 0, ny-1)
+        return(angles['mask'][iy][:, ix])
+
+    if par == 'mus':
+        return(np.cos(np.radians(angles_block(angles, 'sza', r0, r1, scale=scale))))
+
+    if par == 'raa':
+        raa = np.abs(angles_block(angles, 'saa', r0, r1, scale=scale)-angles_block(angles, 'vaa', r0, r1, scale=scale))
+        tmp = np.where(raa>180)
+        raa[tmp] = np.abs(360 - raa[tmp])
+        return(raa)
+
+    ## angle pixel centres in full resolution pixel coordinates
+    tpx = (np.arange(nx)+0.5)*dec-0.5
+    tpy = (np.arange(ny)+0.5)*dec-0.5
+
+    if par in ['saa', 'vaa']:
+        rad = np.radians(angles[par])
+        sin = ac.sentinel3.tpg_interp(np.sin(rad), tpx, tpy, x, y)
+        cos = ac.sentinel3.tpg_interp(np.cos(rad), tpx, tpy, x, y)
+        return((np.degrees(np.arctan2(sin, cos)) % 360).astype(np.float32))
+    else:
+        return(ac.sentinel3.tpg_interp(angles[par], tpx, tpy, x, y).astype(np.float32))
@@ -8,6 +8,11 @@
 ##                2021-02-11 (QV) added checks for merging tiles of the same sensor and close in time
 ##                2021-12-31 (QV) new handling of settings
 ##                2022-01-04 (QV) added netcdf compression
+##                2026-10-19 (QV) added polylakes_spatial_index
+##                2026-10-19 (QV) added polygon_cache
+##                2026-10-19 (QV) added landsat_block_conversion with decimated angle bands
+##                2026-10-19 (QV) read bundles from zip/tar archives with vsi paths
+##                2026-10-19 (QV) compute geolocation per block in landsat_block_conversion
 
 def l1_convert(inputfile, output = None, settings = {},
 
@@ -55,10 +60,10 @@ def l1_convert(inputfile, output = None, settings = {},
     for bundle in inputfile:
         if verbosity > 1: print('Starting conversion of {}'.format(bundle))
 
-        mtl = glob.glob('{}/{}'.format(bundle, '*MTL.txt'))
+        mtl = ac.shared.vsi_glob('{}/{}'.format(bundle, '*MTL.txt'))
         ## add ALI MTL files
-        mtl += glob.glob('{}/{}'.format(bundle, '*MTL_L1T.TXT'))
-        mtl += glob.glob('{}/{}'.format(bundle, '*MTL_L1GST.TXT'))
+        mtl += ac.shared.vsi_glob('{}/{}'.format(bundle, '*MTL_L1T.TXT'))
+        mtl += ac.shared.vsi_glob('{}/{}'.format(bundle, '*MTL_L1GST.TXT'))
 
         if len(mtl) == 0:
             if verbosity > 0: print('No metadata file found for {}'.format(bundle))
@@ -141,11 +146,13 @@ def l1_convert(inputfile, output = None, settings = {},
             vname = setu['region_name']
             gains = setu['gains']
             gains_toa = setu['gains_toa']
+            block_conversion = setu['landsat_block_conversion']
+            block_rows = setu['landsat_block_rows']
             if output is None: output = setu['output']
 
             ## check if ROI polygon is given
             if setu['polylakes']:
-                poly = ac.shared.polylakes(setu['polylakes_database'])
+                poly = ac.shared.polylakes(setu['polylakes_database'], spatial_index=setu['polylakes_spatial_index'])
                 setu['polygon_limit'] = False
             else:
                 poly = setu['polygon']
@@ -153,7 +160,7 @@ def l1_convert(inputfile, output = None, settings = {},
             if poly is not None:
                 if os.path.exists(poly):
                     try:
-                        limit = ac.shared.polygon_limit(poly)
+                        limit = ac.shared.polygon_limit(poly, cache=setu['polygon_cache'])
                         if setu['polygon_limit']:
                             print('Using limit from polygon envelope: {}'.format(limit))
                         else:
@@ -374,12 +381,36 @@ def l1_convert(inputfile, output = None, settings = {},
 
         ## if we are clipping to a given polygon get the clip_mask here
         if clip:
-            clip_mask = ac.shared.polygon_crop(dct_prj, poly, return_sub=False)
+            clip_mask = ac.shared.polygon_crop(dct_prj, poly, return_sub=False, cache=setu['polygon_cache'])
             clip_mask = clip_mask.astype(bool) == False
 
+        ## output dimensions of the warped data, used for block conversion
+        block_dims = int((xyr[3]-xyr[1])/abs(dct_prj['pixel_size'][1])+0.5), \
+                     int((xyr[2]-xyr[0])/abs(dct_prj['pixel_size'][0])+0.5)
+        blocks = [(r0, min(block_dims[0], r0+block_rows)) for r0 in range(0, block_dims[0], block_rows)]
+        angles = None
+
         ## start the conversion
         ## write geometry
-        if ('VAA' in fmeta) & ('SAA' in fmeta) & ('VZA' in fmeta) & ('SZA' in fmeta):
+        if (block_conversion) & ('VAA' in fmeta) & ('SAA' in fmeta) & ('VZA' in fmeta) & ('SZA' in fmeta):
+            ## angles are kept at a decimated resolution and upsampled per block
+            if verbosity > 1: print('Reading per pixel geometry at 1/{} resolution'.format(setu['landsat_angle_decimation']))
+            angles = ac.landsat.read_angles(fmeta, warp_to, decimation=setu['landsat_angle_decimation'])
+            mus = None
+            if (output_geometry):
+                for ds in ['raa', 'vza', 'sza']:
+                    for r0, r1 in blocks:
+                        data = ac.landsat.angles_block(angles, ds, r0, r1)
+                        data[ac.landsat.angles_block(angles, 'mask', r0, r1)] = np.nan
+                        if clip: data[clip_mask[r0:r1]] = np.nan
+                        ac.output.nc_write(ofile, ds, data, replace_nan=True, offset=(0, r0), global_dims=block_dims,
+                                            fillvalue=np.nan, attributes=gatts, new=new, nc_projection=nc_projection,
+                                            netcdf_compression=setu['netcdf_compression'],
+                                            netcdf_compression_level=setu['netcdf_compression_level'])
+                        new = False
+                    if verbosity > 1: print('Wrote {}'.format(ds))
+                data = None
+        elif ('VAA' in fmeta) & ('SAA' in fmeta) & ('VZA' in fmeta) & ('SZA' in fmeta):
             if verbosity > 1: print('Reading per pixel geometry')
             sza = ac.shared.read_band(fmeta['SZA']['FILE'], sub=sub, warp_to=warp_to).astype(np.float32)/100
             mus = np.cos(sza*(np.pi/180.)) ## per pixel cos sun zenith
@@ -432,15 +463,30 @@ def l1_convert(inputfile, output = None, settings = {},
                 datasets = []
             if ('lat' not in datasets) or ('lon' not in datasets):
                 if verbosity > 1: print('Writing geolocation lon/lat')
-                lon, lat = ac.shared.projection_geo(dct_prj, add_half_pixel=False)
-                ac.output.nc_write(ofile, 'lon', lon, attributes=gatts, new=new, double=True, nc_projection=nc_projection,
-                                    netcdf_compression=setu['netcdf_compression'],
-                                    netcdf_compression_level=setu['netcdf_compression_level'])
-                if verbosity > 1: print('Wrote lon')
-                ac.output.nc_write(ofile, 'lat', lat, double=True,
-                                    netcdf_compression=setu['netcdf_compression'],
-                                    netcdf_compression_level=setu['netcdf_compression_level'])
-                if verbosity > 1: print('Wrote lat')
+                if block_conversion:
+                    ## compute and write geolocation per block of rows
+                    for r0, r1 in blocks:
+                        lon, lat = ac.shared.projection_geo(dct_prj, add_half_pixel=False, rows=(r0, r1))
+                        ac.output.nc_write(ofile, 'lon', lon, offset=(0, r0), global_dims=block_dims, fillvalue=np.nan,
+                                            attributes=gatts, new=new, double=True, nc_projection=nc_projection,
+                                            netcdf_compression=setu['netcdf_compression'],
+                                            netcdf_compression_level=setu['netcdf_compression_level'])
+                        new=False
+                        ac.output.nc_write(ofile, 'lat', lat, offset=(0, r0), global_dims=block_dims, fillvalue=np.nan, double=True,
+                                            netcdf_compression=setu['netcdf_compression'],
+                                            netcdf_compression_level=setu['netcdf_compression_level'])
+                    lon, lat = None, None
+                    if verbosity > 1: print('Wrote lon/lat in {} blocks'.format(len(blocks)))
+                else:
+                    lon, lat = ac.shared.projection_geo(dct_prj, add_half_pixel=False)
+                    ac.output.nc_write(ofile, 'lon', lon, attributes=gatts, new=new, double=True, nc_projection=nc_projection,
+                                        netcdf_compression=setu['netcdf_compression'],
+                                        netcdf_compression_level=setu['netcdf_compression_level'])
+                    if verbosity > 1: print('Wrote lon')
+                    ac.output.nc_write(ofile, 'lat', lat, double=True,
+                                        netcdf_compression=setu['netcdf_compression'],
+                                        netcdf_compression_level=setu['netcdf_compression_level'])
+                    if verbosity > 1: print('Wrote lat')
                 new=False
 
         ## write x/y
@@ -451,15 +497,28 @@ def l1_convert(inputfile, output = None, settings = {},
                 datasets = []
             if ('x' not in datasets) or ('y' not in datasets):
                 if verbosity > 1: print('Writing geolocation x/y')
-                x, y = ac.shared.projection_geo(dct_prj, xy=True, add_half_pixel=False)
-                ac.output.nc_write(ofile, 'x', x, new=new,
-                                    netcdf_compression=setu['netcdf_compression'],
-                                    netcdf_compression_level=setu['netcdf_compression_level'])
-                if verbosity > 1: print('Wrote x')
-                ac.output.nc_write(ofile, 'y', y,
-                                    netcdf_compression=setu['netcdf_compression'],
-                                    netcdf_compression_level=setu['netcdf_compression_level'])
-                if verbosity > 1: print('Wrote y')
+                if block_conversion:
+                    for r0, r1 in blocks:
+                        x, y = ac.shared.projection_geo(dct_prj, xy=True, add_half_pixel=False, rows=(r0, r1))
+                        ac.output.nc_write(ofile, 'x', x, offset=(0, r0), global_dims=block_dims, fillvalue=np.nan, new=new,
+                                            netcdf_compression=setu['netcdf_compression'],
+                                            netcdf_compression_level=setu['netcdf_compression_level'])
+                        new=False
+                        ac.output.nc_write(ofile, 'y', y, offset=(0, r0), global_dims=block_dims, fillvalue=np.nan,
+                                            netcdf_compression=setu['netcdf_compression'],
+                                            netcdf_compression_level=setu['netcdf_compression_level'])
+                    x, y = None, None
+                    if verbosity > 1: print('Wrote x/y in {} blocks'.format(len(blocks)))
+                else:
+                    x, y = ac.shared.projection_geo(dct_prj, xy=True, add_half_pixel=False)
+                    ac.output.nc_write(ofile, 'x', x, new=new,
+                                        netcdf_compression=setu['netcdf_compression'],
+                                        netcdf_compression_level=setu['netcdf_compression_level'])
+                    if verbosity > 1: print('Wrote x')
+                    ac.output.nc_write(ofile, 'y', y,
+                                        netcdf_compression=setu['netcdf_compression'],
+                                        netcdf_compression_level=setu['netcdf_compression_level'])
+                    if verbosity > 1: print('Wrote y')
                 new=False
 
         ## write TOA bands
@@ -467,7 +526,80 @@ def l1_convert(inputfile, output = None, settings = {},
         for b in fmeta:
             if '.TIF' not in fmeta[b]['FILE']: continue
             if b in ['PIXEL', 'RADSAT']: continue
-            if os.path.exists(fmeta[b]['FILE']):
+            if ac.shared.vsi_exists(fmeta[b]['FILE']):
+                ## conversion in row blocks
+                if (block_conversion) & ((b in waves_names) | ((b in thermal_bands) & (output_thermal))):
+                    thermal = b not in waves_names
+                    pan = b in pan_bands
+                    if (pan) & (not output_pan) & (not output_pan_ms): continue
+                    if thermal:
+                        ds = 'bt{}'.format(b).lower()
+                        ds_att = {'band':b}
+                    else:
+                        ds = 'rhot_{}'.format(waves_names[b])
+                        ds_att = {'wavelength':waves_mu[b]*1000}
+                    for k in fmeta[b]: ds_att[k] = fmeta[b][k]
+                    if (not thermal) & (gains) & (gains_dict is not None):
+                        ds_att['toa_gain'] = gains_dict[b]
+                        if verbosity > 1: print('Converting bands: Applying TOA gain {} to {}'.format(ds_att['toa_gain'], ds))
+                    ofile_pan = ofile.replace('_L1R.nc', '_L1R_pan.nc')
+
+                    ## percentiles are computed from every 4th pixel and line
+                    pct_data = []
+                    for r0, r1 in blocks:
+                        ps = pan_scale if pan else 1
+                        warp_sub = [0, r0*ps, block_dims[1]*ps, (r1-r0)*ps]
+                        if thermal:
+                            data = ac.landsat.read_toa(fmeta[b], warp_to=warp_to, warp_sub=warp_sub)
+                        else:
+                            mus_b = mus if angles is None else ac.landsat.angles_block(angles, 'mus', r0*ps, r1*ps, scale=ps)
+                            data = ac.landsat.read_toa(fmeta[b], mus=mus_b, warp_to=warp_to_pan if pan else warp_to, warp_sub=warp_sub)
+                            mus_b = None
+                        if 'toa_gain' in ds_att: data *= ds_att['toa_gain']
+
+                        if output_pan & pan:
+                            ac.output.nc_write(ofile_pan, ds, data, attributes=gatts, replace_nan=True,
+                                               offset=(0, r0*ps), global_dims=(block_dims[0]*ps, block_dims[1]*ps), fillvalue=np.nan,
+                                               new=new_pan, dataset_attributes = ds_att, nc_projection=nc_projection_pan,
+                                               netcdf_compression=setu['netcdf_compression'],
+                                               netcdf_compression_level=setu['netcdf_compression_level'],
+                                               netcdf_compression_least_significant_digit=setu['netcdf_compression_least_significant_digit'])
+                            new_pan = False
+
+                        if pan:
+                            if not output_pan_ms:
+                                if percentiles_compute: pct_data.append(data[::4, ::4].flatten())
+                                continue
+                            ## average pan pixels to the multispectral grid
+                            ny, nx = data.shape[0]//ps, data.shape[1]//ps
+                            data = np.nanmean(data[0:ny*ps, 0:nx*ps].reshape(ny, ps, nx, ps), axis=(1, 3))
+
+                        ## clip data
+                        if clip: data[clip_mask[r0:r1, 0:data.shape[1]]] = np.nan
+                        if percentiles_compute: pct_data.append(data[::4, ::4].flatten())
+
+                        ac.output.nc_write(ofile, ds, data, replace_nan=True, attributes=gatts, new=new,
+                                           offset=(0, r0), global_dims=block_dims, fillvalue=np.nan,
+                                           dataset_attributes = ds_att, nc_projection=nc_projection,
+                                           netcdf_compression=setu['netcdf_compression'],
+                                           netcdf_compression_level=setu['netcdf_compression_level'],
+                                           netcdf_compression_least_significant_digit=setu['netcdf_compression_least_significant_digit'])
+                        new = False
+                    data = None
+
+                    ## add percentiles to the dataset attributes
+                    if (percentiles_compute) & (len(pct_data) > 0):
+                        from netCDF4 import Dataset
+                        pct_data = np.nanpercentile(np.concatenate(pct_data), percentiles)
+                        for f in [ofile, ofile_pan] if (output_pan & pan) else [ofile]:
+                            if (f == ofile) & (pan) & (not output_pan_ms): continue
+                            with Dataset(f, 'a') as nc:
+                                nc.variables[ds].setncattr('percentiles', percentiles)
+                                nc.variables[ds].setncattr('percentiles_data', pct_data)
+                    pct_data = None
+                    if verbosity > 1: print('Converting bands: Wrote {} in {} blocks'.format(ds, len(blocks)))
+                    continue
+
                 if b in waves_names:
                     pan = False
                     if b in pan_bands: ## pan band
@@ -2,10 +2,11 @@
 ## gets landsat band specific metadata
 ## written by Quinten Vanhellemont, RBINS
 ## 2021-02-05
-## modifications:
+## modifications: 2026-10-19 (QV) added support for zip/tar archive paths
 
 def metadata_bands(bundle, meta):
     import os
+    import acolite as ac
     fmeta = {}
     if 'PRODUCT_CONTENTS' in meta: ## COLL2
         pk = 'PRODUCT_CONTENTS'
@@ -24,7 +25,7 @@ def metadata_bands(bundle, meta):
                 k = 'FILE_NAME_'+par
             if '.TIF' not in fname: continue
             file = '{}/{}'.format(bundle, fname)
-            if os.path.exists(file):
+            if ac.shared.vsi_exists(file):
                 if 'SOLAR_AZIMUTH' in k:
                     b = "SAA"
                 elif 'SOLAR_ZENITH' in k:
@@ -3,12 +3,13 @@
 ## written by Quinten Vanhellemont, RBINS
 ## 2017-04-13
 ## modifications: 2018-09-19 QV changed strip, added encoding
+##                2026-10-19 (QV) added reading from zip/tar archives
 
 def metadata_read(metafile):
     import acolite as ac
 
     mdata={}
-    with open(metafile,'r', encoding="utf-8") as f:
+    with ac.shared.vsi_open(metafile, 'r', encoding="utf-8") as f:
         for line in f.readlines():
             line = line.strip()
             split = line.split('=')
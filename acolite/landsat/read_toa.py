@@ -4,13 +4,14 @@
 ## written by Quinten Vanhellemont, RBINS
 ## 2021-02-05
 ## modifications: 2021-02-09 (QV) added warp_to option
+##                2026-10-19 (QV) added warp_sub option to read a window of the warped data
 
-def read_toa(fm, mus = 1, sub=None, warp_to=None, usgs_reflectance = True, usgs_radiance = False, usgs_bt=True):
+def read_toa(fm, mus = 1, sub=None, warp_to=None, usgs_reflectance = True, usgs_radiance = False, usgs_bt=True, warp_sub=None):
     import numpy as np
     import acolite as ac
 
     ## read data
-    data = ac.shared.read_band(fm['FILE'], sub=sub, warp_to=warp_to).astype(np.float32)
+    data = ac.shared.read_band(fm['FILE'], sub=sub, warp_to=warp_to, warp_sub=warp_sub).astype(np.float32)
 
     ## mask data
     data[data<fm['QUANTIZE_CAL_MIN']] = np.nan
@@ -1,5 +1,7 @@
 from .nc_to_geotiff import nc_to_geotiff
+from .geotiff_write import geotiff_write
 from .nc_to_geotiff_rgb import nc_to_geotiff_rgb
 from .nc_write import nc_write
+from .nc_layout import nc_layout, nc_chunksizes, nc_dataset_class
 from .project_acolite_netcdf import project_acolite_netcdf
 from .reproject_acolite_netcdf import reproject_acolite_netcdf
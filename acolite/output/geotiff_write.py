@@ -0,0 +1,54 @@
+## def geotiff_write
+## writes a 2D (y, x) or 3D (band, y, x) array to GeoTIFF or Cloud Optimized GeoTIFF in a single pass
+## COG files are copied from an in memory dataset, so the output file is written only once
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+def geotiff_write(outfile, data, transform = None, projection = None,
+                  rpcs = None, gcps = None, gcp_projection = None,
+                  cloud_optimized_geotiff = False, nodata = None):
+    import numpy as np
+    from osgeo import gdal, gdal_array
+
+    creationOptions = []
+    if cloud_optimized_geotiff:
+        creationOptions = ['COMPRESS=DEFLATE', 'PREDICTOR=2', 'OVERVIEWS=NONE', 'BLOCKSIZE=1024']
+
+    ## fill masked values with NaN for float data
+    if np.ma.isMaskedArray(data):
+        if data.dtype.kind == 'f':
+            data = data.filled(np.nan)
+        else:
+            data = data.data
+    if data.ndim == 2: data = data[None, :, :]
+    nb, y, x = data.shape
+    if (nodata is None) & (data.dtype.kind == 'f'): nodata = np.nan
+    dt = gdal_array.NumericTypeCodeToGDALTypeCode(data.dtype)
+
+    if cloud_optimized_geotiff:
+        dataset = gdal.GetDriverByName('MEM').Create('', x, y, nb, dt)
+    else:
+        dataset = gdal.GetDriverByName('GTiff').Create(outfile, x, y, nb, dt)
+
+    ## write RPC data
+    if rpcs is not None:
+        if len(rpcs) > 0: dataset.SetMetadata(rpcs, 'RPC')
+    ## write GCP data
+    if (gcps is not None) and (len(gcps) > 0):
+        dataset.SetGCPs(gcps, gcp_projection)
+    else:
+        if transform is not None: dataset.SetGeoTransform(transform)
+        if projection is not None: dataset.SetProjection(projection)
+
+    for bi in range(nb):
+        dataset.GetRasterBand(bi+1).WriteArray(data[bi])
+        if nodata is not None: dataset.GetRasterBand(bi+1).SetNoDataValue(nodata)
+
+    if cloud_optimized_geotiff:
+        dst = gdal.GetDriverByName('COG').CreateCopy(outfile, dataset, options=creationOptions)
+        dst = None
+    else:
+        dataset.FlushCache()
+    dataset = None
+    return(outfile)
@@ -0,0 +1,60 @@
+## def nc_layout
+## determines NetCDF storage layout for a dataset: chunk sizes and compression
+## chunks are derived from the output dimensions and a target chunk size in bytes
+## compression can be overruled per dataset class (geometry, reflectance, flags)
+## using netcdf_compression_{class} and netcdf_compression_level_{class} in ac.config
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) balance chunk shapes over the dimensions to avoid padded edge chunks
+
+def nc_layout(dataset, dims, itemsize, compression = False, compression_level = 4,
+              chunk_bytes = None, chunk_tiles = None):
+    import acolite as ac
+
+    ## chunk sizes from target bytes, or from number of tiles if netcdf_chunk_bytes is None
+    if chunk_bytes is None: chunk_bytes = ac.config.get('netcdf_chunk_bytes', 1048576)
+    if len(dims) != 2:
+        chunksizes = None
+    elif chunk_bytes is not None:
+        chunksizes = nc_chunksizes(dims, itemsize, chunk_bytes=chunk_bytes)
+    elif chunk_tiles is not None:
+        chunksizes = tuple([max(1, -(-dims[i]//chunk_tiles[i])) for i in range(2)])
+    else:
+        chunksizes = None
+
+    ## compression per dataset class
+    dclass = nc_dataset_class(dataset)
+    if dclass is not None:
+        c = ac.config.get('netcdf_compression_{}'.format(dclass))
+        if c is not None: compression = c
+        cl = ac.config.get('netcdf_compression_level_{}'.format(dclass))
+        if cl is not None: compression_level = cl
+
+    return(chunksizes, compression, compression_level)
+
+## chunk shape for (y, x) dimensions with at most chunk_bytes per chunk
+## chunks are square, and extended along the other dimension if one dimension is smaller
+## the chunks are then balanced so each dimension is split in equal chunks, as edge chunks are stored
+## at full size, e.g. 1100 rows are split in two chunks of 550 instead of chunks of 1024 and 76 rows
+## chunks are the unit of compression and of reading: larger chunks compress slightly better and need
+## fewer reads for full datasets, but every sub-window read decompresses all chunks it touches
+def nc_chunksizes(dims, itemsize, chunk_bytes = 1048576):
+    import numpy as np
+    nelem = max(1, int(chunk_bytes) // int(itemsize))
+    side = max(1, int(np.sqrt(nelem)))
+    cx = min(dims[1], side)
+    cy = min(dims[0], max(1, nelem // cx))
+    cx = min(dims[1], max(1, nelem // cy))
+    ## balance chunks over the dimensions
+    cy = -(-dims[0] // (-(-dims[0] // cy)))
+    cx = -(-dims[1] // (-(-dims[1] // cx)))
+    return((int(cy), int(cx)))
+
+## dataset class used for compression settings
+def nc_dataset_class(dataset):
+    import re
+    if re.match(r'^(l2_flags|.*_flags|flags.*|.*mask.*)$', dataset): return('flags')
+    if re.match(r'^(lat|lon|x|y|sza|vza|saa|vaa|raa|pressure|dem|glad_x|glad_y)(_.*)?$', dataset): return('geometry')
+    if re.match(r'^(rho[a-z]*|Rrs|Lt)_.*$', dataset): return('reflectance')
+    if dataset in ['rhot', 'rhos', 'Lt']: return('reflectance')
+    return(None)
@@ -10,44 +10,50 @@
 ##                2021-11-20 (QV) added match_file to extract projection from (esp if data is using RPC for geolocation?)
 ##                2021-12-08 (QV) added support for the netcdf projection
 ##                2022-03-22 (QV) added support for match_file with GCP
+##                2026-10-19 (QV) single pass export from the data array with ac.output.geotiff_write (also for COG),
+##                               added workers for parallel writing, and per dataset timing
+##                2026-10-19 (QV) export bands of (band, y, x) cubes to separate files
 
-def nc_to_geotiff(f, skip_geo=True, match_file=None, datasets=None, cloud_optimized_geotiff=False):
+def nc_to_geotiff(f, skip_geo=True, match_file=None, datasets=None, cloud_optimized_geotiff=False, workers=1):
     import acolite as ac
     import numpy as np
-    import os
+    import os, time
     from osgeo import osr, gdal
 
-    creationOptions = None
-    format = 'GTiff'
-    if cloud_optimized_geotiff:
-        creationOptions = ['COMPRESS=DEFLATE', 'PREDICTOR=2', 'OVERVIEWS=NONE', 'BLOCKSIZE=1024']
-        format = 'COG'
-
     gatts = ac.shared.nc_gatts(f)
     datasets_file = ac.shared.nc_datasets(f)
+    ## list bands in cubes as separate datasets
+    cube_datasets = ac.shared.nc_cube_datasets(f)
+    if len(cube_datasets) > 0:
+        cubes = [cube_datasets[ds][0] for ds in cube_datasets]
+        datasets_file = [ds for ds in datasets_file if ds not in cubes+['wavelength']]
+        datasets_file += [ds for ds in cube_datasets]
     if 'ofile' in gatts:
         out = gatts['ofile'].replace('.nc', '')
     else:
         out = f.replace('.nc', '')
 
+    ## geolocation of the output files
+    geo = {'transform': None, 'projection': None, 'rpcs': None, 'gcps': None, 'gcp_projection': None}
     if 'projection_key' in gatts:
-        for ds in datasets_file:
-            if datasets is not None:
-                if ds not in datasets: continue
-            if ds in ['x', 'y', gatts['projection_key']]: continue
-            if (skip_geo) & (ds in ['lat', 'lon']): continue
-            outfile = '{}_{}{}'.format(out, ds, '.tif')
-            ## write geotiff
-            dt = gdal.Translate(outfile, 'NETCDF:"{}":{}'.format(f, ds),
-                                format=format, creationOptions=creationOptions)
-            ## set no data value
-            if True:
-                 data = ac.shared.nc_data(f, ds)
-                 dt.GetRasterBand(1).WriteArray(data)
-                 dt.GetRasterBand(1).SetNoDataValue(np.nan)
+        skip = ['x', 'y', gatts['projection_key']]
+        if skip_geo: skip += ['lat', 'lon']
+    else:
+        skip = ['lat', 'lon', 'x', 'y'] if skip_geo else []
 
-            dt = None
-            print('Wrote {}'.format(outfile))
+    ## datasets to export
+    export = [ds for ds in datasets_file if ((datasets is None) or (ds in datasets)) and (ds not in skip)]
+    if len(export) == 0: return({})
+
+    if 'projection_key' in gatts:
+        ## geotransform and projection as read by GDAL from the NetCDF projection
+        src_ds = gdal.Open('NETCDF:"{}":{}'.format(f, cube_datasets[export[0]][0] if export[0] in cube_datasets else export[0]))
+        if src_ds is None:
+            print('Could not read projection from {}. Not outputting GeoTIFF files.'.format(f))
+            return({})
+        geo['transform'] = src_ds.GetGeoTransform()
+        geo['projection'] = src_ds.GetProjection()
+        src_ds = None
     else:
         tags = ['xrange', 'yrange', 'pixel_size', 'proj4_string']
         if all([t in gatts for t in tags]) or (match_file is not None):
@@ -59,65 +65,60 @@ def nc_to_geotiff(f, skip_geo=True, match_file=None, datasets=None, cloud_optimi
                 ## make WKT
                 srs = osr.SpatialReference()
                 srs.ImportFromProj4(gatts['proj4_string'])
-                wkt = srs.ExportToWkt()
+                geo['projection'] = srs.ExportToWkt()
 
                 ## make geotransform
-                trans = (xrange[0], pixel_size[0], 0.0, \
-                         yrange[0], 0.0, pixel_size[1])
+                geo['transform'] = (xrange[0], pixel_size[0], 0.0, \
+                                    yrange[0], 0.0, pixel_size[1])
 
             else:
                 if os.path.exists(match_file):
                     ## get projection info from match file
                     src_ds = gdal.Open(match_file)
-                    transform = src_ds.GetGeoTransform()
-                    projection = src_ds.GetProjection()
-                    dimx, dimy = src_ds.RasterXSize, src_ds.RasterYSize
+                    geo['transform'] = src_ds.GetGeoTransform()
+                    geo['projection'] = src_ds.GetProjection()
                     ## get RPC data
-                    RPCs = src_ds.GetMetadata('RPC')
+                    geo['rpcs'] = src_ds.GetMetadata('RPC')
                     ## get GCP data
-                    GCPs = src_ds.GetGCPs()
-                    GCPProjection = src_ds.GetGCPProjection()
+                    geo['gcps'] = src_ds.GetGCPs()
+                    geo['gcp_projection'] = src_ds.GetGCPProjection()
                     src_ds = None
                 else:
                     print('File {} not found. Not outputting GeoTIFF files.'.format(match_file))
-                    return
-
-            for ds in datasets_file:
-                if datasets is not None:
-                    if ds not in datasets: continue
-                if (skip_geo) & (ds in ['lat', 'lon', 'x', 'y']): continue
-
-                data = ac.shared.nc_data(f, ds)
-                y,x = data.shape
-                if data.dtype == np.float32:
-                    dt = gdal.GDT_Float32
-                else:
-                    print(data.dtype)
+                    return({})
+        else:
+            print('Unprojected data {}. Not outputting GeoTIFF files.'.format(f))
+            return({})
 
-                outfile = '{}_{}{}'.format(out, ds, '.tif')
+    ## read dataset, from the cube if needed
+    def read(ds):
+        if ds in cube_datasets:
+            return(ac.shared.nc_data(f, cube_datasets[ds][0], band=cube_datasets[ds][1]))
+        return(ac.shared.nc_data(f, ds))
 
-                if match_file is None:
-                    driver = gdal.GetDriverByName('GTiff')
-                    dataset = driver.Create(outfile, x, y, 1, dt)
-                    dataset.SetGeoTransform(trans)
-                    dataset.SetProjection(wkt)
-                else:
-                    driver = gdal.GetDriverByName('GTiff')
-                    dataset = driver.Create(outfile, dimx, dimy, 1, dt)
-                    ## write RPC data
-                    if len(RPCs) > 0:
-                        dataset.SetMetadata(RPCs ,'RPC')
-                    ## write GCP data
-                    if len(GCPs) > 0:
-                        dataset.SetGCPs(GCPs, GCPProjection)
-                    else:
-                        dataset.SetGeoTransform(transform)
-                        dataset.SetProjection(projection)
-                    src_ds = None
+    ## write dataset, time includes reading from the NetCDF
+    timing = {}
+    def write(ds, data, t0):
+        outfile = '{}_{}{}'.format(out, ds, '.tif')
+        ac.output.geotiff_write(outfile, data, cloud_optimized_geotiff=cloud_optimized_geotiff, **geo)
+        timing[ds] = time.time()-t0
+        print('Wrote {} ({:.2f}s)'.format(outfile, timing[ds]))
 
-                dataset.GetRasterBand(1).WriteArray(data)
-                dataset.GetRasterBand(1).SetNoDataValue(np.nan)
-                dataset.FlushCache()
-                print('Wrote {}'.format(outfile))
-        else:
-            print('Unprojected data {}. Not outputting GeoTIFF files.'.format(f))
+    ## NetCDF reading stays in this thread, GeoTIFF writing is done by the workers
+    if workers > 1:
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for ds in export:
+                t0 = time.time()
+                pending.add(executor.submit(write, ds, read(ds), t0))
+                ## limit the number of datasets in memory
+                if len(pending) >= workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done: fut.result()
+            for fut in pending: fut.result()
+    else:
+        for ds in export:
+            t0 = time.time()
+            write(ds, read(ds), t0)
+    return(timing)
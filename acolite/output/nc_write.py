@@ -21,12 +21,17 @@
 ##                QV 2021-06-04 added dataset attributes defaults
 ##                QV 2021-07-19 change to using setncattr
 ##                QV 2021-12-08 added nc_projection
+##                QV 2026-10-19 added 3-D (band, y, x) cube datasets
+##                QV 2026-10-19 fixed chunk size computation, added chunk_bytes and per dataset class compression
+##                QV 2026-10-19 skip nan initialisation of new datasets written with offset if fillvalue is nan
+##                QV 2026-10-19 added nc_write stage metrics
+##                QV 2026-10-19 added least_significant_digit to cube datasets
 
 def nc_write(ncfile, dataset, data, wavelength=None, global_dims=None,
                  new=False, attributes=None, update_attributes=False,
                  keep=True, offset=None, replace_nan=False,
                  metadata=None, dataset_attributes=None, double=False,
-                 chunking=True, chunk_tiles=[10,10], chunksizes=None, fillvalue=None,
+                 chunking=True, chunk_tiles=[10,10], chunksizes=None, chunk_bytes=None, fillvalue=None,
                  nc_projection = None,
                  format='NETCDF4',
                  netcdf_compression=False,
@@ -41,6 +46,21 @@ def nc_write(ncfile, dataset, data, wavelength=None, global_dims=None,
 
     import re
     import acolite as ac
+    ac.acolite.logging.stage_start('nc_write')
+
+    ## 3-D data is stored as a (band, y, x) cube
+    ## wavelength is then the list of band wavelengths, written to the wavelength coordinate
+    ## dataset_attributes can be a list of per band attribute dicts
+    cube = len(data.shape) == 3
+    if cube:
+        nbands = data.shape[0]
+        if type(dataset_attributes) is list:
+            band_attributes = dataset_attributes
+            dataset_attributes = {t:[ba.get(t) for ba in band_attributes] for t in band_attributes[0]}
+            dataset_attributes = {t:dataset_attributes[t] for t in dataset_attributes if None not in dataset_attributes[t]}
+        if wavelength is not None:
+            if dataset_attributes is None: dataset_attributes = {}
+            dataset_attributes['wavelength'] = [float(w) for w in wavelength]
 
     ## import atts for dataset
     atts = None
@@ -70,12 +90,16 @@ def nc_write(ncfile, dataset, data, wavelength=None, global_dims=None,
     if os.path.exists(os.path.dirname(ncfile)) is False:
          os.makedirs(os.path.dirname(ncfile))
 
-    dims = data.shape
+    dims = data.shape[-2:]
     if global_dims is None: global_dims = dims
 
-    if chunking:
-        if chunksizes is not None:
-            chunksizes=(ceil(dim[0]/chunk_tiles[0]), ceil(dim[1]/chunk_tiles[1]))
+    ## storage layout, chunk sizes from the output dimensions and compression per dataset class
+    itemsize = 4 if ((not double) & (data.dtype == np.float64)) else data.dtype.itemsize
+    chunksizes_, netcdf_compression, netcdf_compression_level = \
+        ac.output.nc_layout(dataset, global_dims, itemsize,
+                            compression = netcdf_compression, compression_level = netcdf_compression_level,
+                            chunk_bytes = chunk_bytes, chunk_tiles = chunk_tiles)
+    if (chunking) & (chunksizes is None): chunksizes = chunksizes_
 
     if new:
         if os.path.exists(ncfile): os.remove(ncfile)
@@ -148,7 +172,30 @@ def nc_write(ncfile, dataset, data, wavelength=None, global_dims=None,
         pkey = None
 
     ## write data
-    if dataset in nc.variables.keys():
+    if cube:
+        if 'band' not in nc.dimensions: nc.createDimension('band', nbands)
+        if (wavelength is not None) & ('wavelength' not in nc.variables.keys()):
+            var = nc.createVariable('wavelength', np.float32, ('band',))
+            var.setncattr('units', 'nm')
+            var[:] = np.asarray(wavelength, dtype=np.float32)
+        if dataset in nc.variables.keys():
+            var = nc.variables[dataset]
+        else:
+            netcdf_least_significant_digit = None if netcdf_compression_least_significant_digit is None else 1 * netcdf_compression_least_significant_digit
+            ## chunks do not span bands so single bands are read without touching the others
+            var = nc.createVariable(dataset,data.dtype,('band','y','x'),
+                                    fill_value=fillvalue,
+                                    zlib=netcdf_compression, complevel=netcdf_compression_level,
+                                    least_significant_digit=netcdf_least_significant_digit,
+                                    chunksizes=None if chunksizes is None else (1, chunksizes[0], chunksizes[1]),
+                                    contiguous=chunksizes is None)
+            if pkey is not None: var.setncattr('grid_mapping', pkey)
+        if dataset_attributes is not None:
+            for att in dataset_attributes.keys():
+                if att in ['_FillValue']: continue
+                var.setncattr(att, dataset_attributes[att])
+        var[:] = data
+    elif dataset in nc.variables.keys():
         ## dataset already in NC file
         ## update existing dataset attributes
         if dataset_attributes is not None:
@@ -201,10 +248,13 @@ def nc_write(ncfile, dataset, data, wavelength=None, global_dims=None,
             if data.dtype in (np.float32, np.float64): var[:] = np.nan
             var[:] = data
         else:
-            if data.dtype in (np.float32, np.float64): var[:] = np.nan
+            ## not needed if the fill value is nan, avoids writing the full dataset for block writes
+            if (data.dtype in (np.float32, np.float64)) & \
+               ((fillvalue is None) or (not np.isnan(fillvalue))): var[:] = np.nan
             var[offset[1]:offset[1]+dims[0],offset[0]:offset[0]+dims[1]] = data
     if keep is not True: data = None
 
     ## close netcdf file
     nc.close()
     nc=None
+    ac.acolite.logging.stage_stop('nc_write')
@@ -6,6 +6,8 @@
 ##                2022-01-10 (QV) renamed from reproject_acolite_netcdf
 ##                2022-07-05 (QV) determine projection limit from lat lon if none given
 ##                2022-07-06 (QV) simultaneous reprojection of multiple datasets (much faster!)
+##                2026-10-19 (QV) added polygon_cache
+##                2026-10-19 (QV) bilinear coefficients computed once and applied per dataset, results written directly
 
 def project_acolite_netcdf(ncf, output = None, settings = {}, target_file=None):
 
@@ -17,6 +19,7 @@ def project_acolite_netcdf(ncf, output = None, settings = {}, target_file=None):
     from pyresample.bilinear import NumpyBilinearResampler
     #from pyresample import image, geometry
     from pyresample import geometry
+    from scipy.ndimage import distance_transform_edt
 
     ## read gatts
     try:
@@ -44,7 +47,7 @@ def project_acolite_netcdf(ncf, output = None, settings = {}, target_file=None):
         setu['output_projection_limit'] = [l for l in setu['limit']]
 
     if (setu['output_projection_limit'] is None) & (setu['polygon'] is not None):
-        setu['output_projection_limit'] = ac.shared.polygon_limit(setu['polygon'])
+        setu['output_projection_limit'] = ac.shared.polygon_limit(setu['polygon'], cache=setu['polygon_cache'])
 
     if (setu['output_projection_limit'] is None):
         ## read lat/lon
@@ -179,47 +182,45 @@ def project_acolite_netcdf(ncf, output = None, settings = {}, target_file=None):
     ## update oname in gatts
     gatts_out['oname'] = oname
 
-    ## read in data to be reprojected
-    data_in_stack = None
+    ## compute bilinear resampling coefficients once for this source/target grid pair
+    t0 = time.time()
+    resampler.get_bil_info()
+    lat, lon = None, None
+    print('Computing resampling coefficients to {} {}x{} took {:.1f} seconds'.format(projection, nx, ny, time.time()-t0))
+
+    ## reproject and write datasets one by one
+    t0 = time.time()
+    new = True
+    fill_mask, fill_ind = None, None
     datasets_out = []
-    datasets_att = {}
     for ds in datasets:
         data_in, att = ac.shared.nc_data(ncf, ds, attributes=True)
         if len(data_in.shape) != 2: continue
-        if setu['verbosity'] > 2: print('Reading {} {}x{}'.format(ds, data_in.shape[0], data_in.shape[1]))
-        if data_in_stack is None:
-            data_in_stack = data_in
-        else:
-            data_in_stack = np.dstack((data_in_stack, data_in))
-        datasets_out.append(ds)
-        datasets_att[ds] = att
+        if setu['verbosity'] > 2: print('Projecting {} {}x{}'.format(ds, data_in.shape[0], data_in.shape[1]))
+        data_out = resampler.get_sample_from_bil_info(data_in, fill_value=np.nan, output_shape=(ny, nx))
         data_in = None
-
-    ## reproject dataset
-    t0 = time.time()
-    print('Projecting datasets {}x{}x{} to {} {}x{}x{}'.format(data_in_stack.shape[0], data_in_stack.shape[1], len(datasets_out),\
-                                                projection, nx, ny, len(datasets_out)))
-    data_out_stack = resampler.resample(data_in_stack, fill_value=np.nan)
-    data_in_stack = None
-    if setu['output_projection_fillnans']:
-        data_out_stack[data_out_stack == 0] = np.nan
-        data_out_stack = ac.shared.fillnan(data_out_stack)
-    t1 = time.time()
-    print('Reprojection of {} datasets took {:.1f} seconds'.format(len(datasets_out),t1-t0))
-
-    ## write results
-    new = True
-    for di, ds in enumerate(datasets_out):
-        if setu['verbosity'] > 2: print('Writing {} {}x{}'.format(ds, data_out_stack[:,:,di].shape[0], data_out_stack[:,:,di].shape[1]))
+        if setu['output_projection_fillnans']:
+            data_out[data_out == 0] = np.nan
+            ## nearest valid pixel indices are reused while the NaN mask is the same
+            mask = np.isnan(np.asarray(data_out))
+            if (fill_mask is None) or (not np.array_equal(mask, fill_mask)):
+                fill_mask = mask
+                fill_ind = distance_transform_edt(mask, return_distances=False, return_indices=True)
+            data_out = data_out[tuple(fill_ind)]
+
+        if setu['verbosity'] > 2: print('Writing {} {}x{}'.format(ds, data_out.shape[0], data_out.shape[1]))
         lsd = None
         if ds not in ['lat', 'lon', 'vza', 'sza', 'vaa', 'saa', 'raa']:
             lsd = setu['netcdf_compression_least_significant_digit']
-        ac.output.nc_write(ncfo, ds, data_out_stack[:,:,di], attributes = gatts_out,
+        ac.output.nc_write(ncfo, ds, data_out, attributes = gatts_out,
                             netcdf_compression=setu['netcdf_compression'],
                             netcdf_compression_level=setu['netcdf_compression_level'],
                             netcdf_compression_least_significant_digit=lsd,
                             nc_projection = nc_projection,
-                            dataset_attributes = datasets_att[ds], new = new)
+                            dataset_attributes = att, new = new)
         new = False
+        data_out = None
+        datasets_out.append(ds)
+    print('Reprojection of {} datasets took {:.1f} seconds'.format(len(datasets_out), time.time()-t0))
     print('Wrote {}'.format(ncfo))
     return(ncfo)
@@ -7,6 +7,10 @@
 ##                2022-01-04 (QV) added netcdf compression
 ##                2022-02-21 (QV) added Skysat
 ##                2022-08-12 (QV) added reprojection of unrectified data with RPC
+##                2026-10-19 (QV) added warp_in_memory option
+##                2026-10-19 (QV) added polylakes_spatial_index
+##                2026-10-19 (QV) added polygon_cache
+##                2026-10-19 (QV) in memory warped files are removed per scene in finally
 
 def l1_convert(inputfile, output = None, settings = {},
 
@@ -118,7 +122,7 @@ def l1_convert(inputfile, output = None, settings = {},
 
             ## check if ROI polygon is given
             if setu['polylakes']:
-                poly = ac.shared.polylakes(setu['polylakes_database'])
+                poly = ac.shared.polylakes(setu['polylakes_database'], spatial_index=setu['polylakes_spatial_index'])
                 setu['polygon_limit'] = False
             else:
                 poly = setu['polygon']
@@ -126,7 +130,7 @@ def l1_convert(inputfile, output = None, settings = {},
             if poly is not None:
                 if os.path.exists(poly):
                     try:
-                        limit = ac.shared.polygon_limit(poly)
+                        limit = ac.shared.polygon_limit(poly, cache=setu['polygon_cache'])
                         if setu['polygon_limit']:
                             print('Using limit from polygon envelope: {}'.format(limit))
                         else:
@@ -202,228 +206,236 @@ def l1_convert(inputfile, output = None, settings = {},
             gatts['{}_name'.format(b)] = waves_names[b]
             gatts['{}_f0'.format(b)] = f0_b[b]
 
-        ## try to read projection of image file
+        ## in memory warped files of this scene are removed in finally, also when the scene is skipped
+        vsimem_dir = None
         try:
-            dct = ac.shared.projection_read(image_file)
-        except:
-            ## else reproject image to default resolution
-            ## if limit not set then gdal will be used to set up projection
-            ## to be improved using RPC info
-            print('Cannot determine image projection of {}, reprojecting.'.format(image_file))
-            ret = ac.shared.warp_and_merge(image_file_original, output = output,
-                                     limit = limit, resolution = setu['default_projection_resolution'])
-            if len(ret) == 3:
-                image_file = ret[0]
-                dct = ret[1]
-                dct_limit = ret[2]
+            ## try to read projection of image file
+            try:
+                dct = ac.shared.projection_read(image_file)
+            except:
+                ## else reproject image to default resolution
+                ## if limit not set then gdal will be used to set up projection
+                ## to be improved using RPC info
+                print('Cannot determine image projection of {}, reprojecting.'.format(image_file))
+                ret = ac.shared.warp_and_merge(image_file_original, output = output,
+                                         limit = limit, resolution = setu['default_projection_resolution'],
+                                         in_memory = setu['warp_in_memory'])
+                if len(ret) == 3:
+                    image_file = ret[0]
+                    if image_file.startswith('/vsimem/'): vsimem_dir = os.path.dirname(image_file)
+                    dct = ret[1]
+                    dct_limit = ret[2]
+                else:
+                    print('Image projection unsuccesful.')
+                    continue
+
+            gatts['scene_xrange'] = dct['xrange']
+            gatts['scene_yrange'] = dct['yrange']
+            gatts['scene_proj4_string'] = dct['proj4_string']
+            gatts['scene_pixel_size'] = dct['pixel_size']
+            gatts['scene_dims'] = dct['dimensions']
+            if 'zone' in dct: gatts['scene_zone'] = dct['zone']
+
+            ## check crop
+            if (sub is None) & (limit is not None):
+                dct_sub = ac.shared.projection_sub(dct, limit, four_corners=True)
+                if dct_sub['out_lon']:
+                    if verbosity > 1: print('Longitude limits outside {}'.format(bundle))
+                    continue
+                if dct_sub['out_lat']:
+                    if verbosity > 1: print('Latitude limits outside {}'.format(bundle))
+                    continue
+                sub = dct_sub['sub']
             else:
-                print('Image projection unsuccesful.')
-                continue
-
-        gatts['scene_xrange'] = dct['xrange']
-        gatts['scene_yrange'] = dct['yrange']
-        gatts['scene_proj4_string'] = dct['proj4_string']
-        gatts['scene_pixel_size'] = dct['pixel_size']
-        gatts['scene_dims'] = dct['dimensions']
-        if 'zone' in dct: gatts['scene_zone'] = dct['zone']
-
-        ## check crop
-        if (sub is None) & (limit is not None):
-            dct_sub = ac.shared.projection_sub(dct, limit, four_corners=True)
-            if dct_sub['out_lon']:
-                if verbosity > 1: print('Longitude limits outside {}'.format(bundle))
-                continue
-            if dct_sub['out_lat']:
-                if verbosity > 1: print('Latitude limits outside {}'.format(bundle))
-                continue
-            sub = dct_sub['sub']
-        else:
-            if extend_region:
-                print("Can't extend region if no ROI limits given")
-                extend_region = False
-
-        ##
-        if ((merge_tiles is False) & (merge_zones is False)): warp_to = None
-        if sub is None:
-            if ((merge_zones) & (warp_to is not None)):
-                if dct_prj != dct: ## target projection differs from this tile, need to set bounds
-                    if dct['proj4_string'] != dct_prj['proj4_string']:
-                        ## if the prj does not match, project current scene bounds to lat/lon
-                        lonr, latr = dct['p'](dct['xrange'], dct['yrange'], inverse=True)
-                        ## then to target projection
-                        xrange_raw, yrange_raw = dct_prj['p'](lonr, (latr[1], latr[0]))
-                        ## fix to nearest full pixel
-                        pixel_size = dct_prj['pixel_size']
-                        dct_prj['xrange'] = [xrange_raw[0] - (xrange_raw[0] % pixel_size[0]), xrange_raw[1]+pixel_size[0]-(xrange_raw[1] % pixel_size[0])]
-                        dct_prj['yrange'] = [yrange_raw[1]+pixel_size[1]-(yrange_raw[1] % pixel_size[1]), yrange_raw[0] - (yrange_raw[0] % pixel_size[1])]
-                        ## need to add new dimensions
-                        dct_prj['xdim'] = int((dct_prj['xrange'][1]-dct_prj['xrange'][0])/pixel_size[0])+1
-                        dct_prj['ydim'] = int((dct_prj['yrange'][1]-dct_prj['yrange'][0])/pixel_size[1])+1
-                        dct_prj['dimensions'] = [dct_prj['xdim'], dct_prj['ydim']]
-                    else:
-                        ## if the projection matches just use the current scene projection
-                        dct_prj = {k:dct[k] for k in dct}
-            elif (warp_to is None):
-                dct_prj = {k:dct[k] for k in dct}
-        else:
-            gatts['sub'] = sub
-            gatts['limit'] = limit
-            ## get the target NetCDF dimensions and dataset offset
-            if (warp_to is None):
-                if (extend_region): ## include part of the roi not covered by the scene
-                    dct_prj = {k:dct_sub['region'][k] for k in dct_sub['region']}
-                else: ## just include roi that is covered by the scene
-                    dct_prj = {k:dct_sub[k] for k in dct_sub}
-        ## end cropped
-
-        ## get projection info for netcdf
-        if netcdf_projection:
-            nc_projection = ac.shared.projection_netcdf(dct_prj, add_half_pixel=True)
-        else:
-            nc_projection = None
-
-        ## save projection keys in gatts
-        pkeys = ['xrange', 'yrange', 'proj4_string', 'pixel_size', 'zone']
-        for k in pkeys:
-            if k in dct_prj: gatts[k] = dct_prj[k]
-
-        ## warp settings for read_band
-        ## updated 2021-10-28
-        xyr = [min(dct_prj['xrange']),
-               min(dct_prj['yrange']),
-               max(dct_prj['xrange']),
-               max(dct_prj['yrange']),
-               dct_prj['proj4_string']]
-
-        res_method = 'average'
-        warp_to = (dct_prj['proj4_string'], xyr, dct_prj['pixel_size'][0],dct_prj['pixel_size'][1], res_method)
-
-        ## store scene and output dimensions
-        gatts['scene_dims'] = dct['ydim'], dct['xdim']
-        gatts['global_dims'] = dct_prj['dimensions']
-
-        ## new file for every bundle if not merging
-        if (merge_tiles is False):
-            new = True
-            new_pan = True
-
-        ## if we are clipping to a given polygon get the clip_mask here
-        if clip:
-            clip_mask = ac.shared.polygon_crop(dct_prj, poly, return_sub=False)
-            clip_mask = clip_mask.astype(bool) == False
-
-        ## write lat/lon
-        if (output_geolocation):
-            if (os.path.exists(ofile) & (not new)):
-                datasets = ac.shared.nc_datasets(ofile)
+                if extend_region:
+                    print("Can't extend region if no ROI limits given")
+                    extend_region = False
+
+            ##
+            if ((merge_tiles is False) & (merge_zones is False)): warp_to = None
+            if sub is None:
+                if ((merge_zones) & (warp_to is not None)):
+                    if dct_prj != dct: ## target projection differs from this tile, need to set bounds
+                        if dct['proj4_string'] != dct_prj['proj4_string']:
+                            ## if the prj does not match, project current scene bounds to lat/lon
+                            lonr, latr = dct['p'](dct['xrange'], dct['yrange'], inverse=True)
+                            ## then to target projection
+                            xrange_raw, yrange_raw = dct_prj['p'](lonr, (latr[1], latr[0]))
+                            ## fix to nearest full pixel
+                            pixel_size = dct_prj['pixel_size']
+                            dct_prj['xrange'] = [xrange_raw[0] - (xrange_raw[0] % pixel_size[0]), xrange_raw[1]+pixel_size[0]-(xrange_raw[1] % pixel_size[0])]
+                            dct_prj['yrange'] = [yrange_raw[1]+pixel_size[1]-(yrange_raw[1] % pixel_size[1]), yrange_raw[0] - (yrange_raw[0] % pixel_size[1])]
+                            ## need to add new dimensions
+                            dct_prj['xdim'] = int((dct_prj['xrange'][1]-dct_prj['xrange'][0])/pixel_size[0])+1
+                            dct_prj['ydim'] = int((dct_prj['yrange'][1]-dct_prj['yrange'][0])/pixel_size[1])+1
+                            dct_prj['dimensions'] = [dct_prj['xdim'], dct_prj['ydim']]
+                        else:
+                            ## if the projection matches just use the current scene projection
+                            dct_prj = {k:dct[k] for k in dct}
+                elif (warp_to is None):
+                    dct_prj = {k:dct[k] for k in dct}
             else:
-                datasets = []
-            if ('lat' not in datasets) or ('lon' not in datasets):
-                if verbosity > 1: print('Writing geolocation lon/lat')
-                lon, lat = ac.shared.projection_geo(dct_prj, add_half_pixel=True)
-                ac.output.nc_write(ofile, 'lon', lon, attributes=gatts, new=new, double=True, nc_projection=nc_projection,
-                                    netcdf_compression=setu['netcdf_compression'],
-                                    netcdf_compression_level=setu['netcdf_compression_level'])
-                lon = None
-                if verbosity > 1: print('Wrote lon')
-                ac.output.nc_write(ofile, 'lat', lat, double=True,
-                                    netcdf_compression=setu['netcdf_compression'],
-                                    netcdf_compression_level=setu['netcdf_compression_level'])
-                lat = None
-                if verbosity > 1: print('Wrote lat')
-                new=False
-
-        ## write x/y
-        if (output_xy):
-            if os.path.exists(ofile) & (not new):
-                datasets = ac.shared.nc_datasets(ofile)
+                gatts['sub'] = sub
+                gatts['limit'] = limit
+                ## get the target NetCDF dimensions and dataset offset
+                if (warp_to is None):
+                    if (extend_region): ## include part of the roi not covered by the scene
+                        dct_prj = {k:dct_sub['region'][k] for k in dct_sub['region']}
+                    else: ## just include roi that is covered by the scene
+                        dct_prj = {k:dct_sub[k] for k in dct_sub}
+            ## end cropped
+
+            ## get projection info for netcdf
+            if netcdf_projection:
+                nc_projection = ac.shared.projection_netcdf(dct_prj, add_half_pixel=True)
             else:
-                datasets = []
-            if ('x' not in datasets) or ('y' not in datasets):
-                if verbosity > 1: print('Writing geolocation x/y')
-                x, y = ac.shared.projection_geo(dct_prj, xy=True, add_half_pixel=True)
-                ac.output.nc_write(ofile, 'x', x, new=new,
-                                    netcdf_compression=setu['netcdf_compression'],
-                                    netcdf_compression_level=setu['netcdf_compression_level'])
-                x = None
-                if verbosity > 1: print('Wrote x')
-                ac.output.nc_write(ofile, 'y', y,
-                                    netcdf_compression=setu['netcdf_compression'],
-                                    netcdf_compression_level=setu['netcdf_compression_level'])
-                y = None
-                if verbosity > 1: print('Wrote y')
-                new=False
-
-        ## convert bands
-        for b in rsr_bands:
-            if b in ['PAN']: continue
-            idx = int(meta['{}-band_idx'.format(b)])
-
-            ## read data
-            md, data = ac.shared.read_band(image_file, idx=idx, warp_to=warp_to, gdal_meta = True)
-            nodata = data == np.uint16(0)
-
-            if 'Skysat' in meta['sensor']:
-                ## get reflectance scaling from tiff tags
-                try:
-                    prop = json.loads(md['TIFFTAG_IMAGEDESCRIPTION'])['properties']
-                except:
-                    prop = {}
-
-                if 'reflectance_coefficients' in prop:
-                    ## convert to toa radiance & mask
-                    bi = idx - 1
-                    data = data.astype(float) * prop['reflectance_coefficients'][bi]
-                    data[nodata] = np.nan
+                nc_projection = None
+
+            ## save projection keys in gatts
+            pkeys = ['xrange', 'yrange', 'proj4_string', 'pixel_size', 'zone']
+            for k in pkeys:
+                if k in dct_prj: gatts[k] = dct_prj[k]
+
+            ## warp settings for read_band
+            ## updated 2021-10-28
+            xyr = [min(dct_prj['xrange']),
+                   min(dct_prj['yrange']),
+                   max(dct_prj['xrange']),
+                   max(dct_prj['yrange']),
+                   dct_prj['proj4_string']]
+
+            res_method = 'average'
+            warp_to = (dct_prj['proj4_string'], xyr, dct_prj['pixel_size'][0],dct_prj['pixel_size'][1], res_method)
+
+            ## store scene and output dimensions
+            gatts['scene_dims'] = dct['ydim'], dct['xdim']
+            gatts['global_dims'] = dct_prj['dimensions']
+
+            ## new file for every bundle if not merging
+            if (merge_tiles is False):
+                new = True
+                new_pan = True
+
+            ## if we are clipping to a given polygon get the clip_mask here
+            if clip:
+                clip_mask = ac.shared.polygon_crop(dct_prj, poly, return_sub=False, cache=setu['polygon_cache'])
+                clip_mask = clip_mask.astype(bool) == False
+
+            ## write lat/lon
+            if (output_geolocation):
+                if (os.path.exists(ofile) & (not new)):
+                    datasets = ac.shared.nc_datasets(ofile)
+                else:
+                    datasets = []
+                if ('lat' not in datasets) or ('lon' not in datasets):
+                    if verbosity > 1: print('Writing geolocation lon/lat')
+                    lon, lat = ac.shared.projection_geo(dct_prj, add_half_pixel=True)
+                    ac.output.nc_write(ofile, 'lon', lon, attributes=gatts, new=new, double=True, nc_projection=nc_projection,
+                                        netcdf_compression=setu['netcdf_compression'],
+                                        netcdf_compression_level=setu['netcdf_compression_level'])
+                    lon = None
+                    if verbosity > 1: print('Wrote lon')
+                    ac.output.nc_write(ofile, 'lat', lat, double=True,
+                                        netcdf_compression=setu['netcdf_compression'],
+                                        netcdf_compression_level=setu['netcdf_compression_level'])
+                    lat = None
+                    if verbosity > 1: print('Wrote lat')
+                    new=False
+
+            ## write x/y
+            if (output_xy):
+                if os.path.exists(ofile) & (not new):
+                    datasets = ac.shared.nc_datasets(ofile)
                 else:
-                    print('Using fixed 0.01 factor to convert Skysat DN to TOA radiance')
-                    ## convert to toa radiance & mask
-                    data = data.astype(float) * 0.01
+                    datasets = []
+                if ('x' not in datasets) or ('y' not in datasets):
+                    if verbosity > 1: print('Writing geolocation x/y')
+                    x, y = ac.shared.projection_geo(dct_prj, xy=True, add_half_pixel=True)
+                    ac.output.nc_write(ofile, 'x', x, new=new,
+                                        netcdf_compression=setu['netcdf_compression'],
+                                        netcdf_compression_level=setu['netcdf_compression_level'])
+                    x = None
+                    if verbosity > 1: print('Wrote x')
+                    ac.output.nc_write(ofile, 'y', y,
+                                        netcdf_compression=setu['netcdf_compression'],
+                                        netcdf_compression_level=setu['netcdf_compression_level'])
+                    y = None
+                    if verbosity > 1: print('Wrote y')
+                    new=False
+
+            ## convert bands
+            for b in rsr_bands:
+                if b in ['PAN']: continue
+                idx = int(meta['{}-band_idx'.format(b)])
+
+                ## read data
+                md, data = ac.shared.read_band(image_file, idx=idx, warp_to=warp_to, gdal_meta = True)
+                nodata = data == np.uint16(0)
+
+                if 'Skysat' in meta['sensor']:
+                    ## get reflectance scaling from tiff tags
+                    try:
+                        prop = json.loads(md['TIFFTAG_IMAGEDESCRIPTION'])['properties']
+                    except:
+                        prop = {}
 
-                    ## convert to toa reflectance
-                    f0 = gatts['{}_f0'.format(b)]/10
-                    data *= (np.pi * gatts['se_distance']**2) / (f0 * gatts['mus'])
-            else:
-                ## convert from radiance
-                if  (meta['sensor'] == 'RapidEye') | (from_radiance):
-                    data = data.astype(float) * float(meta['{}-{}'.format(b,'to_radiance')])
-                    f0 = gatts['{}_f0'.format(b)]/10
-                    data *= (np.pi * gatts['se_distance']**2) / (f0 * gatts['mus'])
+                    if 'reflectance_coefficients' in prop:
+                        ## convert to toa radiance & mask
+                        bi = idx - 1
+                        data = data.astype(float) * prop['reflectance_coefficients'][bi]
+                        data[nodata] = np.nan
+                    else:
+                        print('Using fixed 0.01 factor to convert Skysat DN to TOA radiance')
+                        ## convert to toa radiance & mask
+                        data = data.astype(float) * 0.01
+
+                        ## convert to toa reflectance
+                        f0 = gatts['{}_f0'.format(b)]/10
+                        data *= (np.pi * gatts['se_distance']**2) / (f0 * gatts['mus'])
                 else:
-                    data = data.astype(float) * float(meta['{}-{}'.format(b,'to_reflectance')])
-            data[nodata] = np.nan
-            print(data.shape)
-
-            ## clip to poly
-            if clip: data[clip_mask] = np.nan
-
-            ds = 'rhot_{}'.format(waves_names[b])
-            ds_att = {'wavelength':waves_mu[b]*1000}
-
-            if gains & (gains_dict is not None):
-                ds_att['toa_gain'] = gains_dict[b]
-                data *= ds_att['toa_gain']
-                if verbosity > 1: print('Converting bands: Applied TOA gain {} to {}'.format(ds_att['toa_gain'], ds))
-
-            if percentiles_compute:
-                ds_att['percentiles'] = percentiles
-                ds_att['percentiles_data'] = np.nanpercentile(data, percentiles)
-
-            ## write to netcdf file
-            ac.output.nc_write(ofile, ds, data, replace_nan=True, attributes=gatts,
-                                new=new, dataset_attributes = ds_att, nc_projection=nc_projection,
-                                netcdf_compression=setu['netcdf_compression'],
-                                netcdf_compression_level=setu['netcdf_compression_level'],
-                                netcdf_compression_least_significant_digit=setu['netcdf_compression_least_significant_digit'])
-            new = False
-            if verbosity > 1: print('Converting bands: Wrote {} ({})'.format(ds, data.shape))
-
-        if verbosity > 1:
-            print('Conversion took {:.1f} seconds'.format(time.time()-t0))
-            print('Created {}'.format(ofile))
-
-        if limit is not None: sub = None
-        if ofile not in ofiles: ofiles.append(ofile)
+                    ## convert from radiance
+                    if  (meta['sensor'] == 'RapidEye') | (from_radiance):
+                        data = data.astype(float) * float(meta['{}-{}'.format(b,'to_radiance')])
+                        f0 = gatts['{}_f0'.format(b)]/10
+                        data *= (np.pi * gatts['se_distance']**2) / (f0 * gatts['mus'])
+                    else:
+                        data = data.astype(float) * float(meta['{}-{}'.format(b,'to_reflectance')])
+                data[nodata] = np.nan
+                print(data.shape)
+
+                ## clip to poly
+                if clip: data[clip_mask] = np.nan
+
+                ds = 'rhot_{}'.format(waves_names[b])
+                ds_att = {'wavelength':waves_mu[b]*1000}
+
+                if gains & (gains_dict is not None):
+                    ds_att['toa_gain'] = gains_dict[b]
+                    data *= ds_att['toa_gain']
+                    if verbosity > 1: print('Converting bands: Applied TOA gain {} to {}'.format(ds_att['toa_gain'], ds))
+
+                if percentiles_compute:
+                    ds_att['percentiles'] = percentiles
+                    ds_att['percentiles_data'] = np.nanpercentile(data, percentiles)
+
+                ## write to netcdf file
+                ac.output.nc_write(ofile, ds, data, replace_nan=True, attributes=gatts,
+                                    new=new, dataset_attributes = ds_att, nc_projection=nc_projection,
+                                    netcdf_compression=setu['netcdf_compression'],
+                                    netcdf_compression_level=setu['netcdf_compression_level'],
+                                    netcdf_compression_least_significant_digit=setu['netcdf_compression_least_significant_digit'])
+                new = False
+                if verbosity > 1: print('Converting bands: Wrote {} ({})'.format(ds, data.shape))
+
+            if verbosity > 1:
+                print('Conversion took {:.1f} seconds'.format(time.time()-t0))
+                print('Created {}'.format(ofile))
+
+            if limit is not None: sub = None
+            if ofile not in ofiles: ofiles.append(ofile)
+        finally:
+            ## remove in memory warped files
+            if vsimem_dir is not None: ac.shared.vsimem_clear(vsimem_dir)
 
         ## remove the extracted bundle
         if zipped:
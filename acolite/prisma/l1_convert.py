@@ -5,6 +5,7 @@
 ## modifications: 2021-12-31 (QV) new handling of settings
 ##                2022-01-04 (QV) added netcdf compression
 ##                2022-02-23 (QV) added option to output L2C reflectances
+##                2026-10-19 (QV) added option to output rhot/Lt as (band, y, x) cubes
 
 def l1_convert(inputfile, output=None, settings = {}, verbosity=0):
     import numpy as np
@@ -200,6 +201,14 @@ def l1_convert(inputfile, output=None, settings = {}, verbosity=0):
                 vnir_l2c_data = f['HDFEOS']['SWATHS']['PRS_L2C_HCO']['Data Fields']['VNIR_Cube'][:]
                 swir_l2c_data = f['HDFEOS']['SWATHS']['PRS_L2C_HCO']['Data Fields']['SWIR_Cube'][:]
 
+        ## store TOA data in cubes and write them at once
+        hyper_cube = setu['hyper_cube_output']
+        if hyper_cube:
+            cube_shape = (len(bands), lat.shape[1], lat.shape[0])
+            cube_rhot = np.zeros(cube_shape, dtype=np.float32)
+            cube_lt = np.zeros(cube_shape, dtype=np.float32) if output_lt else None
+            cube_att = []
+
         ## write TOA data
         for bi, b in enumerate(bands):
             wi = bands[b]['index']
@@ -230,7 +239,12 @@ def l1_convert(inputfile, output=None, settings = {}, verbosity=0):
 
             ds_att = {k:bands[b][k] for k in bands[b] if k not in ['rsr']}
 
-            if output_lt:
+            if hyper_cube:
+                cube_att.append(ds_att)
+                if output_lt: cube_lt[bi] = np.flip(np.rot90(cdata_radiance))
+                cube_rhot[bi] = np.flip(np.rot90(cdata))
+                cdata_radiance, cdata = None, None
+            elif output_lt:
                 ## write toa radiance
                 ac.output.nc_write(ofile, 'Lt_{}'.format(bands[b]['wave_name']), np.flip(np.rot90(cdata_radiance)),
                               dataset_attributes = ds_att,
@@ -240,13 +254,14 @@ def l1_convert(inputfile, output=None, settings = {}, verbosity=0):
                 cdata_radiance = None
 
             ## write toa reflectance
-            ac.output.nc_write(ofile, 'rhot_{}'.format(bands[b]['wave_name']), np.flip(np.rot90(cdata)),
-                              dataset_attributes = ds_att,
-                              netcdf_compression=setu['netcdf_compression'],
-                              netcdf_compression_level=setu['netcdf_compression_level'],
-                              netcdf_compression_least_significant_digit=setu['netcdf_compression_least_significant_digit'])
-            cdata = None
-            print('Wrote rhot_{}'.format(bands[b]['wave_name']))
+            if not hyper_cube:
+                ac.output.nc_write(ofile, 'rhot_{}'.format(bands[b]['wave_name']), np.flip(np.rot90(cdata)),
+                                  dataset_attributes = ds_att,
+                                  netcdf_compression=setu['netcdf_compression'],
+                                  netcdf_compression_level=setu['netcdf_compression_level'],
+                                  netcdf_compression_least_significant_digit=setu['netcdf_compression_least_significant_digit'])
+                cdata = None
+                print('Wrote rhot_{}'.format(bands[b]['wave_name']))
 
             ## store L2C data
             if store_l2c & read_cube:
@@ -259,5 +274,17 @@ def l1_convert(inputfile, output=None, settings = {}, verbosity=0):
                 cdata_l2c = None
                 print('Wrote rhos_l2c_{}'.format(bands[b]['wave_name']))
 
+        ## write TOA cubes
+        if hyper_cube:
+            cube_waves = [bands[b]['wavelength'] for b in bands]
+            for ds, cube in [('Lt', cube_lt), ('rhot', cube_rhot)]:
+                if cube is None: continue
+                ac.output.nc_write(ofile, ds, cube, wavelength = cube_waves,
+                                  dataset_attributes = cube_att,
+                                  netcdf_compression=setu['netcdf_compression'],
+                                  netcdf_compression_level=setu['netcdf_compression_level'])
+                print('Wrote {} cube {}'.format(ds, cube.shape))
+            cube_lt, cube_rhot = None, None
+
         ofiles.append(ofile)
     return(ofiles, setu)
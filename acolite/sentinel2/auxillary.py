@@ -2,33 +2,46 @@
 ## reads auxillary data included from S2 PB004 onward
 ## written by Quinten Vanhellemont, RBINS
 ## 2021-11-27
-## modifications:
+## modifications: 2026-10-19 (QV) support for /vsizip/ and /vsitar/ bundles, aux files are copied to a temporary file for pygrib
 
 def auxillary(bundle, granule, sources = ['AUX_CAMSFO', 'AUX_ECMWFT'], key_name = 'cfVarName', reshape = False):
-    import os, pygrib
+    import os, shutil, tempfile, pygrib
+    import acolite as ac
 
     data = {}
     for source in sources:
         ## find aux grib files
         aux_file = '{}/GRANULE/{}/AUX_DATA/{}'.format(bundle, granule, source)
-        if not os.path.exists(aux_file): continue
+        if not ac.shared.vsi_exists(aux_file): continue
+
+        ## pygrib can not read from archives
+        tmp_file = None
+        if ac.shared.vsi_split(aux_file) is not None:
+            with ac.shared.vsi_open(aux_file, 'rb') as fi, \
+                 tempfile.NamedTemporaryFile(prefix='acolite_{}_'.format(source), delete=False) as fo:
+                shutil.copyfileobj(fi, fo)
+                tmp_file = fo.name
+            aux_file = tmp_file
 
         ## open grib file
-        with pygrib.open(aux_file) as gr:
-            for ig, g in enumerate(gr):
-                grb = gr.select()[ig]
-                grb['stepRange'] = 's' # change stepRange to avoid errors - is "s" correct?
+        try:
+            with pygrib.open(aux_file) as gr:
+                for ig, g in enumerate(gr):
+                    grb = gr.select()[ig]
+                    grb['stepRange'] = 's' # change stepRange to avoid errors - is "s" correct?
 
-                ## read datasets for this parameter
-                data[grb[key_name]] = {}
-                for k in grb.keys():
-                    try:
-                        data[grb[key_name]][k] = grb[k]
-                    except:
-                        pass
+                    ## read datasets for this parameter
+                    data[grb[key_name]] = {}
+                    for k in grb.keys():
+                        try:
+                            data[grb[key_name]][k] = grb[k]
+                        except:
+                            pass
 
-                ## reshape longitudes and latitudes
-                if reshape:
-                    data[grb[key_name]]['longitudes'] = data[grb[key_name]]['longitudes'].reshape(int(grb['Ni']),int(grb['Nj']))
-                    data[grb[key_name]]['latitudes'] = data[grb[key_name]]['latitudes'].reshape(int(grb['Ni']),int(grb['Nj']))
+                    ## reshape longitudes and latitudes
+                    if reshape:
+                        data[grb[key_name]]['longitudes'] = data[grb[key_name]]['longitudes'].reshape(int(grb['Ni']),int(grb['Nj']))
+                        data[grb[key_name]]['latitudes'] = data[grb[key_name]]['latitudes'].reshape(int(grb['Ni']),int(grb['Nj']))
+        finally:
+            if tmp_file is not None: os.remove(tmp_file)
     return(data)
@@ -6,6 +6,9 @@
 #                 2021-10-14 (QV) fixed band specific footprints for band specific geometry for PB004
 ##                2021-12-08 (QV) added nc_projection
 ##                2021-12-31 (QV) new handling of settings
+##                2026-10-19 (QV) added polylakes_spatial_index
+##                2026-10-19 (QV) added polygon_cache
+##                2026-10-19 (QV) read bundles from zip/tar archives with vsi paths
 
 def l1_convert(inputfile, output = None, settings = {},
                 percentiles_compute = True,
@@ -106,7 +109,7 @@ def l1_convert(inputfile, output = None, settings = {},
             limit=setu['limit']
             ## check if ROI polygon is given
             if setu['polylakes']:
-                poly = ac.shared.polylakes(setu['polylakes_database'])
+                poly = ac.shared.polylakes(setu['polylakes_database'], spatial_index=setu['polylakes_spatial_index'])
                 setu['polygon_limit'] = False
             else:
                 poly = setu['polygon']
@@ -114,7 +117,7 @@ def l1_convert(inputfile, output = None, settings = {},
             if poly is not None:
                 if os.path.exists(poly):
                     try:
-                        limit = ac.shared.polygon_limit(poly)
+                        limit = ac.shared.polygon_limit(poly, cache=setu['polygon_cache'])
                         if setu['polygon_limit']:
                             print('Using limit from polygon envelope: {}'.format(limit))
                         else:
@@ -317,7 +320,7 @@ def l1_convert(inputfile, output = None, settings = {},
 
         ## if we are clipping to a given polygon get the clip_mask here
         if clip:
-            clip_mask = ac.shared.polygon_crop(dct_prj, poly, return_sub=False)
+            clip_mask = ac.shared.polygon_crop(dct_prj, poly, return_sub=False, cache=setu['polygon_cache'])
             clip_mask = clip_mask.astype(bool) == False
             print('clip mask', clip_mask.shape)
 
@@ -366,10 +369,10 @@ def l1_convert(inputfile, output = None, settings = {},
                 ## use s2 5x5 km grids with detector footprint interpolation
                 if geometry_type == 'grids_footprint':
                     ## compute vza and saa
-                    gml_files = glob.glob('{}/GRANULE/{}/QI_DATA/*MSK_DETFOO*.gml'.format(bundle, granule))
+                    gml_files = ac.shared.vsi_glob('{}/GRANULE/{}/QI_DATA/*MSK_DETFOO*.gml'.format(bundle, granule))
                     gml_files.sort()
 
-                    jp2_files = glob.glob('{}/GRANULE/{}/QI_DATA/*MSK_DETFOO*.jp2'.format(bundle, granule))
+                    jp2_files = ac.shared.vsi_glob('{}/GRANULE/{}/QI_DATA/*MSK_DETFOO*.jp2'.format(bundle, granule))
                     jp2_files.sort()
 
                     ## get detector footprint for 10/20/60 m band
@@ -421,7 +424,7 @@ def l1_convert(inputfile, output = None, settings = {},
                                                           target_mask = det_mask, target_mask_full=False, method='linear')
 
                 ## use target band so we can just do the 60 metres geometry
-                if os.path.exists(target_file):
+                if ac.shared.vsi_exists(target_file):
                     sza = ac.shared.warp_from_source(target_file, dct_prj, sza, warp_to=warp_to) # alt (dct, dct_prj, sza)
                     saa = ac.shared.warp_from_source(target_file, dct_prj, saa, warp_to=warp_to)
                     vza = ac.shared.warp_from_source(target_file, dct_prj, vza, warp_to=warp_to)
@@ -444,9 +447,9 @@ def l1_convert(inputfile, output = None, settings = {},
 
                     ## use footprint from B1
                     if geometry_fixed_footprint:
-                        gml_files = glob.glob('{}/GRANULE/{}/QI_DATA/*MSK_DETFOO*.gml'.format(bundle, granule))
+                        gml_files = ac.shared.vsi_glob('{}/GRANULE/{}/QI_DATA/*MSK_DETFOO*.gml'.format(bundle, granule))
                         gml_files.sort()
-                        jp2_files = glob.glob('{}/GRANULE/{}/QI_DATA/*MSK_DETFOO*.jp2'.format(bundle, granule))
+                        jp2_files = ac.shared.vsi_glob('{}/GRANULE/{}/QI_DATA/*MSK_DETFOO*.jp2'.format(bundle, granule))
                         jp2_files.sort()
 
                         ## get detector footprint for 10/20/60 m band
@@ -463,8 +466,8 @@ def l1_convert(inputfile, output = None, settings = {},
 
                         ## band specific footprint
                         if not geometry_fixed_footprint:
-                            gml = glob.glob('{}/GRANULE/{}/QI_DATA/*MSK_DETFOO_B{}.gml'.format(bundle, granule, Bn[1:].zfill(2)))
-                            jp2 = glob.glob('{}/GRANULE/{}/QI_DATA/*MSK_DETFOO_B{}.jp2'.format(bundle, granule, Bn[1:].zfill(2)))
+                            gml = ac.shared.vsi_glob('{}/GRANULE/{}/QI_DATA/*MSK_DETFOO_B{}.gml'.format(bundle, granule, Bn[1:].zfill(2)))
+                            jp2 = ac.shared.vsi_glob('{}/GRANULE/{}/QI_DATA/*MSK_DETFOO_B{}.jp2'.format(bundle, granule, Bn[1:].zfill(2)))
 
                             if len(gml) > 0:
                                 dval, dfoo = ac.sentinel2.detector_footprint(target_file, gml[0])
@@ -703,7 +706,7 @@ def l1_convert(inputfile, output = None, settings = {},
         for bi, b in enumerate(rsr_bands):
             Bn = 'B{}'.format(b)
             if Bn not in safe_files[granule]: continue
-            if os.path.exists(safe_files[granule][Bn]['path']):
+            if ac.shared.vsi_exists(safe_files[granule][Bn]['path']):
                 if b in waves_names:
                     data = ac.shared.read_band(safe_files[granule][Bn]['path'], sub=sub, warp_to=warp_to)
                     data_mask = data == nodata
@@ -7,6 +7,7 @@
 ##                2020-10-28 (QV) fill nans in angles grids
 ##                2021-02-11 (QV) adapted for acolite-gen, renamed from granule_meta
 ##                2021-02-17 (QV) added fillnan keyword, added per detector grids, renamed safe_tile_grid
+##                2026-10-19 (QV) added reading from zip/tar archives
 
 def metadata_granule(metafile, fillnan=False):
     import dateutil.parser
@@ -17,7 +18,7 @@ def metadata_granule(metafile, fillnan=False):
     import copy
 
     try:
-        xmldoc = minidom.parse(metafile)
+        xmldoc = minidom.parse(ac.shared.vsi_open(metafile, 'rb'))
     except:
         print('Error opening metadata file.')
         sys.exit()
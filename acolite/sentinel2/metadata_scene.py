@@ -10,16 +10,18 @@
 ##                2021-02-11 (QV) adapted for acolite-gen, renamed from scene_meta
 ##                2021-10-13 (QV) adapted for new processing baseline which includes TOA offsets
 ##                2022-05-17 (QV) adapted for processing older N0201 files
+##                2026-10-19 (QV) added reading from zip/tar archives
 
 def metadata_scene(metafile):
     import dateutil.parser
     from xml.dom import minidom
+    import acolite as ac
 
     #from acolite.shared import distance_se
     import numpy as np
 
     try:
-        xmldoc = minidom.parse(metafile)
+        xmldoc = minidom.parse(ac.shared.vsi_open(metafile, 'rb'))
     except:
         print('Error opening metadata file.')
         sys.exit()
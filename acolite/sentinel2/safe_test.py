@@ -6,11 +6,13 @@
 ##                  2018-04-17 (QV) added check for . files and continue on length of split failure
 ##                  2018-04-18 (QV) added check for . files in GRANULE
 ##                  2018-06-07 (QV) added check for jp2 for band files
+##                  2026-10-19 (QV) added listing of zip/tar archives
 
 def safe_test(file):
     import os
+    import acolite as ac
 
-    files = os.listdir(file)
+    files = ac.shared.vsi_listdir(file)
     datafiles = {}
     for i, fname in enumerate(files):
         tmp = fname.split('.')
@@ -22,7 +24,7 @@ def safe_test(file):
             
         ## granules
         if (fname == 'GRANULE'):
-            granules = os.listdir(path)
+            granules = ac.shared.vsi_listdir(path)
             
             datafiles['granules'] = [] #granules
             for granule in granules:
@@ -34,7 +36,7 @@ def safe_test(file):
                 date = split[-1]
                 path = '{}/{}/{}/'.format(file,fname,granule)
 
-                granule_files = os.listdir(path)
+                granule_files = ac.shared.vsi_listdir(path)
                 for j, grfname in enumerate(granule_files):
                     tmp = grfname.split('.')
                     path = '{}/{}/{}/{}'.format(file,fname,granule,grfname)
@@ -45,7 +47,7 @@ def safe_test(file):
                                                     "fname":grfname}
                     ## band files
                     if (grfname == 'IMG_DATA'):
-                        bands = os.listdir('{}/{}/{}/{}/'.format(file,fname,granule,grfname))
+                        bands = ac.shared.vsi_listdir('{}/{}/{}/{}/'.format(file,fname,granule,grfname))
                         for band in bands:
                             if band[0] == '.': continue
                             if band[-3:] != 'jp2': continue
@@ -1,5 +1,7 @@
 from .olci_sub import *
 from .olci_band_info import *
 from .meris_band_info import *
+from .tpg_interp import *
+from .smile_correction import *
 
 from .l1_convert import *
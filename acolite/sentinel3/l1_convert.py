@@ -5,6 +5,8 @@
 ## modifications: 2021-12-22 (QV) added MERIS processing
 ##                2021-12-31 (QV) new handling of settings
 ##                2022-01-04 (QV) added netcdf compression
+##                2026-10-19 (QV) added bilinear tpg interpolation and vectorized smile correction
+##                2026-10-19 (QV) added polygon_cache
 
 def l1_convert(inputfile, output = None, settings = {},
                 percentiles_compute = True,
@@ -57,6 +59,8 @@ def l1_convert(inputfile, output = None, settings = {},
         ## extract sensor specific settings
         smile_correction = setu['smile_correction']
         use_tpg = setu['use_tpg']
+        smile_correction_method = setu['smile_correction_method']
+        tpg_interpolation = setu['tpg_interpolation']
         use_gains = setu['gains']
         gains = setu['gains_toa']
 
@@ -73,7 +77,7 @@ def l1_convert(inputfile, output = None, settings = {},
         if poly is not None:
             if os.path.exists(poly):
                 try:
-                    limit = ac.shared.polygon_limit(poly)
+                    limit = ac.shared.polygon_limit(poly, cache=setu['polygon_cache'])
                     if verbosity > 1: print('Using limit from polygon envelope: {}'.format(limit))
                     clip = True
                 except:
@@ -166,8 +170,7 @@ def l1_convert(inputfile, output = None, settings = {},
                     if meta[k][l].shape != tpg_shape:
                         print('{}-{} tpg shape {} not supported'.format(k,l,meta[k][l].shape))
                         continue
-                    z = scipy.interpolate.interp2d(tpx, tpy, meta[k][l])
-                    tpg[l] = z(subx,suby)
+                    tpg[l] = ac.sentinel3.tpg_interp(meta[k][l], tpx, tpy, subx, suby, method=tpg_interpolation)
 
         ## compute relative azimuth TPG
         tpg['RAA'] = abs(tpg['SAA']-tpg['OAA'])
@@ -207,55 +210,8 @@ def l1_convert(inputfile, output = None, settings = {},
         ## smile correction - from l2gen smile.c
         if verbosity > 1: print('Running smile correction')
         if smile_correction:
-            smile = {}
-            for band in bands_data:
-                ## dataset name
-                dname = '{}_radiance'.format(band)
-
-                ## band index
-                b_i = bands_data[band]['band']-1
-
-                ## gas_correction:
-                data['{}_radiance'.format(band)]/=ttg['tt_gas'][band]
-
-                if verbosity > 2: print('{} - Smile correction for band {} {} nm'.format(datetime.datetime.now().isoformat()[0:19], band, bands_data[band]['wavelength'] ), end='\n')
-
-                ## bounding bands
-                b1_i = bands_data[band]['lower_water']-1
-                b2_i = bands_data[band]['upper_water']-1
-                band1 = '{}{}'.format(band_id, str(bands_data[band]['lower_water']).zfill(2))
-                band2 = '{}{}'.format(band_id, str(bands_data[band]['upper_water']).zfill(2))
-
-                ## compute reflectance using per detector F0
-                r_ = (data['{}_radiance'.format(band)]) / meta['instrument_data']['solar_flux'][b_i][di]
-
-                ## based on that reflectance, compute radiance for target F0
-                r_ *= bands_data[band]['E0']
-
-                ## difference in radiance
-                smile[band] = r_-data['{}_radiance'.format(band)]
-                del r_ ## free memory
-
-                ## do additional correction based on two bounding bands
-                ## currently applying water everywhere
-                if bands_data[band]['switch_water'] > 0:
-                    if verbosity > 2: print('{} - Smile correction - bounding bands {}/{}'.format(datetime.datetime.now().isoformat()[0:19], band1, band2), end='\n')
-
-                    ## compute per pixel reflectance difference for bounding bands
-                    r21_diff = (data['{}_radiance'.format(band2)]) / meta['instrument_data']['solar_flux'][b2_i][di]-\
-                               (data['{}_radiance'.format(band1)]) / meta['instrument_data']['solar_flux'][b1_i][di]
-
-                    ## wavelength difference ratio
-                    wdiff_ratio = (bands_data[band]['wavelength'] - meta['instrument_data']['lambda0'][b_i][di])/\
-                                  (meta['instrument_data']['lambda0'][b2_i][di] - meta['instrument_data']['lambda0'][b1_i][di])
-
-                    ## additional smile
-                    smile[band] += (r21_diff)*(wdiff_ratio)*(meta['instrument_data']['solar_flux'][b_i][di])
-                    del r21_diff, wdiff_ratio
-
-            ## add smile effect to radiance data
-            for band in smile: data['{}_radiance'.format(band)]+=smile[band]
-            del smile
+            ac.sentinel3.smile_correction(data, bands_data, meta['instrument_data'], di, ttg['tt_gas'], band_id,
+                                          method=smile_correction_method, verbosity=verbosity)
         ## end smile correction
 
         ## global attributes
@@ -0,0 +1,130 @@
+## def smile_correction
+## applies gas and smile correction to OLCI/MERIS radiance data - from l2gen smile.c
+## data is the dict of '{band}_radiance' arrays, which are updated in place
+## instrument_data is the dict read from instrument_data.nc, di the per pixel detector index
+## method 'vectorized' processes all bands as one cube in blocks of block_rows rows
+## method 'per_band' is the original band by band implementation
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+def smile_correction(data, bands_data, instrument_data, di, tt_gas, band_id,
+                     method = 'vectorized', block_rows = 256, verbosity = 0):
+    import datetime
+    import numpy as np
+
+    if method == 'per_band':
+        smile = {}
+        for band in bands_data:
+            ## band index
+            b_i = bands_data[band]['band']-1
+
+            ## gas_correction:
+            data['{}_radiance'.format(band)]/=tt_gas[band]
+
+            if verbosity > 2: print('{} - Smile correction for band {} {} nm'.format(datetime.datetime.now().isoformat()[0:19], band, bands_data[band]['wavelength'] ), end='\n')
+
+            ## bounding bands
+            b1_i = bands_data[band]['lower_water']-1
+            b2_i = bands_data[band]['upper_water']-1
+            band1 = '{}{}'.format(band_id, str(bands_data[band]['lower_water']).zfill(2))
+            band2 = '{}{}'.format(band_id, str(bands_data[band]['upper_water']).zfill(2))
+
+            ## compute reflectance using per detector F0
+            r_ = (data['{}_radiance'.format(band)]) / instrument_data['solar_flux'][b_i][di]
+
+            ## based on that reflectance, compute radiance for target F0
+            r_ *= bands_data[band]['E0']
+
+            ## difference in radiance
+            smile[band] = r_-data['{}_radiance'.format(band)]
+            del r_ ## free memory
+
+            ## do additional correction based on two bounding bands
+            ## currently applying water everywhere
+            if bands_data[band]['switch_water'] > 0:
+                if verbosity > 2: print('{} - Smile correction - bounding bands {}/{}'.format(datetime.datetime.now().isoformat()[0:19], band1, band2), end='\n')
+
+                ## compute per pixel reflectance difference for bounding bands
+                r21_diff = (data['{}_radiance'.format(band2)]) / instrument_data['solar_flux'][b2_i][di]-\
+                           (data['{}_radiance'.format(band1)]) / instrument_data['solar_flux'][b1_i][di]
+
+                ## wavelength difference ratio
+                wdiff_ratio = (bands_data[band]['wavelength'] - instrument_data['lambda0'][b_i][di])/\
+                              (instrument_data['lambda0'][b2_i][di] - instrument_data['lambda0'][b1_i][di])
+
+                ## additional smile
+                smile[band] += (r21_diff)*(wdiff_ratio)*(instrument_data['solar_flux'][b_i][di])
+                del r21_diff, wdiff_ratio
+
+        ## add smile effect to radiance data
+        for band in smile: data['{}_radiance'.format(band)]+=smile[band]
+        del smile
+        return
+
+    ## band indices and constants
+    bands = [band for band in bands_data]
+    dnames = ['{}_radiance'.format(band) for band in bands]
+    b_i = np.asarray([bands_data[band]['band']-1 for band in bands])
+    sw = np.where(np.asarray([bands_data[band]['switch_water'] for band in bands]) > 0)[0]
+    b1_i = np.asarray([bands_data[bands[i]]['lower_water']-1 for i in sw], dtype=int)
+    b2_i = np.asarray([bands_data[bands[i]]['upper_water']-1 for i in sw], dtype=int)
+    ## cube positions of the bounding bands
+    cube_index = {bi: i for i, bi in enumerate(b_i)}
+    c1 = np.asarray([cube_index[bi] for bi in b1_i], dtype=int)
+    c2 = np.asarray([cube_index[bi] for bi in b2_i], dtype=int)
+    e0 = np.asarray([bands_data[band]['E0'] for band in bands])[:, None]
+    wave = np.asarray([bands_data[band]['wavelength'] for band in bands])[sw, None]
+    tt = np.asarray([tt_gas[band] for band in bands])
+
+    ## as in the per band implementation the bounding bands are only
+    ## gas corrected when they precede or are the current band
+    tt1 = np.where(c1 <= sw, tt[c1], 1.0)[:, None]
+    tt2 = np.where(c2 <= sw, tt[c2], 1.0)[:, None]
+    tt = tt[:, None]
+
+    ## the corrected radiance is linear in the radiances of the band and its bounding bands
+    ## rad_c = rad * E0/(tt*F0) + rad2 * w/(tt2*F0_2) - rad1 * w/(tt1*F0_1)
+    ## with w = F0 * (wave - lambda0)/(lambda0_2 - lambda0_1)
+    ## so the coefficients are computed once per detector and looked up per pixel
+    solar_flux = np.asarray(instrument_data['solar_flux'], dtype=np.float64)
+    lambda0 = np.asarray(instrument_data['lambda0'], dtype=np.float64)
+    coef = e0 / (tt * solar_flux[b_i])
+    if len(sw) > 0:
+        w = solar_flux[b_i[sw]] * (wave - lambda0[b_i[sw]]) / (lambda0[b2_i] - lambda0[b1_i])
+        coef1 = w / (tt1 * solar_flux[b1_i])
+        coef2 = w / (tt2 * solar_flux[b2_i])
+        del w
+
+    ## compute in the radiance precision
+    dtype = data[dnames[0]].dtype
+    if not np.issubdtype(dtype, np.floating): dtype = np.float32
+    coef = coef.astype(dtype)
+    if len(sw) > 0: coef1, coef2 = coef1.astype(dtype), coef2.astype(dtype)
+    di = np.asarray(di)
+
+    nrows, ncols = data[dnames[0]].shape
+    for r0 in range(0, nrows, block_rows):
+        r1 = min(nrows, r0+block_rows)
+        if verbosity > 2: print('{} - Smile correction for rows {}-{}'.format(datetime.datetime.now().isoformat()[0:19], r0, r1), end='\n')
+
+        ## radiance cube and mask
+        rad = np.empty((len(bands), r1-r0, ncols), dtype=dtype)
+        mask = np.empty((len(bands), r1-r0, ncols), dtype=bool)
+        for i, d in enumerate(dnames):
+            rad[i] = np.ma.getdata(data[d][r0:r1])
+            mask[i] = np.ma.getmaskarray(data[d][r0:r1])
+
+        ## gas and smile corrected radiance
+        dib = di[r0:r1]
+        radc = rad * coef[:, dib]
+
+        ## additional correction based on two bounding bands
+        if len(sw) > 0:
+            radc[sw] += rad[c2] * coef2[:, dib]
+            radc[sw] -= rad[c1] * coef1[:, dib]
+            mask[sw] |= mask[c1] | mask[c2]
+
+        for i, d in enumerate(dnames):
+            data[d][r0:r1] = np.ma.masked_array(radc[i], mask=mask[i])
+        del mask, rad, radc
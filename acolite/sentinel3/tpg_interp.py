@@ -0,0 +1,33 @@
+## def tpg_interp
+## bilinear interpolation of tie point grids to the requested pixel positions
+## tpg can be a single grid (ny, nx) or a stack of grids (n, ny, nx)
+## tpx and tpy are the (increasing) tie point pixel coordinates, x and y the output pixel coordinates
+## values outside the tie point domain are clamped to the edge, as the nearest extrapolation of interp2d
+## method 'interp2d' is the reference with scipy RegularGridInterpolator on clamped coordinates,
+## as scipy.interpolate.interp2d was removed in SciPy 1.14, for a single grid only
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) interp2d method with RegularGridInterpolator
+
+def tpg_interp(tpg, tpx, tpy, x, y, method = 'bilinear'):
+    import numpy as np
+
+    if method == 'interp2d':
+        from scipy.interpolate import RegularGridInterpolator
+        z = RegularGridInterpolator((np.asarray(tpy, dtype=np.float64), np.asarray(tpx, dtype=np.float64)), tpg)
+        yc, xc = np.meshgrid(np.clip(y, tpy[0], tpy[-1]), np.clip(x, tpx[0], tpx[-1]), indexing='ij')
+        return(z((yc, xc)))
+
+    tpg = np.asarray(tpg)
+    tpx, tpy = np.asarray(tpx, dtype=np.float64), np.asarray(tpy, dtype=np.float64)
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+
+    ## left tie point index and weight of the right tie point for each output column/row
+    ix = np.clip(np.searchsorted(tpx, x, side='right')-1, 0, len(tpx)-2)
+    wx = np.clip((x-tpx[ix])/(tpx[ix+1]-tpx[ix]), 0, 1)
+    iy = np.clip(np.searchsorted(tpy, y, side='right')-1, 0, len(tpy)-2)
+    wy = np.clip((y-tpy[iy])/(tpy[iy+1]-tpy[iy]), 0, 1)[:, None]
+
+    ## separable: interpolate tie point rows along x, then along y
+    rows = tpg[..., ix] * (1-wx) + tpg[..., ix+1] * wx
+    return(rows[..., iy, :] * (1-wy) + rows[..., iy+1, :] * wy)
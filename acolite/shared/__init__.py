@@ -5,6 +5,9 @@ from .rsr_write import *
 from .rsr_dict import *
 from .rsr_convolute_dict import *
 from .rsr_convolute_nd import *
+from .rsr_matrix import *
+from .rsr_hyper_matrix import *
+from .rsr_convolute_matrix import *
 
 from .projection_sub import *
 from .projection_geo import *
@@ -20,11 +23,14 @@ from .nc_read import *
 from .nc_write import *
 from .nc_read_projection import *
 from .nc_extract_point import *
+from .nc_point_index import *
+from .nc_extract_points import *
 
 from .read_band import *
 from .lutnc_import import *
 from .lutnc_write import *
 from .datascl import *
+from .quicklook_png import *
 from .closest_idx import *
 from .isodate_to_yday import *
 from .download_file import *
@@ -48,8 +54,12 @@ from .image_resolution import *
 from .warp_and_merge import *
 from .warp_from_source import *
 from .warp_inputfile import *
+from .vsimem_clear import *
+from .vsi_path import *
 from .polygon_crop import *
 from .polygon_limit import *
+from .polygon_index import *
+from .polygon_cache import *
 from .reproject2 import *
 
 from .similarity_read import *
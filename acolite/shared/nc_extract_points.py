@@ -0,0 +1,111 @@
+## def nc_extract_points
+## extracts data from an ACOLITE NetCDF file for a list of lon, lat positions
+## the file is opened once, and only the box around each point is read from each dataset
+## pixel positions are found with a geolocation index cached per product grid (see nc_point_index)
+## method and add_half_pixel are passed to nc_point_index
+## returns a list with for each point a dict as returned by nc_extract_point, or None if the point is not in the scene
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) added add_half_pixel
+
+def nc_extract_points(ncf, st_lon, st_lat, extract_datasets = None, box_size = 1, shift_edge = False,
+                      method = 'auto', add_half_pixel = False, verbosity = 0):
+    import time
+    import acolite as ac
+    import numpy as np
+    from netCDF4 import Dataset
+
+    if (box_size & 1) == 0:
+        print('Box size has to be odd.')
+        return()
+
+    t0 = time.time()
+    st_lon = np.atleast_1d(np.asarray(st_lon, dtype=np.float64))
+    st_lat = np.atleast_1d(np.asarray(st_lat, dtype=np.float64))
+
+    ## read netcdf attributes and datasets
+    gatts = ac.shared.nc_gatts(ncf)
+    datasets = ac.shared.nc_datasets(ncf)
+    for ds in ['transverse_mercator', 'x', 'y']:
+        if ds in datasets:
+            datasets.remove(ds)
+    if 'projection_key' in gatts:
+        if gatts['projection_key'] in datasets: datasets.remove(gatts['projection_key'])
+
+    ## find datasets to extract
+    dataset_list = []
+    if extract_datasets == None:
+        dataset_list += datasets
+    else:
+        if type(extract_datasets) is not list:
+            extract_datasets = [extract_datasets]
+        for par in ['rhot', 'rhos', 'rhow', 'Rrs']:
+            if (par in extract_datasets) or ('{}_*'.format(par) in extract_datasets):
+                dataset_list += [ds for ds in datasets if '{}_'.format(par) in ds]
+        for ds in extract_datasets:
+            if ds in dataset_list: continue
+            if ds not in datasets: continue
+            dataset_list.append(ds)
+    if len(dataset_list) == 0: return()
+
+    ## find pixels
+    idx = ac.shared.nc_point_index(ncf, method=method, add_half_pixel=add_half_pixel)
+    pi, pj = ac.shared.nc_point_lookup(idx, st_lon, st_lat)
+    dims = idx['dims']
+
+    results = []
+    with Dataset(ncf) as nc:
+        for p in range(len(st_lon)):
+            i, j = pi[p], pj[p]
+            if i < 0:
+                if verbosity > 0: print('Point {}N {}E not in scene {}'.format(st_lat[p], st_lon[p], ncf))
+                results.append(None)
+                continue
+
+            ## box position, same edge handling as nc_extract_point
+            hbox = int(box_size/2)
+            i0, j0 = i - hbox, j - hbox
+            edge = False
+            if box_size > 1:
+                if (i0 < 0) | ((i0 + box_size) > dims[0]-1) | (j0 < 0) | ((j0 + box_size) > dims[1]-1):
+                    edge = True
+                    if shift_edge:
+                        i0 = min(max(0, i0), dims[0]-1 - box_size)
+                        j0 = min(max(0, j0), dims[1]-1 - box_size)
+                        if verbosity > 0: print('Point at the edge of scene, setting i0, j0 to {}, {} for extracting box'.format(i0, j0))
+                    else:
+                        if verbosity > 0: print('Point at the edge of scene, cannot extract {}x{} box'.format(box_size, box_size))
+                        results.append(None)
+                        continue
+
+            ## extract data
+            if box_size == 1:
+                sub = {ds: nc.variables[ds][i, j] for ds in dataset_list}
+            else:
+                sub = {ds: nc.variables[ds][i0:i0+box_size, j0:j0+box_size] for ds in dataset_list}
+
+            ## create return dict
+            dct = {}
+            dct['gatts'] = gatts
+            dct['data'] = sub
+            dct['point'] = (float(st_lon[p]), float(st_lat[p]))
+            dct['pixel'] = (int(i), int(j))
+            dct['edge'] = edge
+
+            ## store common spectral datasets and centre wavelengths
+            dct['datasets'] = list(dct['data'].keys())
+            for par in ['rhot', 'rhos', 'rhow', 'Rrs']:
+                dct['{}_datasets'.format(par)] = [ds for ds in dct['datasets'] if '{}_'.format(par) in ds]
+                dct['{}_wave'.format(par)] = [int(ds.split('_')[-1]) for ds in dct['{}_datasets'.format(par)]]
+
+            if box_size > 1:
+                dct['mean'] = {ds: np.nanmean(dct['data'][ds]) for ds in dct['data']}
+                dct['std'] = {ds: np.nanstd(dct['data'][ds]) for ds in dct['data']}
+                dct['median'] = {ds: np.nanmedian(dct['data'][ds]) for ds in dct['data']}
+                dct['n'] = {ds: np.count_nonzero(~np.isnan(dct['data'][ds])) for ds in dct['data']}
+            results.append(dct)
+
+    if verbosity > 1:
+        dt = time.time()-t0
+        print('Extracted {} points from {} in {:.2f}s ({:.1f} points/s)'.format(len(st_lon), ncf, dt, len(st_lon)/dt if dt > 0 else np.inf))
+    return(results)
@@ -0,0 +1,98 @@
+## def nc_point_index
+## geolocation index to find pixel positions for lon, lat points in ACOLITE NetCDF files
+## method 'kdtree' (default, also used for 'auto') uses a KD-tree of the lon, lat datasets,
+## nearest pixel in degrees as in nc_extract_point
+## method 'projection' uses the inverse of the projected grid (xrange, yrange, pixel_size, proj4_string attributes)
+## and returns the pixel with the nearest lon, lat position in the projected grid
+## lon, lat are at the pixel corners (add_half_pixel=False, e.g. Landsat) or centres (add_half_pixel=True, e.g. Sentinel-2)
+## depending on the converter, and add_half_pixel should match it to give the same pixels as nc_extract_point
+## indices are cached in memory per product grid, so files on the same grid (e.g. L2R and L2W) share the index
+## KD-tree indices are keyed on a sample of the lon, lat datasets, to avoid hashing the full arrays
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) use kdtree for auto, added add_half_pixel for the projection method
+
+## grid keys per (path, size, mtime) and indices per grid key
+_point_index_files = {}
+_point_indices = {}
+_point_indices_max = 16
+
+def nc_point_index(ncf, method = 'auto', add_half_pixel = False):
+    import os, hashlib
+    import acolite as ac
+    import numpy as np
+    from netCDF4 import Dataset
+
+    if method == 'auto': method = 'kdtree'
+    stat = (os.path.abspath(ncf), os.path.getsize(ncf), os.path.getmtime(ncf), method, add_half_pixel)
+    if stat in _point_index_files:
+        key = _point_index_files[stat]
+        if key in _point_indices: return(_point_indices[key])
+
+    gatts = ac.shared.nc_gatts(ncf)
+    with Dataset(ncf) as nc:
+        dims = nc.variables['lat'].shape if 'lat' in nc.variables else (gatts['ydim'], gatts['xdim'])
+
+    if method == 'projection':
+        tags = ['xrange', 'yrange', 'pixel_size', 'proj4_string']
+        if not all([t in gatts for t in tags]):
+            print('No projection attributes in {}, using kdtree'.format(ncf))
+            return(nc_point_index(ncf, method = 'kdtree'))
+        key = ('projection', tuple(dims), repr([gatts[t] for t in tags]), add_half_pixel)
+        if key not in _point_indices:
+            from pyproj import Proj
+            idx = {'method': method, 'dims': tuple(dims), 'proj': Proj(gatts['proj4_string']),
+                   'add_half_pixel': add_half_pixel}
+            for t in ['xrange', 'yrange', 'pixel_size']: idx[t] = [float(v) for v in gatts[t]]
+    else:
+        from scipy.spatial import cKDTree
+        lon = np.ma.filled(ac.shared.nc_data(ncf, 'lon').astype(np.float64), np.nan)
+        lat = np.ma.filled(ac.shared.nc_data(ncf, 'lat').astype(np.float64), np.nan)
+        ## key on a sample of about 4096 positions spread over the scene
+        sample = np.linspace(0, lon.size-1, min(lon.size, 4096)).astype(int)
+        h = hashlib.sha1(lon.ravel()[sample].tobytes())
+        h.update(lat.ravel()[sample].tobytes())
+        key = ('kdtree', tuple(dims), h.hexdigest())
+        if key not in _point_indices:
+            valid = np.where(np.isfinite(lon.ravel()) & np.isfinite(lat.ravel()))[0]
+            idx = {'method': method, 'dims': tuple(dims), 'valid': valid,
+                   'tree': cKDTree(np.column_stack((lon.ravel()[valid], lat.ravel()[valid]))),
+                   'lonrange': (np.nanmin(lon), np.nanmax(lon)), 'latrange': (np.nanmin(lat), np.nanmax(lat))}
+        lon, lat = None, None
+
+    if key not in _point_indices:
+        ## remove oldest index
+        if len(_point_indices) >= _point_indices_max: _point_indices.pop(next(iter(_point_indices)))
+        _point_indices[key] = idx
+    _point_index_files[stat] = key
+    return(_point_indices[key])
+
+## returns row and column indices for lon, lat arrays, -1 for points outside the scene
+def nc_point_lookup(idx, st_lon, st_lat):
+    import numpy as np
+    st_lon = np.atleast_1d(np.asarray(st_lon, dtype=np.float64))
+    st_lat = np.atleast_1d(np.asarray(st_lat, dtype=np.float64))
+    pi = np.zeros(len(st_lon), dtype=int) - 1
+    pj = np.zeros(len(st_lon), dtype=int) - 1
+
+    if idx['method'] == 'projection':
+        x, y = idx['proj'](st_lon, st_lat)
+        ## position in pixels from the grid corner
+        xp = (np.asarray(x) - idx['xrange'][0]) / idx['pixel_size'][0]
+        yp = (np.asarray(y) - idx['yrange'][0]) / idx['pixel_size'][1]
+        sub = np.where((yp >= 0) & (yp < idx['dims'][0]) & (xp >= 0) & (xp < idx['dims'][1]))
+        ## nearest pixel centre, or nearest pixel corner if lon, lat were computed at the corners
+        offset = 0 if idx['add_half_pixel'] else 0.5
+        j = np.clip(np.floor(xp + offset).astype(int), 0, idx['dims'][1]-1)
+        i = np.clip(np.floor(yp + offset).astype(int), 0, idx['dims'][0]-1)
+    else:
+        ## same scene check as nc_extract_point
+        sub = np.where((st_lat >= idx['latrange'][0]) & (st_lat <= idx['latrange'][1]) &
+                       (st_lon >= idx['lonrange'][0]) & (st_lon <= idx['lonrange'][1]))
+        d, k = idx['tree'].query(np.column_stack((st_lon[sub], st_lat[sub])))
+        i, j = np.unravel_index(idx['valid'][k], idx['dims'])
+        pi[sub], pj[sub] = i, j
+        return(pi, pj)
+
+    pi[sub], pj[sub] = i[sub], j[sub]
+    return(pi, pj)
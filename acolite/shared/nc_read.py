@@ -11,9 +11,25 @@ def nc_read(file, dataset):
 # read dataset from netcdf
 # Last updates: 2016-12-19 (QV) added crop (x0,x1,y0,y1)
 ##              2017-03-16 (QV) added sub keyword (xoff, yoff, xcount, ycount)
-def nc_data(file, dataset, crop=False, sub=None, attributes=False):
+##              2026-10-19 (QV) added band keyword to read from (band, y, x) cubes
+def nc_data(file, dataset, crop=False, sub=None, attributes=False, band=None):
     from netCDF4 import Dataset
+    import numpy as np
     with Dataset(file) as nc:
+        if band is not None:
+            if sub is None: sub = [0, 0, nc.variables[dataset].shape[2], nc.variables[dataset].shape[1]]
+            data = nc.variables[dataset][band, sub[1]:sub[1]+sub[3]:1,sub[0]:sub[0]+sub[2]:1]
+            if attributes:
+                nbands = nc.variables[dataset].shape[0]
+                atts = {}
+                for attr in nc.variables[dataset].ncattrs():
+                    att = getattr(nc.variables[dataset],attr)
+                    ## per band attributes are stored as lists
+                    if (type(att) in [list, np.ndarray]):
+                        if len(att) == nbands: att = att[band]
+                    atts[attr] = att
+                return(data, atts)
+            return(data)
         if sub is None:
             if crop is False:
                 data = nc.variables[dataset][:]
@@ -50,3 +66,24 @@ def nc_datasets(file):
     with Dataset(file) as nc:
         ds = list(nc.variables.keys())
     return ds
+
+## find per band datasets stored in (band, y, x) cubes
+## returns dict with per band dataset name (e.g. rhot_443) and tuple of cube dataset name and band index
+def nc_cube_datasets(file):
+    from netCDF4 import Dataset
+    cube_ds = {}
+    with Dataset(file) as nc:
+        for ds in nc.variables:
+            if nc.variables[ds].dimensions != ('band', 'y', 'x'): continue
+            nbands = nc.variables[ds].shape[0]
+            atts = nc.variables[ds].ncattrs()
+            if 'wave_name' in atts:
+                names = getattr(nc.variables[ds], 'wave_name')
+                names = [names] if type(names) is str else list(names)
+            elif 'wavelength' in atts:
+                names = ['{:.0f}'.format(w) for w in getattr(nc.variables[ds], 'wavelength')]
+            else:
+                names = ['{}'.format(bi) for bi in range(nbands)]
+            for bi in range(nbands):
+                cube_ds['{}_{}'.format(ds, names[bi])] = (ds, bi)
+    return(cube_ds)
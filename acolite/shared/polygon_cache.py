@@ -0,0 +1,75 @@
+## def polygon_cache
+## cache for rasterised polygon masks and polygon extents
+## keyed by the path, size and modification time of the polygon file(s) and the target grid definition
+## masks are stored bit-packed in npz files in ac.config['polygon_cache_dir']
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+## key of polygon file from path, size and modification time, including shapefile sidecar files
+## the file contents are not hashed, as reading large polygon databases costs more than the cache saves
+def polygon_hash(poly):
+    import os, glob, hashlib
+
+    files = [poly]
+    if os.path.splitext(poly)[1].lower() == '.shp':
+        files += sorted([f for f in glob.glob('{}.*'.format(os.path.splitext(poly)[0]))
+                         if os.path.splitext(f)[1].lower() in ['.shx', '.dbf', '.prj', '.cpg']])
+
+    stat = [(os.path.abspath(f), os.stat(f).st_size, os.stat(f).st_mtime_ns) for f in files]
+    return(hashlib.sha1(repr(stat).encode()).hexdigest())
+
+## cache file for polygon and optional target grid (xdim, ydim, geotransform, projection)
+## returns None if the cache directory can not be created (e.g. read only data directory)
+def polygon_cache_file(poly, grid = None):
+    import os, hashlib
+    import acolite as ac
+
+    cache_dir = ac.config['polygon_cache_dir'] if 'polygon_cache_dir' in ac.config else \
+                '{}/polygon_cache'.format(ac.config['scratch_dir'])
+    try:
+        if not os.path.exists(cache_dir): os.makedirs(cache_dir)
+        key = ac.shared.polygon_hash(poly)
+    except BaseException as err:
+        print('Not using polygon cache {}: {}'.format(cache_dir, err))
+        return(None)
+    if grid is None:
+        return('{}/{}_limit.npz'.format(cache_dir, key))
+    else:
+        gkey = hashlib.sha1(repr(grid).encode()).hexdigest()
+        return('{}/{}_{}_mask.npz'.format(cache_dir, key, gkey))
+
+## read cached mask or limit, returns None if not cached
+def polygon_cache_read(cache_file):
+    import os
+    import numpy as np
+    if cache_file is None: return(None)
+    if not os.path.exists(cache_file): return(None)
+    try:
+        with np.load(cache_file) as f:
+            if 'limit' in f: return([float(v) for v in f['limit']])
+            shape = tuple(f['shape'])
+            mask = np.unpackbits(f['mask'], count=shape[0]*shape[1]).reshape(shape)
+            return((mask * f['value']).astype(f['value'].dtype))
+    except BaseException as err:
+        print('Failed to read polygon cache {}: {}'.format(cache_file, err))
+        return(None)
+
+## write mask (2D array) or limit (list) to cache
+def polygon_cache_write(cache_file, data):
+    import os
+    import numpy as np
+    if cache_file is None: return
+    tmp = '{}_tmp.npz'.format(os.path.splitext(cache_file)[0])
+    try:
+        if type(data) is list:
+            np.savez(tmp, limit=np.asarray(data, dtype=np.float64))
+        else:
+            ## value of the rasterised pixels is kept to return the same array
+            data = np.asarray(data)
+            np.savez_compressed(tmp, mask=np.packbits(data.astype(bool), axis=None),
+                                shape=np.asarray(data.shape), value=np.asarray(data.max() if data.size else 1, dtype=data.dtype))
+        os.replace(tmp, cache_file)
+    except BaseException as err:
+        print('Failed to write polygon cache {}: {}'.format(cache_file, err))
+        if os.path.exists(tmp): os.remove(tmp)
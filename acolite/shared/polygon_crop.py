@@ -3,11 +3,14 @@
 ## written by Quinten Vanhellemont, RBINS
 ## 2021-02-23
 ## modifications: 2021-02-23 (QV) renamed from crop_to_polygon
+##                2026-10-19 (QV) set spatial filter to the target extent, uses the layer spatial index if present
+##                2026-10-19 (QV) added cache for rasterised masks, moved rasterisation to polygon_rasterize
 
-def polygon_crop(source, poly, return_sub = False):
+def polygon_crop(source, poly, return_sub = False, spatial_filter = True, cache = True):
     import os
     import numpy as np
     from osgeo import ogr,osr,gdal
+    import acolite as ac
 
     ## if target is a file copy information from there
     if type(source) is str:
@@ -25,6 +28,34 @@ def polygon_crop(source, poly, return_sub = False):
              source['yrange'][0], 0.0, source['pixel_size'][1]
         pr = source['proj4_string']
 
+    ## read rasterised mask from cache
+    data = None
+    if cache:
+        cache_file = ac.shared.polygon_cache_file(poly, grid=(xSrc, ySrc, tuple([float(v) for v in gt]), pr))
+        data = ac.shared.polygon_cache_read(cache_file)
+
+    if data is None:
+        data = polygon_rasterize(xSrc, ySrc, gt, pr, poly, spatial_filter=spatial_filter)
+        if cache: ac.shared.polygon_cache_write(cache_file, data)
+
+    if not return_sub:
+        return(data)
+    else:
+        s = np.where(data)
+        if len(s[0]) == 0:
+            print('Polygon not in target dataset.')
+            return(None, None)
+        xmin, xmax = np.min(s[0]), np.max(s[0])
+        ymin, ymax = np.min(s[1]), np.max(s[1])
+        sub = [int(ymin), int(xmin), int(ymax-ymin), int(xmax-xmin)]
+        mask = data[sub[1]:sub[1]+sub[3], sub[0]:sub[0]+sub[2]].astype(bool)
+        mask = mask == False
+        return(sub, mask)
+
+## rasterise polygon file on target grid
+def polygon_rasterize(xSrc, ySrc, gt, pr, poly, spatial_filter = True):
+    from osgeo import ogr,osr,gdal
+
     srs = osr.SpatialReference()
     srs.ImportFromProj4(pr)
     wkt = srs.ExportToWkt()
@@ -39,22 +70,30 @@ def polygon_crop(source, poly, return_sub = False):
     vector_ds = ogr.Open(poly)
     lyr = vector_ds.GetLayer()
 
+    ## only read polygons intersecting the target extent
+    ## for large polygon files this avoids reading all features
+    if spatial_filter:
+        lyr_srs = lyr.GetSpatialRef()
+        if lyr_srs is not None:
+            x0, x1 = gt[0], gt[0] + xSrc * gt[1]
+            y0, y1 = gt[3], gt[3] + ySrc * gt[5]
+            ring = ogr.Geometry(ogr.wkbLinearRing)
+            for x, y in [(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)]: ring.AddPoint_2D(x, y)
+            extent = ogr.Geometry(ogr.wkbPolygon)
+            extent.AddGeometry(ring)
+            extent.Segmentize(max(abs(x1-x0), abs(y1-y0))/10)
+            try:
+                srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+                lyr_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+            except AttributeError:
+                pass
+            extent.Transform(osr.CoordinateTransformation(srs, lyr_srs))
+            env = extent.GetEnvelope()
+            lyr.SetSpatialFilterRect(env[0], env[2], env[1], env[3])
+
     err = gdal.RasterizeLayer(target_ds, [1], lyr, options=['ALL_TOUCHED=True'])
     data = target_ds.ReadAsArray()
 
     target_ds = None
     vector_ds = None
-
-    if not return_sub:
-        return(data)
-    else:
-        s = np.where(data)
-        if len(s[0]) == 0:
-            print('Polygon not in target dataset.')
-            return(None, None)
-        xmin, xmax = np.min(s[0]), np.max(s[0])
-        ymin, ymax = np.min(s[1]), np.max(s[1])
-        sub = [int(ymin), int(xmin), int(ymax-ymin), int(xmax-xmin)]
-        mask = data[sub[1]:sub[1]+sub[3], sub[0]:sub[0]+sub[2]].astype(bool)
-        mask = mask == False
-        return(sub, mask)
+    return(data)
@@ -0,0 +1,38 @@
+## def polygon_index
+## converts a polygon file to a GeoPackage with an R-tree spatial index, returns local path
+## the GeoPackage is stored in the polygon_index directory under scratch_dir (or output if given),
+## keyed by the source file name and path, and reused if it is newer than the source
+## returns None if the index can not be written, so the source file can be used instead
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications: 2026-10-19 (QV) store index in scratch_dir instead of next to the (possibly read only) source
+
+def polygon_index(poly, output = None, override = False):
+    import os, hashlib
+    import acolite as ac
+    from osgeo import gdal
+
+    if output is None:
+        index_dir = ac.config['polygon_index_dir'] if 'polygon_index_dir' in ac.config else \
+                    '{}/polygon_index'.format(ac.config['scratch_dir'])
+        key = hashlib.sha1(os.path.abspath(poly).encode()).hexdigest()[0:12]
+        output = '{}/{}_{}.gpkg'.format(index_dir, os.path.splitext(os.path.basename(poly))[0], key)
+    if (os.path.exists(output)) & (not override):
+        if os.path.getmtime(output) >= os.path.getmtime(poly): return(output)
+
+    print('Building spatial index for {}'.format(poly))
+    tmp = '{}_tmp.gpkg'.format(os.path.splitext(output)[0])
+    try:
+        odir = os.path.dirname(output)
+        if (odir != '') & (not os.path.exists(odir)): os.makedirs(odir)
+        if os.path.exists(tmp): os.remove(tmp)
+        ds = gdal.VectorTranslate(tmp, poly, format='GPKG',
+                                  layerCreationOptions=['SPATIAL_INDEX=YES'],
+                                  geometryType='PROMOTE_TO_MULTI')
+        ds = None
+        os.replace(tmp, output)
+    except BaseException as err:
+        print('Failed to build spatial index for {}: {}'.format(poly, err))
+        if os.path.exists(tmp): os.remove(tmp)
+        return(None)
+    return(output)
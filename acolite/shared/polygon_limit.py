@@ -5,9 +5,18 @@
 ## modifications:
 ##                2021-10-21 (shundt@usgs.gov): Use GetExtent method for envelope. This works for single and multi-polygon
 ##                2022-07-09 (QV) convert srs to WGS84 in degrees
+##                2026-10-19 (QV) added cache
 
-def polygon_limit(poly):
+def polygon_limit(poly, cache = True):
     from osgeo import ogr,osr,gdal
+    import acolite as ac
+
+    ## read limit from cache
+    if cache:
+        cache_file = ac.shared.polygon_cache_file(poly)
+        limit = ac.shared.polygon_cache_read(cache_file)
+        if limit is not None: return(limit)
+
     vector_ds = ogr.Open(poly)
     lyr = vector_ds.GetLayer()
     env = lyr.GetExtent()
@@ -25,4 +34,5 @@ def polygon_limit(poly):
 
     ## close dataset
     vector_ds = None
+    if cache: ac.shared.polygon_cache_write(cache_file, limit)
     return(limit)
@@ -12,8 +12,9 @@
 ## function written by Quinten Vanhellemont, RBINS
 ## 2022-01-01
 ## modifications: 2022-01-01 (QV) renamed from worldlakes, added hydrolakes
+##                2026-10-19 (QV) added spatial_index option to return a GeoPackage with R-tree index
 
-def polylakes(database = 'worldlakes', remove_zip = False):
+def polylakes(database = 'worldlakes', remove_zip = False, spatial_index = False):
     import acolite as ac
     import os, zipfile
 
@@ -47,6 +48,12 @@ def polylakes(database = 'worldlakes', remove_zip = False):
                 z.extractall(local_dir)
             if remove_zip: os.remove(local_zip)
 
+    ## convert to GeoPackage with spatial index on first use
+    ## polygon_crop then only reads the polygons within the scene extent
+    if (spatial_index) & (os.path.exists(local_file)):
+        local_gpkg = ac.shared.polygon_index(local_file)
+        if local_gpkg is not None: local_file = local_gpkg
+
     ## return local path
     if os.path.exists(local_file):
         return(local_file)
@@ -3,8 +3,9 @@
 ## written by Quinten Vanhellemont, RBINS
 ## 2021-02-05
 ## modifications: 2021-02-11 (QV) added half pixel offset option
+##                2026-10-19 (QV) added rows option to compute geolocation for a block of rows
 
-def projection_geo(dct, xy=False, add_half_pixel=False):
+def projection_geo(dct, xy=False, add_half_pixel=False, rows=None):
     import numpy as np
 
     if not add_half_pixel:
@@ -14,7 +15,10 @@ def projection_geo(dct, xy=False, add_half_pixel=False):
         xdim = np.linspace(dct['xrange'][0],dct['xrange'][1]-dct['pixel_size'][0],dct['xdim']).reshape(1,dct['xdim']) + dct['pixel_size'][0]/2
         ydim = np.linspace(dct['yrange'][0],dct['yrange'][1]-dct['pixel_size'][1],dct['ydim']).reshape(dct['ydim'],1) + dct['pixel_size'][1]/2
 
-    xdim = np.tile(xdim, (dct['ydim'],1))
+    ## subset to rows (r0, r1)
+    if rows is not None: ydim = ydim[rows[0]:rows[1]]
+
+    xdim = np.tile(xdim, (ydim.shape[0],1))
     ydim = np.tile(ydim, (1,dct['xdim']))
 
     if xy:
@@ -0,0 +1,49 @@
+## def quicklook_png
+## writes a 2D array as colour mapped PNG, or a 3D uint8 array as RGB PNG, without figure construction
+## table is a (n, 3) uint8 colour table, the data range dmin to dmax is mapped onto the n entries
+## tables up to 254 entries are written as palette images (one byte per pixel)
+## NaN pixels are set to bad (RGB tuple), and pixels below dmin to under if given
+## decimation keeps every nth pixel in both dimensions
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+def quicklook_png(ofile, im, table = None, dmin = None, dmax = None,
+                  bad = (211, 211, 211), under = None, decimation = 1, compress_level = 6):
+    import os
+    import numpy as np
+    from PIL import Image
+
+    if decimation > 1: im = im[::decimation, ::decimation]
+
+    if len(im.shape) == 2:
+        if table is None:
+            table = np.repeat(np.arange(254, dtype=np.uint8)[:, None], 3, axis=1)
+        n = table.shape[0]
+        if dmin is None: dmin = np.nanmin(im)
+        if dmax is None: dmax = np.nanmax(im)
+
+        ## position in colour table, clipped to the table range
+        v = (im - dmin) * ((n-1) / (dmax - dmin)) if dmax != dmin else np.zeros(im.shape)
+        nan = np.isnan(v)
+        idx = np.clip(np.where(nan, 0, v), 0, n-1).astype(np.uint16)
+
+        if n <= 254:
+            ## palette image with bad and under colours appended to the table
+            idx[nan] = n
+            if under is not None: idx[v < 0] = n+1
+            palette = np.vstack((table, [bad, bad if under is None else under])).astype(np.uint8)
+            img = Image.fromarray(idx.astype(np.uint8), mode='P')
+            img.putpalette(palette.ravel().tolist())
+        else:
+            out = table[idx]
+            out[nan] = bad
+            if under is not None: out[v < 0] = under
+            img = Image.fromarray(out)
+    else:
+        img = Image.fromarray(im.astype(np.uint8))
+
+    ## palette images only for PNG
+    if (img.mode == 'P') & (os.path.splitext(ofile)[1].lower() != '.png'): img = img.convert('RGB')
+    img.save(ofile, compress_level=compress_level)
+    return(ofile)
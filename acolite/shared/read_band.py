@@ -5,9 +5,10 @@
 ## 2020-01-25
 ## modifications:  2021-02-08 (QV) renamed from generic read, integrated in acolite-gen
 ##                                 added in col and row diff check from landsat reader
+##                 2026-10-19 (QV) added warp_sub keyword to read a window (xoff, yoff, xcount, ycount) of the warped data
 
 def read_band(file, idx = None, warp_to=None, warp_alg = 'near', # 'cubic', 'bilinear'
-                 target_res=None, sub=None, gdal_meta = False):
+                 target_res=None, sub=None, gdal_meta = False, warp_sub = None):
 
     import os, sys, fnmatch
     from osgeo import gdal
@@ -84,12 +85,16 @@ def read_band(file, idx = None, warp_to=None, warp_alg = 'near', # 'cubic', 'bil
                             outputBounds = outputBounds, outputBoundsSRS = outputBoundsSRS,
                             dstSRS=dstSRS, targetAlignedPixels = targetAlignedPixels,
                             format='VRT', resampleAlg=warp_alg)
+            if warp_sub is not None:
+                warp_sub = [warp_sub[0], warp_sub[1],
+                            min(warp_sub[2], ds.RasterXSize-warp_sub[0]),
+                            min(warp_sub[3], ds.RasterYSize-warp_sub[1])]
             if idx is not None:
                 tmp = ds.GetRasterBand(idx)
-                data = tmp.ReadAsArray()
+                data = tmp.ReadAsArray() if warp_sub is None else tmp.ReadAsArray(*warp_sub)
                 tmp = None
             else:
-                data = ds.ReadAsArray()
+                data = ds.ReadAsArray() if warp_sub is None else ds.ReadAsArray(*warp_sub)
             ds = None
 
     if gdal_meta:
@@ -0,0 +1,27 @@
+## def rsr_convolute_matrix
+## resamples an n-dimensional array to sensor bands with a sparse band weight matrix (nbands, nwave)
+## from rsr_matrix or rsr_hyper_matrix, the wavelength dimension is given by axis
+## the wavelength axis is replaced by the band axis, or removed if the matrix has a single band and squeeze is set
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+def rsr_convolute_matrix(data, matrix, axis = 0, squeeze = True):
+    import numpy as np
+
+    data = np.asarray(data)
+    axis = axis % data.ndim
+
+    ## nans do not contribute, as with the nansum in rsr_convolute_nd
+    if np.isnan(data).any(): data = np.nan_to_num(data, nan=0.0)
+
+    ## put wavelength axis in front and flatten the other dimensions
+    data_w = np.moveaxis(data, axis, 0)
+    shape = data_w.shape
+    res = matrix.dot(data_w.reshape(shape[0], -1))
+    res = np.asarray(res).reshape((matrix.shape[0],)+shape[1:])
+
+    ## put band axis at the original wavelength position
+    res = np.moveaxis(res, 0, axis)
+    if (squeeze) & (matrix.shape[0] == 1): res = np.squeeze(res, axis=axis)
+    return(res)
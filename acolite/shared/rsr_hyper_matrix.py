@@ -0,0 +1,42 @@
+## def rsr_hyper_matrix
+## computes sparse band weight matrix (nbands, nwave) for hyperspectral sensors
+## with gaussian responses defined by centre wavelength and FWHM (in nm, as rsr_hyper)
+## wave is the wavelength grid of the data to be resampled (in micron if nm = True)
+## rows are cached per process keyed by the rounded centre and FWHM and the wavelength grid
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+_rsr_hyper_rows = {}
+
+def rsr_hyper_matrix(wave, waves, widths, step = 0.25, nm = True,
+                     min_sensitivity = 0.0025, cache = True, decimals = 4):
+    import numpy as np
+    import scipy.sparse
+    import acolite as ac
+
+    wave = np.asarray(wave, dtype=np.float64)
+    wave_key = (len(wave), float(wave[0]), float(wave[-1]), hash(wave.tobytes()))
+
+    rows, cols, weights = [], [], []
+    for bi in range(len(waves)):
+        key = None
+        if cache: key = (round(float(waves[bi]), decimals), round(float(widths[bi]), decimals),
+                         step, nm, min_sensitivity, wave_key)
+
+        if key in _rsr_hyper_rows:
+            c, w = _rsr_hyper_rows[key]
+        else:
+            rw, rr = ac.shared.gauss_response(waves[bi], widths[bi], step=step)
+            if nm: rw = rw/1000
+            c, w = ac.shared.rsr_matrix_row(wave, rw, rr, min_sensitivity = min_sensitivity)
+            if cache: _rsr_hyper_rows[key] = (c, w)
+
+        rows.append(np.zeros(len(c), dtype=int)+bi)
+        cols.append(c)
+        weights.append(w)
+
+    ## duplicate entries are summed
+    matrix = scipy.sparse.csr_matrix((np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))),
+                                     shape=(len(waves), len(wave)))
+    return(matrix)
@@ -0,0 +1,48 @@
+## def rsr_matrix
+## computes sparse band weight matrix (nbands, nwave) to resample data on a wavelength grid to sensor bands
+## the weights reproduce rsr_convolute_nd: linear interpolation to the RSR wavelengths
+## followed by the response weighted average
+## rsr is a dict with per band 'wave' and 'response' in the same units as wave
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+def rsr_matrix(wave, rsr, rsr_bands = None, min_sensitivity = 0.0025):
+    import numpy as np
+    import scipy.sparse
+    import acolite as ac
+
+    if rsr_bands is None: rsr_bands = [b for b in rsr]
+    wave = np.asarray(wave, dtype=np.float64)
+
+    rows, cols, weights = [], [], []
+    for bi, band in enumerate(rsr_bands):
+        c, w = ac.shared.rsr_matrix_row(wave, rsr[band]['wave'], rsr[band]['response'],
+                                        min_sensitivity = min_sensitivity)
+        rows.append(np.zeros(len(c), dtype=int)+bi)
+        cols.append(c)
+        weights.append(w)
+
+    ## duplicate entries are summed
+    matrix = scipy.sparse.csr_matrix((np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))),
+                                     shape=(len(rsr_bands), len(wave)))
+    return(matrix)
+
+## column indices and weights for a single band
+def rsr_matrix_row(wave, response_wave, response, min_sensitivity = 0.0025):
+    import numpy as np
+
+    ## remove the edges of the RSR with less than 0.25% sensitivity
+    response = np.asarray(response, dtype=np.float64)
+    response_wave = np.asarray(response_wave, dtype=np.float64)
+    sub = np.where(response > min_sensitivity)
+    response = response[sub]
+    response_wave = response_wave[sub]
+
+    ## linear interpolation weights of the wavelength grid to the RSR wavelengths
+    i = np.clip(np.searchsorted(wave, response_wave, side='right')-1, 0, len(wave)-2)
+    t = np.clip((response_wave-wave[i])/(wave[i+1]-wave[i]), 0, 1)
+
+    cols = np.concatenate((i, i+1))
+    weights = np.concatenate((response * (1-t), response * t)) / np.nansum(response)
+    return(cols, weights)
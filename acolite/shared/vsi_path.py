@@ -0,0 +1,110 @@
+## def vsi_path
+## access to files inside zip and uncompressed tar archives without extracting them
+## vsi_path returns the GDAL /vsizip/ or /vsitar/ path to the (top directory in the) archive, or None
+## vsi_listdir, vsi_exists, vsi_glob and vsi_open work like os.listdir, os.path.exists, glob.glob and open
+## for both regular paths and /vsizip/ and /vsitar/ paths, so metadata can be read from the archive
+## and band data can be read by GDAL with the same paths
+## archive member lists are read with zipfile/tarfile and cached per archive
+## compressed tar files (.tar.gz, .tgz) are not supported, as GDAL can not seek in them efficiently
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+import os, io, glob, fnmatch
+
+_vsi_prefix = {'.zip': '/vsizip/', '.tar': '/vsitar/'}
+_vsi_members = {}
+
+## list members of archive, cached on path, size and modification time
+def vsi_members(archive):
+    import zipfile, tarfile
+    st = os.stat(archive)
+    key = os.path.abspath(archive), st.st_size, st.st_mtime_ns
+    if key not in _vsi_members:
+        if zipfile.is_zipfile(archive):
+            with zipfile.ZipFile(archive, 'r') as f:
+                members = [i.filename.rstrip('/') for i in f.infolist()]
+        else:
+            with tarfile.open(archive, 'r:') as f:
+                members = [i.name.rstrip('/') for i in f.getmembers()]
+        ## add parent directories not stored in the archive
+        dirs = set()
+        for m in members:
+            d = os.path.dirname(m)
+            while (len(d) > 0) & (d not in dirs):
+                dirs.add(d)
+                d = os.path.dirname(d)
+        _vsi_members[key] = sorted(set(members) | dirs)
+    return(_vsi_members[key])
+
+## split /vsizip/ or /vsitar/ path in archive path and member
+def vsi_split(path):
+    path = path.replace('\\', '/')
+    for ext in _vsi_prefix:
+        prefix = _vsi_prefix[ext]
+        if not path.startswith(prefix): continue
+        path = path[len(prefix):]
+        i = path.lower().find(ext+'/')
+        if i < 0:
+            if path.lower().endswith(ext): return(path, '')
+            return(None)
+        return(path[0:i+len(ext)], path[i+len(ext)+1:].strip('/'))
+    return(None)
+
+def vsi_path(file):
+    bn, ext = os.path.splitext(file)
+    if ext.lower() not in _vsi_prefix: return(None)
+    if not os.path.isfile(file): return(None)
+    file = os.path.abspath(file).replace('\\', '/')
+    try:
+        members = vsi_members(file)
+    except BaseException:
+        return(None)
+    if len(members) == 0: return(None)
+    path = '{}{}'.format(_vsi_prefix[ext.lower()], file)
+    ## use the top directory if all files are in it
+    top = set([m.split('/')[0] for m in members])
+    if (len(top) == 1) & (len(members) > 1):
+        path = '{}/{}'.format(path, list(top)[0])
+    return(path)
+
+def vsi_listdir(path):
+    sp = vsi_split(path)
+    if sp is None: return(os.listdir(path))
+    archive, member = sp
+    members = vsi_members(archive)
+    if (len(member) > 0) & (member not in members): raise FileNotFoundError(path)
+    prefix = '{}/'.format(member) if len(member) > 0 else ''
+    return([m[len(prefix):] for m in members if (m.startswith(prefix)) & ('/' not in m[len(prefix):]) & (m != member)])
+
+def vsi_exists(path):
+    sp = vsi_split(path)
+    if sp is None: return(os.path.exists(path))
+    archive, member = sp
+    if not os.path.isfile(archive): return(False)
+    return((len(member) == 0) or (member in vsi_members(archive)))
+
+def vsi_glob(pattern):
+    sp = vsi_split(pattern)
+    if sp is None: return(glob.glob(pattern))
+    archive, member = sp
+    if not os.path.isfile(archive): return([])
+    vsi_archive = pattern[0:len(pattern)-len(member)].rstrip('/')
+    ## match per path level as glob
+    return(['{}/{}'.format(vsi_archive, m) for m in vsi_members(archive)
+                if (m.count('/') == member.count('/')) and (fnmatch.fnmatchcase(m, member))])
+
+def vsi_open(path, mode = 'r', encoding = None):
+    import zipfile, tarfile
+    sp = vsi_split(path)
+    if sp is None: return(open(path, mode, encoding=encoding))
+    if mode not in ['r', 'rb']: raise ValueError('Archive members can only be opened for reading')
+    archive, member = sp
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive, 'r') as f:
+            data = f.read(member)
+    else:
+        with tarfile.open(archive, 'r:') as f:
+            data = f.extractfile(member).read()
+    if mode == 'rb': return(io.BytesIO(data))
+    return(io.StringIO(data.decode(encoding if encoding is not None else 'utf-8')))
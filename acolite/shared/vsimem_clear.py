@@ -0,0 +1,19 @@
+## def vsimem_clear
+## removes files from GDAL's /vsimem/ virtual filesystem (e.g. in memory warped tiles)
+## written by Quinten Vanhellemont, RBINS
+## 2026-10-19
+## modifications:
+
+def vsimem_clear(path):
+    from osgeo import gdal
+
+    if not path.startswith('/vsimem/'): return
+    path = path.rstrip('/')
+
+    ## delete contents of directories
+    files = gdal.ReadDirRecursive(path)
+    if files is not None:
+        for f in files:
+            if f.endswith('/'): continue
+            gdal.Unlink('{}/{}'.format(path, f))
+    gdal.Unlink(path)
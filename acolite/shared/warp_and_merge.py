@@ -4,13 +4,16 @@
 ## 2022-07-22
 ## modifications: 2022-07-23 (QV) added dem
 ##                2022-08-13 (QV) added estimate of image extent and resolution
+##                2026-10-19 (QV) added in_memory option, warping and mosaicking to VRTs in /vsimem/
+##                2026-10-19 (QV) remove in memory files if warping or merging fails
 
 def warp_and_merge(tiles, output = None, limit = None,
                    use_tile_projection = True,
                    delete_warped_tiles = True,
                    rpc_dem = None, find_dem = True,
-                   decimals = 0, dct = None, resolution = None, utm = True):
-    import os
+                   decimals = 0, dct = None, resolution = None, utm = True,
+                   in_memory = False):
+    import os, uuid
     import numpy as np
     import acolite as ac
 
@@ -20,6 +23,12 @@ def warp_and_merge(tiles, output = None, limit = None,
     else:
         from osgeo_utils import gdal_merge
     if output is None: output = '{}/'.format(ac.config['scratch_dir'])
+
+    ## keep intermediate files in GDAL's virtual memory filesystem
+    ## warped tiles and mosaic are VRTs, pixels are only computed when blocks are read
+    if in_memory:
+        output = '/vsimem/acolite_warp_{}'.format(uuid.uuid4().hex)
+    warp_ext = '.vrt' if in_memory else '.tif'
     if type(tiles) is not list: tiles = [tiles]
 
     ## find tile extent in geographic coordinates
@@ -125,53 +134,69 @@ def warp_and_merge(tiles, output = None, limit = None,
         if limit is not None:
             print('User defined limit {} will not be used.'.format(','.join([str(l) for l in limit])))
 
-    ## find DEM
-    if (find_dem) & (rpc_dem is None) & (dct_limit is not None):
-        pos = dct_limit['p']((dct_limit['xrange'][0],dct_limit['xrange'][0],\
-                              dct_limit['xrange'][1],dct_limit['xrange'][1]),\
-                             (dct_limit['yrange'][0],dct_limit['yrange'][1],\
-                              dct_limit['yrange'][0],dct_limit['yrange'][1]), inverse=True)
-        pos_limit = [min(pos[1]), min(pos[0]), max(pos[1]), max(pos[0])]
-        dem_files = ac.dem.copernicus_dem_find(pos_limit)
-
-        if len(dem_files) == 1:
-            rpc_dem = dem_files[0]
-        elif len(dem_files) > 1:
-            rpc_dem ='{}/dem_merged.tif'.format(output)
-            if os.path.exists(rpc_dem): os.remove(rpc_dem)
-            print('Merging {} tiles to {}'.format(len(dem_files), rpc_dem))
-            gdal_merge.main(['', '-o', rpc_dem, '-n', '0']+dem_files)
-
-        print(pos_limit)
-        print(dem_files)
-        print(rpc_dem)
-
-    merge = False
-    if len(tiles) > 1: merge = True
-
-    ## warp tiles
-    warped_tiles=[]
-    for tile in tiles:
-        bn, ex = os.path.splitext((os.path.basename(tile)))
-        warped_file='{}/{}_warped.tif'.format(output, bn)
-        if os.path.exists(warped_file): os.remove(warped_file)
-        warped_tile, dim = ac.shared.warp_inputfile(tile, target=warped_file, rpc_dem=rpc_dem, dct=dct_limit)
-        print(warped_tile, dim)
-        warped_tiles.append(warped_tile)
-
-    ## merge tiles
-    if merge:
-        merged_file='{}/{}_merged.tif'.format(output, os.path.splitext(os.path.basename(tiles[0]))[0])
-        if os.path.exists(merged_file): os.remove(merged_file)
-        print('Merging {} tiles to {}'.format(len(warped_tiles), merged_file))
-        gdal_merge.main(['', '-o', merged_file, '-n', '0']+warped_tiles)
-        dct_merged = ac.shared.projection_read(merged_file)
-
-    if (merge) & (delete_warped_tiles):
-        for warped_tile in warped_tiles: os.remove(warped_tile)
-        return(merged_file, dct_merged, dct_limit)
-    elif (~merge):
-        dct_merged = ac.shared.projection_read(warped_tiles[0])
-        return(warped_tiles[0], dct_merged, dct_limit)
-    else:
-        return(warped_tiles, merged_file, dct_merged, dct_limit)
+    ## remove in memory files if warping or merging fails
+    try:
+        ## find DEM
+        if (find_dem) & (rpc_dem is None) & (dct_limit is not None):
+            pos = dct_limit['p']((dct_limit['xrange'][0],dct_limit['xrange'][0],\
+                                  dct_limit['xrange'][1],dct_limit['xrange'][1]),\
+                                 (dct_limit['yrange'][0],dct_limit['yrange'][1],\
+                                  dct_limit['yrange'][0],dct_limit['yrange'][1]), inverse=True)
+            pos_limit = [min(pos[1]), min(pos[0]), max(pos[1]), max(pos[0])]
+            dem_files = ac.dem.copernicus_dem_find(pos_limit)
+
+            if len(dem_files) == 1:
+                rpc_dem = dem_files[0]
+            elif len(dem_files) > 1:
+                rpc_dem ='{}/dem_merged{}'.format(output, warp_ext)
+                if os.path.exists(rpc_dem): os.remove(rpc_dem)
+                print('Merging {} tiles to {}'.format(len(dem_files), rpc_dem))
+                if in_memory:
+                    gdal.BuildVRT(rpc_dem, dem_files)
+                else:
+                    gdal_merge.main(['', '-o', rpc_dem, '-n', '0']+dem_files)
+
+            print(pos_limit)
+            print(dem_files)
+            print(rpc_dem)
+
+        merge = False
+        if len(tiles) > 1: merge = True
+
+        ## warp tiles
+        warped_tiles=[]
+        for tile in tiles:
+            bn, ex = os.path.splitext((os.path.basename(tile)))
+            warped_file='{}/{}_warped{}'.format(output, bn, warp_ext)
+            if os.path.exists(warped_file): os.remove(warped_file)
+            warped_tile, dim = ac.shared.warp_inputfile(tile, target=warped_file, rpc_dem=rpc_dem, dct=dct_limit,
+                                                        format = 'VRT' if in_memory else 'GTiff')
+            print(warped_tile, dim)
+            warped_tiles.append(warped_tile)
+
+        ## merge tiles
+        if merge:
+            merged_file='{}/{}_merged{}'.format(output, os.path.splitext(os.path.basename(tiles[0]))[0], warp_ext)
+            if os.path.exists(merged_file): os.remove(merged_file)
+            print('Merging {} tiles to {}'.format(len(warped_tiles), merged_file))
+            if in_memory:
+                ## later tiles are on top, zeros are treated as nodata as with gdal_merge
+                gdal.BuildVRT(merged_file, warped_tiles, srcNodata=0, VRTNodata=0)
+            else:
+                gdal_merge.main(['', '-o', merged_file, '-n', '0']+warped_tiles)
+            dct_merged = ac.shared.projection_read(merged_file)
+
+        if (merge) & (in_memory):
+            ## warped VRTs are sources of the merged VRT, they are removed with vsimem_clear
+            return(merged_file, dct_merged, dct_limit)
+        elif (merge) & (delete_warped_tiles):
+            for warped_tile in warped_tiles: os.remove(warped_tile)
+            return(merged_file, dct_merged, dct_limit)
+        elif (~merge):
+            dct_merged = ac.shared.projection_read(warped_tiles[0])
+            return(warped_tiles[0], dct_merged, dct_limit)
+        else:
+            return(warped_tiles, merged_file, dct_merged, dct_limit)
+    except:
+        if in_memory: ac.shared.vsimem_clear(output)
+        raise
@@ -5,8 +5,9 @@
 ## modifications: 2022-07-12 (QV) added RPC dem option
 ##                2022-07-21 (QV) create directory if it doesnt exist
 ##                2022-07-22 (QV) added EPSG to srs if missing
+##                2026-10-19 (QV) added format keyword, support for /vsimem/ targets
 
-def warp_inputfile(file, target=None, dct=None, rpc_dem=None, resampleAlg = 'average'):
+def warp_inputfile(file, target=None, dct=None, rpc_dem=None, resampleAlg = 'average', format = 'GTiff'):
     from osgeo import gdal
     import os
 
@@ -60,10 +61,12 @@ def warp_inputfile(file, target=None, dct=None, rpc_dem=None, resampleAlg = 'ave
                                 xRes = xRes, yRes = yRes,
                                 outputBounds = outputBounds, outputBoundsSRS = outputBoundsSRS,
                                 dstSRS=dstSRS, targetAlignedPixels = targetAlignedPixels,
-                                resampleAlg=resampleAlg, transformerOptions=transformerOptions)
+                                resampleAlg=resampleAlg, transformerOptions=transformerOptions,
+                                format=format)
     else:
         wopt = gdal.WarpOptions(rpc=rpc, errorThreshold=errorThreshold,
-                                resampleAlg=resampleAlg, transformerOptions=transformerOptions)
+                                resampleAlg=resampleAlg, transformerOptions=transformerOptions,
+                                format=format)
 
     if target is None:
         ofile = '{}/{}_warped{}'.format(dn, bn, ext)
@@ -71,11 +74,15 @@ def warp_inputfile(file, target=None, dct=None, rpc_dem=None, resampleAlg = 'ave
         ofile = '{}'.format(target)
 
     ## create directory
-    if not os.path.exists(os.path.dirname(ofile)):
+    vsimem = ofile.startswith('/vsimem/')
+    if (not vsimem) and (not os.path.exists(os.path.dirname(ofile))):
         os.makedirs(os.path.dirname(ofile))
 
     print('Reprojecting {} to {}'.format(file, ofile))
-    if os.path.exists(ofile): os.remove(ofile)
+    if vsimem:
+        gdal.Unlink(ofile)
+    elif os.path.exists(ofile):
+        os.remove(ofile)
 
     dso = gdal.Warp(ofile, file, options=wopt) ## warp to warp options
     dimxo, dimyo = dso.RasterXSize, dso.RasterYSize
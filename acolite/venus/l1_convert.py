@@ -4,6 +4,8 @@
 ## 2021-04-08
 ## modifications:  2021-12-31 (QV) new handling of settings
 ##                2022-01-04 (QV) added netcdf compression
+##                2026-10-19 (QV) added polylakes_spatial_index
+##                2026-10-19 (QV) added polygon_cache
 
 def l1_convert(inputfile, output = None, settings = {},
                 percentiles_compute = True,
@@ -63,7 +65,7 @@ def l1_convert(inputfile, output = None, settings = {},
 
         ## check if ROI polygon is given
         if setu['polylakes']:
-            poly = ac.shared.polylakes(setu['polylakes_database'])
+            poly = ac.shared.polylakes(setu['polylakes_database'], spatial_index=setu['polylakes_spatial_index'])
             setu['polygon_limit'] = False
         else:
             poly = setu['polygon']
@@ -71,7 +73,7 @@ def l1_convert(inputfile, output = None, settings = {},
         if poly is not None:
             if os.path.exists(poly):
                 try:
-                    limit = ac.shared.polygon_limit(poly)
+                    limit = ac.shared.polygon_limit(poly, cache=setu['polygon_cache'])
                     if setu['polygon_limit']:
                         print('Using limit from polygon envelope: {}'.format(limit))
                     else:
@@ -174,7 +176,7 @@ def l1_convert(inputfile, output = None, settings = {},
 
         ## if we are clipping to a given polygon get the clip_mask here
         if clip:
-            clip_mask = ac.shared.polygon_crop(dct_prj, poly, return_sub=False)
+            clip_mask = ac.shared.polygon_crop(dct_prj, poly, return_sub=False, cache=setu['polygon_cache'])
             clip_mask = clip_mask.astype(bool) == False
 
         ## write lat/lon
@@ -4,6 +4,7 @@
 ## 2021-02-25
 ## modifications: 2021-12-31 (QV) new handling of settings
 ##                2022-01-04 (QV) added netcdf compression
+##                2026-10-19 (QV) added polygon_cache
 
 def l1_convert(inputfile, output = None,
                inputfile_swir = None,
@@ -80,7 +81,7 @@ def l1_convert(inputfile, output = None,
         if poly is not None:
             if os.path.exists(poly):
                 try:
-                    limit = ac.shared.polygon_limit(poly)
+                    limit = ac.shared.polygon_limit(poly, cache=setu['polygon_cache'])
                     print('Using limit from polygon envelope: {}'.format(limit))
                     print('Not yet implemented for WorldView')
                     clip = True